@@ -3,23 +3,40 @@
 # =============================================
 import os
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from graphlib import CycleError, TopologicalSorter
 from pathlib import Path
 from datetime import datetime
 import sys
+import yaml
+
+from procesar.consola import imprimir, prefijo_hilo
 
 # =============================================
 # ⚙️ CONFIGURACIÓN DE RUTAS
 # =============================================
 BASE_DIR = Path(__file__).resolve().parents[1]
 APP_DIR = BASE_DIR / "app"
+PROCESAR_DIR = APP_DIR / "procesar"
 DATA_DIR = BASE_DIR / "data"
 
-ETL_SCRIPTS = [
-    "procesar_anexo2.py",
-    "procesar_anexo3.py",
-    "procesar_anexo4.py",
-    "procesar_anexo5.py",
-]
+# Grafo de dependencias: script -> scripts que deben terminar antes
+ETL_SCRIPTS = {
+    "procesar_anexo2.py": [],
+    "procesar_anexo3.py": [],
+    "procesar_anexo4.py": [],
+    "procesar_anexo5.py": [],
+    "analisis_cualitativo_anexo5.py": ["procesar_anexo5.py"],
+}
+
+# Scripts cuyo trabajo es procesar/motor.py: pueden correr dentro de este intérprete
+EN_PROCESO = {
+    "procesar_anexo2.py": "anexo2",
+    "procesar_anexo3.py": "anexo3",
+    "procesar_anexo4.py": "anexo4",
+    "procesar_anexo5.py": "anexo5",
+}
 
 # =============================================
 # 🧩 FUNCIONES AUXILIARES
@@ -27,31 +44,136 @@ ETL_SCRIPTS = [
 def log(mensaje, tipo="INFO"):
     hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     simbolo = {"INFO": "ℹ️", "OK": "✅", "WARN": "⚠️", "ERROR": "❌"}.get(tipo, "")
-    print(f"{simbolo} [{hora}] {mensaje}")
+    imprimir(f"{simbolo} [{hora}] {mensaje}", prefijo="")
 
 def ejecutar_script(script_name):
-    """Ejecuta un script Python y captura su salida."""
-    script_path = APP_DIR / script_name
+    """Ejecuta un script Python y retransmite su salida línea a línea con prefijo."""
+    script_path = PROCESAR_DIR / script_name
     if not script_path.exists():
         log(f"No se encontró el script: {script_path}", "ERROR")
         return False
 
+    prefijo = f"[{Path(script_name).stem}]"
     log(f"Ejecutando {script_name}...", "INFO")
-    try:
-        resultado = subprocess.run(
-            [sys.executable, str(script_path)],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    proceso = subprocess.Popen(
+        [sys.executable, str(script_path)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        env=env,
+    )
+    for linea in proceso.stdout:
+        imprimir(linea.rstrip(), prefijo=prefijo)
+    proceso.wait()
+
+    if proceso.returncode == 0:
         log(f"{script_name} completado correctamente ✅", "OK")
-        print(resultado.stdout)
         return True
-    except subprocess.CalledProcessError as e:
-        log(f"Error ejecutando {script_name}: {e}", "ERROR")
-        print(e.stdout)
-        print(e.stderr)
+    log(f"Error ejecutando {script_name}: código de salida {proceso.returncode}", "ERROR")
+    return False
+
+def leer_en_proceso():
+    """Lee procesamiento.en_proceso de settings_general.yaml (por defecto True)."""
+    try:
+        with open(BASE_DIR / "config" / "settings_general.yaml", "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        return bool(config.get("procesamiento", {}).get("en_proceso", True))
+    except Exception:
+        return True
+
+def ejecutar_en_proceso(script_name):
+    """Ejecuta el anexo con procesar/motor.py sin lanzar otro intérprete."""
+    from procesar.motor import ejecutar
+
+    log(f"Ejecutando {script_name} (en proceso)...", "INFO")
+    try:
+        # Mismo prefijo "[script]" que la salida de ejecutar_script
+        with prefijo_hilo(f"[{Path(script_name).stem}]"):
+            ejecutar(EN_PROCESO[script_name])
+    except Exception as e:
+        log(f"Error ejecutando {script_name}: {type(e).__name__}: {e}", "ERROR")
         return False
+    log(f"{script_name} completado correctamente ✅", "OK")
+    return True
+
+def ejecutar_grafo(pasos, en_proceso=False):
+    """
+    Ejecuta los scripts del grafo en paralelo respetando dependencias.
+    Devuelve {script: (ok, inicio, fin)} con tiempos relativos al arranque
+    (ok=None si se omitió por una dependencia fallida).
+    Con en_proceso=True los anexos de EN_PROCESO corren en hilos de este intérprete.
+    Lanza ValueError si hay dependencias no definidas o circulares.
+    """
+    desconocidas = {d for deps in pasos.values() for d in deps if d not in pasos}
+    if desconocidas:
+        raise ValueError(f"Dependencias no definidas en el grafo: {', '.join(sorted(desconocidas))}")
+    try:
+        TopologicalSorter(pasos).prepare()
+    except CycleError as e:
+        raise ValueError(f"Dependencias circulares en el grafo: {' → '.join(e.args[1])}") from None
+
+    resultados = {}
+    pendientes = dict(pasos)
+    t0 = time.perf_counter()
+
+    def correr(script):
+        inicio = time.perf_counter() - t0
+        try:
+            if en_proceso and script in EN_PROCESO:
+                ok = ejecutar_en_proceso(script)
+            else:
+                ok = ejecutar_script(script)
+        except Exception as e:
+            # Un fallo inesperado no debe detener al planificador ni a los demás scripts
+            log(f"Error ejecutando {script}: {type(e).__name__}: {e}", "ERROR")
+            ok = False
+        return script, ok, inicio, time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=len(pasos) or 1) as pool:
+        en_curso = set()
+        while pendientes or en_curso:
+            for script, deps in list(pendientes.items()):
+                if all(d in resultados for d in deps):
+                    del pendientes[script]
+                    if all(resultados[d][0] for d in deps):
+                        en_curso.add(pool.submit(correr, script))
+                    else:
+                        log(f"{script} omitido: falló una dependencia ({', '.join(deps)})", "WARN")
+                        ahora = time.perf_counter() - t0
+                        resultados[script] = (None, ahora, ahora)
+            if not en_curso:
+                continue
+            hechos, en_curso = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                script, ok, inicio, fin = futuro.result()
+                resultados[script] = (ok, inicio, fin)
+
+    return resultados
+
+def ruta_critica(pasos, resultados):
+    """Reconstruye la cadena de dependencias que determinó el tiempo total."""
+    if not resultados:
+        return []
+    actual = max(resultados, key=lambda s: resultados[s][2])
+    cadena = [actual]
+    while pasos.get(actual):
+        actual = max(pasos[actual], key=lambda d: resultados[d][2])
+        cadena.append(actual)
+    return cadena[::-1]
+
+def imprimir_resumen(pasos, resultados):
+    """Imprime duración por script y la ruta crítica en tiempo de reloj."""
+    log("Resumen de tiempos (reloj):", "INFO")
+    for script, (ok, inicio, fin) in sorted(resultados.items(), key=lambda r: r[1][1]):
+        estado = "OK" if ok else ("OMITIDO" if ok is None else "ERROR")
+        imprimir(f"   {script:<34} {inicio:7.1f}s → {fin:7.1f}s  ({fin - inicio:6.1f}s)  {estado}", prefijo="")
+    cadena = ruta_critica(pasos, resultados)
+    if cadena:
+        total = resultados[cadena[-1]][2]
+        log(f"Ruta crítica: {' → '.join(cadena)} = {total:.1f}s", "INFO")
 
 # =============================================
 # 🚀 EJECUCIÓN PRINCIPAL
@@ -67,13 +189,11 @@ if __name__ == "__main__":
     # Crear carpetas de salida si no existen
     (DATA_DIR / "processed").mkdir(parents=True, exist_ok=True)
 
-    total_ok = 0
-    for script in ETL_SCRIPTS:
-        ok = ejecutar_script(script)
-        if ok:
-            total_ok += 1
+    resultados = ejecutar_grafo(ETL_SCRIPTS, en_proceso=leer_en_proceso())
+    total_ok = sum(1 for ok, _, _ in resultados.values() if ok)
+    imprimir_resumen(ETL_SCRIPTS, resultados)
 
-    log(f"{total_ok}/{len(ETL_SCRIPTS)} anexos procesados correctamente.", "OK")
+    log(f"{total_ok}/{len(ETL_SCRIPTS)} scripts del ETL completados correctamente.", "OK")
 
     if total_ok == len(ETL_SCRIPTS):
         log("🎯 Todos los anexos fueron procesados exitosamente. Archivos listos en /data/processed", "OK")
@@ -4,11 +4,20 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from pathlib import Path
 from utils.style import aplicar_estilos
+from utils import loaders
+from utils.planes import plan_anexo
+from utils.puntuacion import clasificar
 import datetime
 
+# Copy-on-Write (siempre activo desde pandas 3): las páginas reciben vistas del frame
+# compartido de utils/loaders.py y lo que escriban en ellas no llega al original
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 
 # ==============================================================
 # ⚙️ CONFIGURACIÓN GENERAL
@@ -33,26 +42,14 @@ aplicar_estilos()
 # 🧩 CLASIFICADOR POR ANEXO
 # ==============================================================
 
-def clasificar_anexo(anexo, col_sum):
-    if anexo == 2:
-        if col_sum <= 10: return "DEFICIENTE"
-        elif col_sum <= 20: return "REGULAR"
-        elif col_sum <= 30: return "BUENO"
-        else: return "EXCELENTE"
-
-    elif anexo == 3:
-        if col_sum <= 7: return "DEFICIENTE"
-        elif col_sum <= 16: return "REGULAR"
-        elif col_sum <= 25: return "BUENO"
-        else: return "EXCELENTE"
-
-    elif anexo == 4:
-        if col_sum <= 8: return "DEFICIENTE"
-        elif col_sum <= 18: return "REGULAR"
-        elif col_sum <= 26: return "BUENO"
-        else: return "EXCELENTE"
-    else:
-        return "Sin dato"
+# Umbrales del promedio por UT (clasificacion_tablero en config/settings_anexoN.yaml)
+ANEXOS_TABLERO = (2, 3, 4)
+
+def clasificar_anexo(anexo, valores):
+    """Categoría de cada valor con búsqueda binaria sobre los umbrales del anexo."""
+    if anexo not in ANEXOS_TABLERO:
+        return np.full(len(np.atleast_1d(valores)), "Sin dato", dtype=object)
+    return clasificar(valores, plan_anexo(f"anexo{anexo}").umbrales_tablero)
 
 # ==============================================================
 # 🎨 COLORES INSTITUCIONALES
@@ -73,12 +70,16 @@ COLOR_ANEXOS = {
 }
 
 # ==============================================================
-# 🧠 FUNCIÓN DE CARGA CACHEADA
+# 🧠 RESUMEN POR UT (agregados UT × MES × SUPERVISOR del ETL)
 # ==============================================================
 
-@st.cache_data(show_spinner=False)
-def cargar_excel(nombre):
-    return pd.read_excel(DATA_DIR / nombre)
+def resumen_ut(tabla, col_pct, col_eval):
+    """Promedio de col_pct y evaluación más frecuente por UT, sumados desde los agregados."""
+    resumen = loaders.promedios_por(tabla, "UNIDAD_TERRITORIAL", [col_pct])
+    resumen["Evaluacion"] = resumen["UNIDAD_TERRITORIAL"].map(
+        loaders.moda_por(tabla, "UNIDAD_TERRITORIAL", col_eval)
+    )
+    return resumen
 
 # ==============================================================
 # 📊 FUNCIÓN GENERAL DE GRÁFICO
@@ -87,7 +88,7 @@ def cargar_excel(nombre):
 def graficar(df, anexo, col_puntaje, titulo, normalizar=False, max_valor=None):
     """Genera gráfico horizontal por UT, coloreado por categoría"""
     resumen = (
-        df.groupby("UNIDAD_TERRITORIAL")[col_puntaje]
+        df.groupby("UNIDAD_TERRITORIAL", observed=True)[col_puntaje]
         .mean()
         .reset_index()
         .sort_values(by=col_puntaje, ascending=False)
@@ -101,7 +102,7 @@ def graficar(df, anexo, col_puntaje, titulo, normalizar=False, max_valor=None):
         x_var = col_puntaje
         x_label = "Puntaje promedio"
 
-    resumen["Categoria"] = resumen[col_puntaje].apply(lambda x: clasificar_anexo(anexo, x))
+    resumen["Categoria"] = clasificar_anexo(anexo, resumen[col_puntaje])
 
     fig = px.bar(
         resumen,
@@ -147,24 +148,17 @@ st.markdown(
 # ==============================================================
 
 try:
-    df2 = cargar_excel("anexo2_consolidado.xlsx")
-    df3 = cargar_excel("anexo3_consolidado.xlsx")
-    df4 = cargar_excel("anexo4_consolidado.xlsx")
-
     # Selección y renombrado uniforme
-    g2 = df2.groupby("UNIDAD_TERRITORIAL")[["PORCENTAJE"]].mean().reset_index()
+    g2 = resumen_ut("anexo2", "PORCENTAJE", "EVALUACION")
     g2["Anexo"] = "Anexo 2 – Acompañamiento con Gestión Territorial"
-    g2["Evaluacion"] = df2.groupby("UNIDAD_TERRITORIAL")["EVALUACION"].agg(lambda x: x.mode()[0] if not x.mode().empty else "Sin dato").values
 
-    g3 = df3.groupby("UNIDAD_TERRITORIAL")[["PORCENTAJE_TOTAL"]].mean().reset_index()
+    g3 = resumen_ut("anexo3", "PORCENTAJE_TOTAL", "EVALUACION_TOTAL")
     g3.rename(columns={"PORCENTAJE_TOTAL": "PORCENTAJE"}, inplace=True)
     g3["Anexo"] = "Anexo 3 – Acompañamiento Diferenciado"
-    g3["Evaluacion"] = df3.groupby("UNIDAD_TERRITORIAL")["EVALUACION_TOTAL"].agg(lambda x: x.mode()[0] if not x.mode().empty else "Sin dato").values
 
-    g4 = df4.groupby("UNIDAD_TERRITORIAL")[["PORCENTAJE_TOTAL"]].mean().reset_index()
+    g4 = resumen_ut("anexo4", "PORCENTAJE_TOTAL", "EVALUACION_TOTAL")
     g4.rename(columns={"PORCENTAJE_TOTAL": "PORCENTAJE"}, inplace=True)
     g4["Anexo"] = "Anexo 4 – Intervenciones Complementarias"
-    g4["Evaluacion"] = df4.groupby("UNIDAD_TERRITORIAL")["EVALUACION_TOTAL"].agg(lambda x: x.mode()[0] if not x.mode().empty else "Sin dato").values
 
     # Unir, escalar y ordenar
     df_global = pd.concat([g2, g3, g4], ignore_index=True)
@@ -240,21 +234,12 @@ try:
         ("PORCENTAJE_CTZ", "EVALUACION_CTZ", "Anexo 3 – Evaluación CTZ")
     ]
 
+    columnas3 = loaders.columnas("anexo3")
     for (col_pct, col_eval, titulo), tab in zip(detalles_anexo3, pestañas3):
         with tab:
-            if col_pct in df3.columns and col_eval in df3.columns:
-                resumen = (
-                    df3.groupby("UNIDAD_TERRITORIAL")[[col_pct]]
-                    .mean()
-                    .reset_index()
-                    .sort_values(by=col_pct, ascending=False)
-                )
+            if col_pct in columnas3 and col_eval in columnas3:
+                resumen = resumen_ut("anexo3", col_pct, col_eval).sort_values(by=col_pct, ascending=False)
                 resumen[col_pct] = (resumen[col_pct] * 100).round(1)
-                resumen["Evaluacion"] = (
-                    df3.groupby("UNIDAD_TERRITORIAL")[col_eval]
-                    .agg(lambda x: x.mode()[0] if not x.mode().empty else "Sin dato")
-                    .values
-                )
                 resumen["Etiqueta"] = resumen.apply(
                     lambda r: f"{r[col_pct]:.1f}% – {r['Evaluacion']}", axis=1
                 )
@@ -301,14 +286,14 @@ try:
         ("PORCENTAJE_INDEP", "EVALUACION_INDEP", "Anexo 4 – Evaluación Independencia Económica")
     ]
 
+    columnas4 = loaders.columnas("anexo4")
     for (col_pct, col_eval, titulo), tab in zip(detalles_anexo4, pestañas4):
         with tab:
-            if col_pct in df4.columns and col_eval in df4.columns:
+            if col_pct in columnas4 and col_eval in columnas4:
                 resumen = (
-                    df4[["UNIDAD_TERRITORIAL", col_pct, col_eval]]
-                    .dropna(subset=[col_pct])  # evita filas vacías
-                    .groupby("UNIDAD_TERRITORIAL", as_index=False)
-                    .agg({col_pct: "mean", col_eval: "first"})  # toma el valor de evaluación existente
+                    resumen_ut("anexo4", col_pct, col_eval)
+                    .rename(columns={"Evaluacion": col_eval})
+                    .dropna(subset=[col_pct])  # UT sin ningún porcentaje informado
                     .sort_values(by=col_pct, ascending=False)
                 )
                 resumen[col_pct] = (resumen[col_pct] * 100).round(1)
@@ -6,9 +6,8 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from pathlib import Path
-import yaml
-from utils.loaders import cargar_datos
+from utils import loaders
+from utils.planes import plan_anexo
 from utils.style import aplicar_estilos
 from utils.llm import generate_anexo2_summary
 import plotly.express as px
@@ -40,57 +39,48 @@ st.markdown("<br>", unsafe_allow_html=True)
 import logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-@st.cache_data(show_spinner=False)
-def cargar_y_preparar_datos():
-    """Carga datos procesados, convierte tipos críticos y valida columnas requeridas."""
-    try:
-        data = cargar_datos()
-        df = data.get("a2")
-
-        if df is None or df.empty:
-            logging.warning("Archivo anexo2_consolidado.xlsx no encontrado o vacío.")
-            st.warning("No se encontró el archivo `anexo2_consolidado.xlsx` en `/data/processed/`.")
-            return None
+# Tabla del Anexo 2 en data/processed/consolidados.sqlite (la llena el ETL)
+TABLA = "anexo2"
 
-        # Convertir tipos una sola vez
-        if "MES" in df.columns:
-            df["MES"] = pd.to_numeric(df["MES"], errors="coerce")
+def validar_datos():
+    """Valida que la tabla exista y tenga las columnas requeridas (sin cargar filas)."""
+    try:
+        columnas = loaders.columnas(TABLA)
+        if not columnas:
+            logging.warning("Tabla anexo2 no encontrada en consolidados.sqlite.")
+            st.warning("No se encontró el Anexo 2 en `/data/processed/consolidados.sqlite` (ejecuta el ETL).")
+            return False
 
         # Validar columnas esenciales
         cols_min = {"UNIDAD_TERRITORIAL", "MES", "SUPERVISOR"}
-        if not cols_min.issubset(set(df.columns)):
-            faltantes = cols_min - set(df.columns)
+        if not cols_min.issubset(set(columnas)):
+            faltantes = cols_min - set(columnas)
             st.error(f"Faltan columnas requeridas: {', '.join(faltantes)}")
             logging.error(f"Columnas faltantes: {faltantes}")
-            return None
+            return False
 
-        logging.info(f"Datos cargados correctamente: {len(df)} registros, {len(df.columns)} columnas.")
-        return df
+        logging.info(f"Datos disponibles: {loaders.contar(TABLA)} registros, {len(columnas)} columnas.")
+        return True
 
     except Exception as e:
         logging.exception("Error al cargar datos:")
         st.error(f"❌ Error al cargar datos: {e}")
-        return None
+        return False
 
-df = cargar_y_preparar_datos()
-if df is None:
+if not validar_datos():
     st.stop()
 
 # ==============================================================
 # CARGAR CONFIGURACIÓN YAML (nombres, grupos dinámicos)
 # ==============================================================
 
-BASE_DIR = Path(__file__).resolve().parents[2]
-YAML_PATH = BASE_DIR / "config" / "settings_anexo2.yaml"
-
+# Plan compilado de settings_anexo2.yaml (se vuelve a leer solo si cambia el archivo)
 try:
-    with open(YAML_PATH, "r", encoding="utf-8") as f:
-        config_a2 = yaml.safe_load(f)
-        mapa_items = config_a2.get("items_nombres", {})
-        grupos_items = config_a2.get("grupos_items", {})
-    logging.info("YAML de configuración cargado correctamente.")
+    plan_a2 = plan_anexo("anexo2")
+    mapa_items = plan_a2.items_nombres
+    grupos_items = {grupo: list(items) for grupo, items in plan_a2.grupos_items.items()}
 except Exception as e:
-    st.error(f"❌ Error al leer {YAML_PATH.name}: {e}")
+    st.error(f"❌ Error al leer settings_anexo2.yaml: {e}")
     logging.exception("Error al leer YAML:")
     mapa_items, grupos_items = {}, {}
 
@@ -126,31 +116,36 @@ if "filters" not in st.session_state:
 
 col1, col2, col3 = st.columns(3)
 with col1:
-    ut_sel = st.multiselect("Unidad Territorial:", sorted(df["UNIDAD_TERRITORIAL"].dropna().unique()),
+    ut_sel = st.multiselect("Unidad Territorial:", loaders.opciones(TABLA, "UNIDAD_TERRITORIAL"),
                             default=st.session_state.filters["ut"])
 with col2:
-    mes_sel = st.multiselect("Mes:", sorted(df["MES"].dropna().unique()),
+    mes_sel = st.multiselect("Mes:", loaders.opciones(TABLA, "MES"),
                              default=st.session_state.filters["mes"])
 with col3:
-    sup_sel = st.multiselect("Supervisor:", sorted(df["SUPERVISOR"].dropna().unique()),
+    sup_sel = st.multiselect("Supervisor:", loaders.opciones(TABLA, "SUPERVISOR"),
                              default=st.session_state.filters["sup"])
 
 # Actualizar sesión si cambia
 st.session_state.filters.update({"ut": ut_sel, "mes": mes_sel, "sup": sup_sel})
 
-# Aplicar filtros
-df_filtrado = df.copy()
-if ut_sel:
-    df_filtrado = df_filtrado[df_filtrado["UNIDAD_TERRITORIAL"].isin(ut_sel)]
-if mes_sel:
-    df_filtrado = df_filtrado[df_filtrado["MES"].isin(mes_sel)]
-if sup_sel:
-    df_filtrado = df_filtrado[df_filtrado["SUPERVISOR"].isin(sup_sel)]
+# Filtros de la barra: conteos, histogramas, promedios y modas se suman desde los
+# agregados UT × MES × SUPERVISOR del ETL, sin traer fichas a la página
+filtros = {"UNIDAD_TERRITORIAL": ut_sel, "MES": mes_sel, "SUPERVISOR": sup_sel}
+total_registros = loaders.contar(TABLA, filtros)
 
-if df_filtrado.empty:
+if not total_registros:
     st.warning("No hay registros que coincidan con los filtros seleccionados.")
     st.stop()
 
+# Fichas con cada valor (0/1/2) en cada ítem
+hist_items = loaders.histograma_items(TABLA, filtros)
+
+def conteo_items(valor, items):
+    """Fichas con `valor` en cada ítem de `items` (0 si el ítem no tiene datos)."""
+    if valor not in hist_items.columns:
+        return pd.Series(0, index=items, dtype=int)
+    return hist_items[valor].reindex(items, fill_value=0).astype(int)
+
 # ==============================================================
 # 🚨 TARJETAS DE ÍTEMS 'NO CUMPLE' – ALERTAS OPERATIVAS (versión visual mejorada)
 # ==============================================================
@@ -161,9 +156,9 @@ st.markdown("###### Actividades con riesgo o incumplimiento detectado")
 cols_items = [f"ITEM_{i}" for i in range(1, 21)]
 
 # Calcular frecuencia y porcentaje de 'no cumple'
-freq_0 = (df_filtrado[cols_items] == 0).sum()
-total_eval = len(df_filtrado)
-pct_0 = ((df_filtrado[cols_items] == 0).sum() / total_eval * 100).round(1)
+freq_0 = conteo_items(0, cols_items)
+total_eval = total_registros
+pct_0 = (freq_0 / total_eval * 100).round(1)
 no_cumple = pct_0[pct_0 > 0].sort_values(ascending=False)
 
 if no_cumple.empty:
@@ -252,26 +247,22 @@ components.html(tarjetas_html, height=400, scrolling=True)
 # ==============================================================
 
 cols_items = [f"ITEM_{i}" for i in range(1, 21)]
-df_items = df_filtrado[cols_items].copy()
 
-# Calcular totales globales
-valores = df_items.values.flatten()
-valores = valores[~pd.isna(valores)]
-total_validos = int(len(valores))
-total_0 = int((valores == 0).sum())
-total_1 = int((valores == 1).sum())
-total_2 = int((valores == 2).sum())
+# Calcular totales globales (respuestas válidas = sin NA)
+total_validos = int(hist_items.reindex(cols_items, fill_value=0).to_numpy().sum())
+total_0 = int(conteo_items(0, cols_items).sum())
+total_1 = int(conteo_items(1, cols_items).sum())
+total_2 = int(conteo_items(2, cols_items).sum())
 
 pct_0 = round((total_0 / total_validos) * 100, 1) if total_validos else 0.0
 pct_1 = round((total_1 / total_validos) * 100, 1) if total_validos else 0.0
 pct_2 = round((total_2 / total_validos) * 100, 1) if total_validos else 0.0
 
 # Agrupar ítems según YAML (CTZ, Gestor, Hogar, Acompañamiento)
-def totales_por_valor(df, items, valor):
+def totales_por_valor(items, valor):
     if not items:
         return 0
-    subset = df[items]
-    return int((subset == valor).sum().sum())
+    return int(conteo_items(valor, items).sum())
 
 nombres_humanos = {
     "Al CTZ": "las actividades sobre CTZ",
@@ -284,21 +275,21 @@ resumen_grupos = []
 for nombre, items in grupos_items.items():
     resumen_grupos.append({
         "categoria_actividades": nombres_humanos.get(nombre, nombre),
-        "total_0": totales_por_valor(df_filtrado, items, 0),
-        "total_1": totales_por_valor(df_filtrado, items, 1),
-        "total_validos_en_categoria": int(df_filtrado[items].notna().sum().sum())
+        "total_0": totales_por_valor(items, 0),
+        "total_1": totales_por_valor(items, 1),
+        "total_validos_en_categoria": int(hist_items.reindex(items, fill_value=0).to_numpy().sum())
     })
 
-def ranking_items(df, items, valor, etiqueta_map):
-    s = df[items].apply(lambda col: (col == valor).sum())
+def ranking_items(items, valor, etiqueta_map):
+    s = conteo_items(valor, items)
     s = s[s > 0].sort_values(ascending=False)
     return [
         {"item": k, "nombre": etiqueta_map.get(k, k), "freq": int(v)}
         for k, v in s.items()
     ]
 
-rank_0 = ranking_items(df_filtrado, cols_items, 0, mapa_items)
-rank_1 = ranking_items(df_filtrado, cols_items, 1, mapa_items)
+rank_0 = ranking_items(cols_items, 0, mapa_items)
+rank_1 = ranking_items(cols_items, 1, mapa_items)
 
 contexto_llm = {
     "filtros_aplicados": {
@@ -307,7 +298,7 @@ contexto_llm = {
         "supervisor": sup_sel or "todos",
     },
     "global": {
-        "total_registros": int(len(df_filtrado)),
+        "total_registros": int(total_registros),
         "total_respuestas_validas": total_validos,
         "porcentajes": {"no_cumple_0": pct_0, "en_desarrollo_1": pct_1, "cumple_2": pct_2}
     },
@@ -351,14 +342,12 @@ st.markdown("<br><hr style='border:0.5px solid #ddd;margin:25px 0;'>", unsafe_al
 # 🔸 RANKING DE UNIDADES TERRITORIALES (corregido)
 # ==============================================================
 
-ranking = (
-    df_filtrado.groupby("UNIDAD_TERRITORIAL", as_index=False)
-    .agg(
-        PORCENTAJE=("PORCENTAJE", "mean"),
-        EVALUACION=("EVALUACION", lambda x: x.mode()[0] if not x.mode().empty else "Sin dato")
-    )
-    .sort_values("PORCENTAJE", ascending=False)
+# Promedio y evaluación más frecuente por UT, calculados en SQLite
+ranking = loaders.promedios_por(TABLA, "UNIDAD_TERRITORIAL", ["PORCENTAJE"], filtros)
+ranking["EVALUACION"] = ranking["UNIDAD_TERRITORIAL"].map(
+    loaders.moda_por(TABLA, "UNIDAD_TERRITORIAL", "EVALUACION", filtros)
 )
+ranking = ranking.sort_values("PORCENTAJE", ascending=False)
 ranking["PORCENTAJE"] = (ranking["PORCENTAJE"] * 100).round(1)
 
 n_ut = ranking["UNIDAD_TERRITORIAL"].nunique()
@@ -426,12 +415,8 @@ with col2:
 # 🔸 DISPERSIÓN Y VARIABILIDAD
 # ==============================================================
 
-if "ITEMS_VALIDO" in df_filtrado.columns:
-    disp = (
-        df_filtrado.groupby("UNIDAD_TERRITORIAL")[["PORCENTAJE", "ITEMS_VALIDO"]]
-        .mean()
-        .reset_index()
-    )
+if "ITEMS_VALIDO" in loaders.columnas(TABLA):
+    disp = loaders.promedios_por(TABLA, "UNIDAD_TERRITORIAL", ["PORCENTAJE", "ITEMS_VALIDO"], filtros)
     disp["PORCENTAJE"] = (disp["PORCENTAJE"] * 100).round(1)
 
     fig_disp = px.scatter(
@@ -455,9 +440,9 @@ if "ITEMS_VALIDO" in df_filtrado.columns:
 # 🔸 MAPA DE CALOR DE ÍTEMS (versión limpia y profesional)
 # ==============================================================
 
-cols_items = [c for c in df_filtrado.columns if c.startswith("ITEM_")]
+cols_items = [c for c in loaders.columnas(TABLA) if c.startswith("ITEM_")]
 if cols_items:
-    heat = df_filtrado.groupby("UNIDAD_TERRITORIAL")[cols_items].mean().reset_index()
+    heat = loaders.promedios_por(TABLA, "UNIDAD_TERRITORIAL", cols_items, filtros)
     heat_melt = heat.melt(id_vars="UNIDAD_TERRITORIAL", var_name="Ítem", value_name="Promedio")
 
     # Eje X limpio: solo Item 1, Item 2, etc.
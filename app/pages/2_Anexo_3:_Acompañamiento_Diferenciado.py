@@ -6,10 +6,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
-import yaml
 import logging
-from utils.loaders import cargar_datos
+from utils import loaders
+from utils.planes import plan_anexo
 from utils.style import aplicar_estilos
 from utils.llm import generate_anexo3_summary  # ⚠️ Asegúrate de definir esta función en utils/llm.py
 
@@ -33,51 +32,44 @@ st.markdown("<br>", unsafe_allow_html=True)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-@st.cache_data(show_spinner=False)
-def cargar_y_preparar_datos():
-    """Carga datos del Anexo 3 y valida estructura."""
-    try:
-        data = cargar_datos()
-        df = data.get("a3")
-
-        if df is None or df.empty:
-            st.warning("No se encontró el archivo `anexo3_consolidado.xlsx` en `/data/processed/`.")
-            return None
+# Tabla del Anexo 3 en data/processed/consolidados.sqlite (la llena el ETL)
+TABLA = "anexo3"
 
-        if "MES" in df.columns:
-            df["MES"] = pd.to_numeric(df["MES"], errors="coerce")
+def validar_datos():
+    """Valida que la tabla del Anexo 3 exista y tenga las columnas requeridas."""
+    try:
+        columnas = loaders.columnas(TABLA)
+        if not columnas:
+            st.warning("No se encontró el Anexo 3 en `/data/processed/consolidados.sqlite` (ejecuta el ETL).")
+            return False
 
         cols_min = {"UNIDAD_TERRITORIAL", "MES", "SUPERVISOR"}
-        if not cols_min.issubset(set(df.columns)):
-            faltantes = cols_min - set(df.columns)
+        if not cols_min.issubset(set(columnas)):
+            faltantes = cols_min - set(columnas)
             st.error(f"Faltan columnas requeridas: {', '.join(faltantes)}")
-            return None
+            return False
 
-        return df
+        return True
 
     except Exception as e:
         st.error(f"❌ Error al cargar datos: {e}")
         logging.exception(e)
-        return None
+        return False
 
-df = cargar_y_preparar_datos()
-if df is None:
+if not validar_datos():
     st.stop()
 
 # ==============================================================
 # CONFIGURACIÓN YAML
 # ==============================================================
 
-BASE_DIR = Path(__file__).resolve().parents[2]
-YAML_PATH = BASE_DIR / "config" / "settings_anexo3.yaml"
-
+# Plan compilado de settings_anexo3.yaml (se vuelve a leer solo si cambia el archivo)
 try:
-    with open(YAML_PATH, "r", encoding="utf-8") as f:
-        config_a3 = yaml.safe_load(f)
-        mapa_items = config_a3.get("items_nombres", {})
-        grupos_items = config_a3.get("grupos_items", {})
+    plan_a3 = plan_anexo("anexo3")
+    mapa_items = plan_a3.items_nombres
+    grupos_items = {grupo: list(items) for grupo, items in plan_a3.grupos_items.items()}
 except Exception as e:
-    st.error(f"❌ Error al leer {YAML_PATH.name}: {e}")
+    st.error(f"❌ Error al leer settings_anexo3.yaml: {e}")
     mapa_items, grupos_items = {}, {}
 
 # ==============================================================
@@ -89,29 +81,34 @@ if "filters_a3" not in st.session_state:
 
 col1, col2, col3 = st.columns(3)
 with col1:
-    ut_sel = st.multiselect("Unidad Territorial:", sorted(df["UNIDAD_TERRITORIAL"].dropna().unique()),
+    ut_sel = st.multiselect("Unidad Territorial:", loaders.opciones(TABLA, "UNIDAD_TERRITORIAL"),
                             default=st.session_state.filters_a3["ut"])
 with col2:
-    mes_sel = st.multiselect("Mes:", sorted(df["MES"].dropna().unique()),
+    mes_sel = st.multiselect("Mes:", loaders.opciones(TABLA, "MES"),
                              default=st.session_state.filters_a3["mes"])
 with col3:
-    sup_sel = st.multiselect("Supervisor:", sorted(df["SUPERVISOR"].dropna().unique()),
+    sup_sel = st.multiselect("Supervisor:", loaders.opciones(TABLA, "SUPERVISOR"),
                              default=st.session_state.filters_a3["sup"])
 
 st.session_state.filters_a3.update({"ut": ut_sel, "mes": mes_sel, "sup": sup_sel})
 
-df_filtrado = df.copy()
-if ut_sel:
-    df_filtrado = df_filtrado[df_filtrado["UNIDAD_TERRITORIAL"].isin(ut_sel)]
-if mes_sel:
-    df_filtrado = df_filtrado[df_filtrado["MES"].isin(mes_sel)]
-if sup_sel:
-    df_filtrado = df_filtrado[df_filtrado["SUPERVISOR"].isin(sup_sel)]
+# Conteos, histogramas y promedios se suman desde los agregados UT × MES × SUPERVISOR
+filtros = {"UNIDAD_TERRITORIAL": ut_sel, "MES": mes_sel, "SUPERVISOR": sup_sel}
+total_registros = loaders.contar(TABLA, filtros)
 
-if df_filtrado.empty:
+if not total_registros:
     st.warning("No hay registros que coincidan con los filtros seleccionados.")
     st.stop()
 
+# Fichas con cada valor (0/1/2) en cada ítem
+hist_items = loaders.histograma_items(TABLA, filtros)
+
+def conteo_items(valor, items):
+    """Fichas con `valor` en cada ítem de `items` (0 si el ítem no tiene datos)."""
+    if valor not in hist_items.columns:
+        return pd.Series(0, index=items, dtype=int)
+    return hist_items[valor].reindex(items, fill_value=0).astype(int)
+
 # ==============================================================
 # 🚨 TARJETAS DE ÍTEMS 'NO CUMPLE' – Estilo Anexo 2
 # ==============================================================
@@ -119,12 +116,12 @@ if df_filtrado.empty:
 import streamlit.components.v1 as components
 
 st.markdown("###### Actividades con riesgo o incumplimiento detectado")
-cols_items = [c for c in df_filtrado.columns if c.startswith("ITEM_")]
+cols_items = [c for c in loaders.columnas(TABLA) if c.startswith("ITEM_")]
 
 # Calcular frecuencia y porcentaje de 'no cumple'
-freq_0 = (df_filtrado[cols_items] == 0).sum()
-total_eval = len(df_filtrado)
-pct_0 = ((df_filtrado[cols_items] == 0).sum() / total_eval * 100).round(1)
+freq_0 = conteo_items(0, cols_items)
+total_eval = total_registros
+pct_0 = (freq_0 / total_eval * 100).round(1)
 no_cumple = pct_0[pct_0 > 0].sort_values(ascending=False)
 
 if no_cumple.empty:
@@ -193,18 +190,14 @@ else:
 # 💬 RESUMEN AUTOMÁTICO (IA)
 # ==============================================================
 
-cols_items = [c for c in df_filtrado.columns if c.startswith("ITEM_")]
-df_items = df_filtrado[cols_items].copy()
-valores = df_items.values.flatten()
-valores = valores[~pd.isna(valores)]
-
-total_validos = int(len(valores))
-total_0 = int((valores == 0).sum())
-total_1 = int((valores == 1).sum())
-total_2 = int((valores == 2).sum())
+cols_items = [c for c in loaders.columnas(TABLA) if c.startswith("ITEM_")]
+total_validos = int(hist_items.reindex(cols_items, fill_value=0).to_numpy().sum())
+total_0 = int(conteo_items(0, cols_items).sum())
+total_1 = int(conteo_items(1, cols_items).sum())
+total_2 = int(conteo_items(2, cols_items).sum())
 
 contexto_llm = {
-    "total_registros": len(df_filtrado),
+    "total_registros": total_registros,
     "porcentajes": {
         "no_cumple": round(total_0 / total_validos * 100, 1) if total_validos else 0,
         "en_desarrollo": round(total_1 / total_validos * 100, 1) if total_validos else 0,
@@ -237,9 +230,9 @@ st.markdown("<br><hr style='border:0.5px solid #ddd;margin:25px 0;'>", unsafe_al
 # 🔸 MAPA DE CALOR DE ÍTEMS
 # ==============================================================
 
-cols_items = [c for c in df_filtrado.columns if c.startswith("ITEM_")]
+cols_items = [c for c in loaders.columnas(TABLA) if c.startswith("ITEM_")]
 if cols_items:
-    heat = df_filtrado.groupby("UNIDAD_TERRITORIAL")[cols_items].mean().reset_index()
+    heat = loaders.promedios_por(TABLA, "UNIDAD_TERRITORIAL", cols_items, filtros)
     heat_melt = heat.melt(id_vars="UNIDAD_TERRITORIAL", var_name="Ítem", value_name="Promedio")
     heat_melt["Etiqueta"] = heat_melt["Ítem"].apply(lambda x: x.replace("ITEM_", "Item "))
     heat_melt["num_item"] = heat_melt["Etiqueta"].str.extract(r"(\d+)").astype(int)
@@ -6,7 +6,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
-from utils.loaders import cargar_datos
+from utils import loaders
 from utils.style import aplicar_estilos
 from utils.llm import generate_anexo4_summary
 import logging
@@ -27,21 +27,16 @@ st.markdown("<br>", unsafe_allow_html=True)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-@st.cache_data(show_spinner=False)
-def cargar_y_preparar_datos():
-    try:
-        data = cargar_datos()
-        df = data.get("a4")
-        if df is None or df.empty:
-            st.warning("No se encontró el archivo `anexo4_consolidado.xlsx` en `/data/processed/`.")
-            return None
-        return df
-    except Exception as e:
-        st.error(f"❌ Error al cargar datos: {e}")
-        return None
-
-df = cargar_y_preparar_datos()
-if df is None:
+# Tabla del Anexo 4 en data/processed/consolidados.sqlite (la llena el ETL)
+TABLA = "anexo4"
+
+try:
+    columnas = loaders.columnas(TABLA)
+except Exception as e:
+    st.error(f"❌ Error al cargar datos: {e}")
+    st.stop()
+if not columnas:
+    st.warning("No se encontró el Anexo 4 en `/data/processed/consolidados.sqlite` (ejecuta el ETL).")
     st.stop()
 
 # ==============================================================
@@ -53,23 +48,21 @@ if "filters" not in st.session_state:
 
 col1, col2, col3 = st.columns(3)
 with col1:
-    ut_sel = st.multiselect("Unidad Territorial:", sorted(df["UNIDAD_TERRITORIAL"].dropna().unique()),
+    ut_sel = st.multiselect("Unidad Territorial:", loaders.opciones(TABLA, "UNIDAD_TERRITORIAL"),
                             default=st.session_state.filters["ut"])
 with col2:
-    mes_sel = st.multiselect("Mes:", sorted(df["MES"].dropna().unique()),
+    mes_sel = st.multiselect("Mes:", loaders.opciones(TABLA, "MES"),
                              default=st.session_state.filters["mes"])
 with col3:
-    sup_sel = st.multiselect("Supervisor:", sorted(df["SUPERVISOR"].dropna().unique()),
+    sup_sel = st.multiselect("Supervisor:", loaders.opciones(TABLA, "SUPERVISOR"),
                              default=st.session_state.filters["sup"])
 
 st.session_state.filters.update({"ut": ut_sel, "mes": mes_sel, "sup": sup_sel})
 
-df_filtrado = df.copy()
-if ut_sel: df_filtrado = df_filtrado[df_filtrado["UNIDAD_TERRITORIAL"].isin(ut_sel)]
-if mes_sel: df_filtrado = df_filtrado[df_filtrado["MES"].isin(mes_sel)]
-if sup_sel: df_filtrado = df_filtrado[df_filtrado["SUPERVISOR"].isin(sup_sel)]
+# Promedios, rankings y mapa de calor se suman desde los agregados UT × MES × SUPERVISOR
+filtros = {"UNIDAD_TERRITORIAL": ut_sel, "MES": mes_sel, "SUPERVISOR": sup_sel}
 
-if df_filtrado.empty:
+if not loaders.contar(TABLA, filtros):
     st.warning("No hay registros que coincidan con los filtros seleccionados.")
     st.stop()
 
@@ -77,14 +70,17 @@ if df_filtrado.empty:
 # 💬 RESUMEN AUTOMÁTICO (IA)
 # ==============================================================
 
+cols_globales = [c for c in ("PORCENTAJE_ADOLES", "PORCENTAJE_INDEP", "PORCENTAJE_TOTAL") if c in columnas]
+globales = loaders.promedios(TABLA, cols_globales, filtros).iloc[0] if cols_globales else {}
+
 contexto_llm = {
     "unidad_territorial": ut_sel or "todas",
     "mes": mes_sel or "todos",
     "supervisor": sup_sel or "todos",
     "porcentajes_globales": {
-        "adolescentes": df_filtrado["PORCENTAJE_ADOLES"].mean() if "PORCENTAJE_ADOLES" in df_filtrado else None,
-        "independencia": df_filtrado["PORCENTAJE_INDEP"].mean() if "PORCENTAJE_INDEP" in df_filtrado else None,
-        "total": df_filtrado["PORCENTAJE_TOTAL"].mean() if "PORCENTAJE_TOTAL" in df_filtrado else None
+        "adolescentes": globales.get("PORCENTAJE_ADOLES"),
+        "independencia": globales.get("PORCENTAJE_INDEP"),
+        "total": globales.get("PORCENTAJE_TOTAL")
     }
 }
 
@@ -117,17 +113,15 @@ componentes = {
 }
 
 for nombre, (col_pct, col_eval) in componentes.items():
-    if col_pct in df_filtrado.columns and col_eval in df_filtrado.columns:
+    if col_pct in columnas and col_eval in columnas:
         st.markdown(f"### 🔹 {nombre}")
 
-        ranking = (
-            df_filtrado.groupby("UNIDAD_TERRITORIAL", as_index=False)
-            .agg(
-                PORCENTAJE=(col_pct, "mean"),
-                EVALUACION=(col_eval, lambda x: x.mode()[0] if not x.mode().empty else "Sin dato")
-            )
-            .sort_values("PORCENTAJE", ascending=False)
+        ranking = loaders.promedios_por(TABLA, "UNIDAD_TERRITORIAL", [col_pct], filtros)
+        ranking = ranking.rename(columns={col_pct: "PORCENTAJE"})
+        ranking["EVALUACION"] = ranking["UNIDAD_TERRITORIAL"].map(
+            loaders.moda_por(TABLA, "UNIDAD_TERRITORIAL", col_eval, filtros)
         )
+        ranking = ranking.sort_values("PORCENTAJE", ascending=False)
         ranking["PORCENTAJE"] = (ranking["PORCENTAJE"] * 100).round(1)
 
         col1, col2 = st.columns(2)
@@ -179,9 +173,9 @@ for nombre, (col_pct, col_eval) in componentes.items():
 # 🔥 MAPA DE CALOR – PROMEDIO DE ÍTEMS
 # ==============================================================
 
-cols_items = [c for c in df_filtrado.columns if c.startswith("ITEM_")]
+cols_items = [c for c in columnas if c.startswith("ITEM_")]
 if cols_items:
-    heat = df_filtrado.groupby("UNIDAD_TERRITORIAL")[cols_items].mean().reset_index()
+    heat = loaders.promedios_por(TABLA, "UNIDAD_TERRITORIAL", cols_items, filtros)
     heat_melt = heat.melt(id_vars="UNIDAD_TERRITORIAL", var_name="Ítem", value_name="Promedio")
 
     heat_melt["Etiqueta"] = heat_melt["Ítem"].apply(lambda x: x.replace("ITEM_", "Item "))
@@ -12,7 +12,7 @@ import numpy as np
 import yaml
 from datetime import datetime, timedelta
 
-from utils.loaders import cargar_datos
+from utils import loaders
 from utils.style import aplicar_estilos
 from utils.llm import generate_anexo5_summary
 
@@ -32,14 +32,29 @@ st.markdown("<br>", unsafe_allow_html=True)
 # --------------------------------------------------------------
 # CARGA DE DATOS
 # --------------------------------------------------------------
-data = cargar_datos()
-df_raw = data.get("a5")
-if df_raw is None:
-    st.warning("⚠️ No se encontró el archivo `anexo5_consolidado.xlsx` en `/data/processed/`.")
+# Tabla del Anexo 5 en data/processed/consolidados.sqlite (la llena el ETL)
+TABLA = "anexo5"
+if not loaders.columnas(TABLA):
+    st.warning("⚠️ No se encontró el Anexo 5 en `/data/processed/consolidados.sqlite` (ejecuta el ETL).")
     st.stop()
 
-# Trabajamos sobre una copia
-df = df_raw.copy()
+# --------------------------------------------------------------
+# FILTROS
+# --------------------------------------------------------------
+col1, col2, col3 = st.columns(3)
+with col1:
+    ut_sel = st.multiselect("Unidad Territorial:", loaders.opciones(TABLA, "UNIDAD_TERRITORIAL"))
+with col2:
+    mes_sel = st.multiselect("Mes:", loaders.opciones(TABLA, "MES"))
+with col3:
+    sup_sel = st.multiselect("Supervisor:", loaders.opciones(TABLA, "SUPERVISOR"))
+
+# Solo se traen (y se procesan abajo) los acuerdos de la selección
+filtros = {"UNIDAD_TERRITORIAL": ut_sel, "MES": mes_sel, "SUPERVISOR": sup_sel}
+df = loaders.filtrar(TABLA, filtros)
+if df is None:
+    st.warning("⚠️ No se encontró el Anexo 5 en `/data/processed/consolidados.sqlite` (ejecuta el ETL).")
+    st.stop()
 
 # --------------------------------------------------------------
 # NORMALIZACIÓN DE COLUMNAS Y TIPOS
@@ -54,10 +69,11 @@ if faltantes:
     st.error(f"Faltan columnas en Anexo 5: {faltantes}")
     st.stop()
 
-# Tipos
+# Tipos: el ETL ya entrega PLAZO_DÍAS entero y FECHA_LÍMITE fecha (la conversión no cuesta);
+# consolidados anteriores los guardan como texto ("Permanente", "Por precisar" → vacío)
 df["PLAZO_DÍAS"] = pd.to_numeric(df["PLAZO_DÍAS"], errors="coerce")
 df["FECHA_SUPERVISIÓN"] = pd.to_datetime(df["FECHA_SUPERVISIÓN"], errors="coerce", dayfirst=True)
-df["FECHA_LÍMITE"] = pd.to_datetime(df["FECHA_LÍMITE"], errors="coerce", dayfirst=True)
+df["FECHA_LÍMITE"] = pd.to_datetime(df["FECHA_LÍMITE"], errors="coerce")
 
 # Columnas operativas (si no existen en archivo, las creamos)
 if "MEDIO_VERIFICACION" not in df.columns:
@@ -96,24 +112,7 @@ def clasificar_estado(row) -> str:
 
 df["ESTADO"] = df.apply(clasificar_estado, axis=1)
 
-# --------------------------------------------------------------
-# FILTROS
-# --------------------------------------------------------------
-col1, col2, col3 = st.columns(3)
-with col1:
-    ut_sel = st.multiselect("Unidad Territorial:", sorted(df["UNIDAD_TERRITORIAL"].dropna().unique()))
-with col2:
-    mes_sel = st.multiselect("Mes:", sorted(df["MES"].dropna().unique()))
-with col3:
-    sup_sel = st.multiselect("Supervisor:", sorted(df["SUPERVISOR"].dropna().unique()))
-
-df_f = df.copy()
-if ut_sel:
-    df_f = df_f[df_f["UNIDAD_TERRITORIAL"].isin(ut_sel)]
-if mes_sel:
-    df_f = df_f[df_f["MES"].isin(mes_sel)]
-if sup_sel:
-    df_f = df_f[df_f["SUPERVISOR"].isin(sup_sel)]
+df_f = df
 
 if df_f.empty:
     st.warning("⚠️ No hay registros que coincidan con los filtros seleccionados.")
@@ -124,11 +123,11 @@ if df_f.empty:
 # --------------------------------------------------------------
 def cards_por_supervisor(df_in: pd.DataFrame):
     # Tomamos sólo acuerdos no cumplidos (para % vencidos), los cumplidos no cuentan como vencidos.
-    base = df_in.copy()
+    base = df_in
     # Totales por supervisor
-    tot = base.groupby("SUPERVISOR").size().rename("total")
+    tot = base.groupby("SUPERVISOR", observed=True).size().rename("total")
     # Vencidos (no cumplidos)
-    ven = base[(base["ESTADO"] == "Vencido")].groupby("SUPERVISOR").size().rename("vencidos")
+    ven = base[(base["ESTADO"] == "Vencido")].groupby("SUPERVISOR", observed=True).size().rename("vencidos")
     kpi = pd.concat([tot, ven], axis=1).fillna(0)
     kpi["% vencidos"] = np.where(kpi["total"] > 0, (kpi["vencidos"] / kpi["total"] * 100).round(1), 0.0)
     kpi = kpi.sort_values("% vencidos", ascending=False).reset_index()
@@ -220,7 +219,8 @@ vista_cols = [
     "ACUERDOS_MEJORA", "RESPONSABLE", "FECHA_LÍMITE", "ESTADO"
 ]
 
-df_tabla = df_f[vista_cols].copy()
+# Copy-on-Write: escribir en df_tabla copia solo la columna tocada, no toda la vista
+df_tabla = df_f[vista_cols]
 df_tabla["FECHA_LÍMITE"] = pd.to_datetime(df_tabla["FECHA_LÍMITE"], errors="coerce").dt.date
 
 # Agregar columna editable tipo check para cumplimiento
@@ -230,7 +230,7 @@ if "cumplidos" not in st.session_state:
         for i in df_tabla.index
     }
 
-tabla_editable = df_tabla.copy()
+tabla_editable = df_tabla.copy(deep=False)
 tabla_editable["Cumplido"] = [
     st.session_state.cumplidos.get(i, False) for i in df_tabla.index
 ]
@@ -0,0 +1,4 @@
+"""
+Paquete procesar del ETL UCC 2025.
+Incluye los scripts por anexo y los módulos compartidos de extracción (paralelo).
+"""
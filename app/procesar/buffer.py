@@ -0,0 +1,39 @@
+# ============================================================
+# procesar/buffer.py
+# Acumulador de registros por columnas para el ETL
+#
+# Cada ficha llega como un dict; en vez de crear un DataFrame de una
+# fila por ficha y concatenarlos, los valores se agregan a una lista
+# por columna y se materializa un único DataFrame por lote.
+# ============================================================
+
+import pandas as pd
+
+
+class BufferColumnas:
+    """Registros (dicts) guardados como listas por columna; las columnas nuevas se rellenan con None."""
+
+    def __init__(self):
+        self.columnas = {}
+        self.filas = 0
+
+    def __len__(self):
+        return self.filas
+
+    def agregar(self, registro):
+        for columna, valor in registro.items():
+            lista = self.columnas.get(columna)
+            if lista is None:
+                lista = self.columnas[columna] = [None] * self.filas
+            lista.append(valor)
+        self.filas += 1
+        if len(registro) < len(self.columnas):
+            for lista in self.columnas.values():
+                if len(lista) < self.filas:
+                    lista.append(None)
+
+    def vaciar(self):
+        """Materializa el lote como DataFrame y deja el buffer vacío."""
+        df = pd.DataFrame(self.columnas)
+        self.columnas, self.filas = {}, 0
+        return df
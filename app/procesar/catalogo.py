@@ -0,0 +1,127 @@
+# ============================================================
+# procesar/catalogo.py
+# Catálogo de data/raw: un solo recorrido con os.scandir para todos los anexos
+#
+#   data/raw/<año>/<mes>/<región>/<archivo con ANEXO_N>
+#
+# El listado de cada carpeta se guarda en data/processed/catalogo_raw.json
+# con su mtime; en la siguiente corrida solo se vuelve a listar una
+# carpeta si su mtime cambió (se agregó, quitó o renombró algo dentro).
+# ============================================================
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+BASE_DIR = Path(__file__).resolve().parents[2]
+CARPETA_RAW = BASE_DIR / "data" / "raw"
+RUTA_CACHE = BASE_DIR / "data" / "processed" / "catalogo_raw.json"
+VERSION_CATALOGO = 1
+
+PATRON_ANEXO = re.compile(r"ANEXO_(\d+)", re.IGNORECASE)
+EXTENSIONES = {".xlsx", ".docx"}
+
+# Un mtime tan reciente como el propio escaneo puede no reflejar cambios del mismo tick
+MARGEN_MTIME_NS = 2_000_000_000
+
+_LOCK = threading.Lock()
+
+
+class FichaRaw(NamedTuple):
+    anexo: str      # "anexo2"
+    anio: str
+    mes: str
+    region: str     # en mayúsculas
+    ruta: Path
+
+
+class Catalogo(NamedTuple):
+    fichas: list            # [FichaRaw] en orden año/mes/región/archivo
+    regiones: list          # [(año, mes, región)] de todas las carpetas de región
+
+
+def clasificar(nombre):
+    """Devuelve "anexoN" para un archivo de ficha, o None (bloqueos ~$, otras extensiones)."""
+    if nombre.startswith("~$") or Path(nombre).suffix.lower() not in EXTENSIONES:
+        return None
+    coincidencia = PATRON_ANEXO.search(nombre)
+    return f"anexo{int(coincidencia.group(1))}" if coincidencia else None
+
+# ============================================================
+# 📂 LISTADO DE CARPETAS CON CACHÉ POR MTIME
+# ============================================================
+def _cargar_cache(raiz):
+    try:
+        with open(RUTA_CACHE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == VERSION_CATALOGO and cache.get("raiz") == str(raiz):
+            return cache.get("carpetas", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def _guardar_cache(raiz, carpetas):
+    RUTA_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = RUTA_CACHE.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION_CATALOGO, "raiz": str(raiz), "carpetas": carpetas}, f, ensure_ascii=False)
+    os.replace(tmp, RUTA_CACHE)
+
+
+def _listar(carpeta, clave, previas, nuevas, inicio_ns):
+    """(subcarpetas, archivos) de una carpeta, reutilizando la caché si su mtime no cambió."""
+    mtime_ns = os.stat(carpeta).st_mtime_ns
+    entrada = previas.get(clave)
+    if entrada and entrada["mtime_ns"] == mtime_ns and mtime_ns < entrada["escaneado_ns"] - MARGEN_MTIME_NS:
+        nuevas[clave] = entrada
+        return entrada["carpetas"], entrada["archivos"]
+
+    carpetas, archivos = [], []
+    with os.scandir(carpeta) as it:
+        for e in it:
+            if e.is_dir():
+                carpetas.append(e.name)
+            elif e.is_file():
+                archivos.append(e.name)
+    carpetas.sort()
+    archivos.sort()
+    nuevas[clave] = {"mtime_ns": mtime_ns, "escaneado_ns": inicio_ns, "carpetas": carpetas, "archivos": archivos}
+    return carpetas, archivos
+
+# ============================================================
+# 🚀 ESCANEO
+# ============================================================
+def escanear(raiz=CARPETA_RAW):
+    """Recorre data/raw una vez (año/mes/región) y clasifica cada archivo por anexo."""
+    raiz = Path(raiz)
+    if not raiz.exists():
+        raise FileNotFoundError(f"❌ No existe la carpeta: {raiz}")
+
+    with _LOCK:
+        previas, nuevas = _cargar_cache(raiz), {}
+        inicio_ns = time.time_ns()
+        fichas, regiones = [], []
+
+        for anio in _listar(raiz, ".", previas, nuevas, inicio_ns)[0]:
+            for mes in _listar(raiz / anio, anio, previas, nuevas, inicio_ns)[0]:
+                for carpeta_region in _listar(raiz / anio / mes, f"{anio}/{mes}", previas, nuevas, inicio_ns)[0]:
+                    region = carpeta_region.upper()
+                    regiones.append((anio, mes, region))
+                    clave = f"{anio}/{mes}/{carpeta_region}"
+                    for nombre in _listar(raiz / anio / mes / carpeta_region, clave, previas, nuevas, inicio_ns)[1]:
+                        anexo = clasificar(nombre)
+                        if anexo:
+                            fichas.append(FichaRaw(anexo, anio, mes, region, raiz / anio / mes / carpeta_region / nombre))
+
+        if nuevas != previas:
+            _guardar_cache(raiz, nuevas)
+
+    return Catalogo(fichas, regiones)
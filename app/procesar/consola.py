@@ -0,0 +1,32 @@
+# ============================================================
+# procesar/consola.py
+# Salida de consola compartida por maestro.py y procesar/motor.py
+#
+# Un solo candado para que las líneas de los anexos que corren en
+# hilos no se mezclen, y un prefijo "[script]" por hilo para que la
+# salida en proceso se vea igual que la de un subproceso.
+# ============================================================
+
+import threading
+from contextlib import contextmanager
+
+PRINT_LOCK = threading.Lock()
+_hilo = threading.local()
+
+
+@contextmanager
+def prefijo_hilo(prefijo):
+    """Antepone `prefijo` a todo lo que imprima este hilo dentro del bloque."""
+    anterior = getattr(_hilo, "prefijo", "")
+    _hilo.prefijo = prefijo
+    try:
+        yield
+    finally:
+        _hilo.prefijo = anterior
+
+
+def imprimir(linea, prefijo=None):
+    """Imprime una línea completa bajo el candado, con el prefijo del hilo si lo hay."""
+    prefijo = getattr(_hilo, "prefijo", "") if prefijo is None else prefijo
+    with PRINT_LOCK:
+        print(f"{prefijo} {linea}" if prefijo else linea, flush=True)
@@ -0,0 +1,248 @@
+# ============================================================
+# procesar/derivar_plantillas.py
+# Plan de celdas derivado de las plantillas en blanco de formatos/
+#
+# Cada formatos/ANEXO_N.xlsx se escanea una sola vez: se ubican las
+# etiquetas de metadatos ("Unidad Territorial", "Supervisor"...) y la
+# grilla de ítems (fila de encabezado 0/1/2/NA + filas numeradas), y
+# se guarda el plan resultante con la huella de la plantilla en
+# data/processed/plantilla_derivada_<anexo>.json. utils/planes.py lo
+# agrega al registro de plantillas del YAML, así las fichas de esa
+# revisión se extraen por celdas fijas sin buscar etiquetas.
+# La plantilla solo se vuelve a escanear si cambia su mtime o tamaño.
+#
+# Uso (muestra el plan derivado en formato YAML):
+#   python app/procesar/derivar_plantillas.py [anexoN ...]
+# ============================================================
+
+import json
+import os
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from openpyxl.utils.cell import get_column_letter
+
+from procesar.catalogo import clasificar
+from procesar.huellas import huella_ficha
+from procesar.lectores import leer_filas
+from utils.planes import plan_anexo, ruta_derivada
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+BASE_DIR = APP_DIR.parent
+CARPETA_FORMATOS = BASE_DIR / "formatos"
+VERSION_DERIVADA = 1
+
+# Zona de la hoja que se escanea (las plantillas son de una página)
+MAX_FILAS = 200
+MAX_COLUMNAS = 30
+
+# Etiquetas de cada campo de metadatos (texto normalizado al inicio de la celda)
+ETIQUETAS = {
+    "unidad_territorial": ["UNIDAD TERRITORIAL"],
+    "provincia": ["PROVINCIA"],
+    "distrito": ["DISTRITO"],
+    "supervisor": ["SUPERVISOR", "RESPONSABLE DE LA SUPERVISION"],
+    "fecha": ["FECHA"],
+    "responsable": ["RESPONSABLE DEL SEGUIMIENTO", "RESPONSABLE"],
+    "comunidad": ["NOMBRE DE LA COMUNIDAD", "COMUNIDAD"],
+    "fecha_sesion": ["FECHA DE LA SESION"],
+    "sesion_observada": ["NUMERO Y NOMBRE DE LA SESION", "SESION OBSERVADA"],
+    "facilitador": ["FACILITADOR"],
+}
+
+# Encabezados de la escala de calificación y del número de ítem
+ESCALA = {"0", "1", "2", "3", "NA", "N/A"}
+NUMERO = {"N°", "Nº", "NRO", "ITEM", "#"}
+PATRON_NUMERO = re.compile(r"^\d+(\.\d+)?\.?$")
+
+
+def _normalizar(valor):
+    """Mayúsculas, sin tildes ni espacios repetidos ("Supervisión" → "SUPERVISION")."""
+    if valor is None:
+        return ""
+    texto = unicodedata.normalize("NFKD", " ".join(str(valor).split()).upper())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+# ============================================================
+# 🔎 DERIVACIÓN
+# ============================================================
+def _grilla(filas):
+    """(fila de encabezado, columna del número, columna de la última calificación) de la grilla de ítems."""
+    for n_fila, valores in enumerate(filas, start=1):
+        escala = [j for j, v in enumerate(valores, start=1) if _normalizar(v) in ESCALA]
+        if len(escala) < 2:
+            continue
+        numero = next(
+            (j for j, v in enumerate(valores, start=1) if j < escala[0] and _normalizar(v).replace(" ", "") in NUMERO),
+            None,
+        )
+        if numero is not None:
+            return n_fila, numero, max(escala)
+    raise ValueError("no se encontró la fila de encabezado de la grilla (N° + 0/1/2/NA)")
+
+
+def _rangos(filas, desde, col_numero):
+    """Bloques de filas consecutivas con número de ítem y texto de la pregunta."""
+    rangos, inicio, anterior = [], None, None
+    for n_fila in range(desde, len(filas) + 1):
+        valores = filas[n_fila - 1]
+        numero = valores[col_numero - 1]
+        pregunta = valores[col_numero] if col_numero < len(valores) else None
+        es_item = (
+            numero is not None
+            and PATRON_NUMERO.match(str(numero).strip())
+            and pregunta is not None and str(pregunta).strip()
+        )
+        if es_item:
+            if inicio is None:
+                inicio = n_fila
+            anterior = n_fila
+        elif inicio is not None:
+            rangos.append({"fila_inicio": inicio, "fila_fin": anterior})
+            inicio = None
+    if inicio is not None:
+        rangos.append({"fila_inicio": inicio, "fila_fin": anterior})
+    if not rangos:
+        raise ValueError("la grilla no tiene filas numeradas de ítems")
+    return rangos
+
+
+def _metadatos(filas, hasta, campos):
+    """Celda de cada campo: la misma de la etiqueta si lleva ":" (valor tras los dos puntos) o la siguiente."""
+    celdas = {}
+    for n_fila, valores in enumerate(filas[:hasta], start=1):
+        for j, valor in enumerate(valores, start=1):
+            texto = _normalizar(valor)
+            if not texto:
+                continue
+            for campo in campos:
+                if campo in celdas:
+                    continue
+                if any(texto.startswith(etiqueta) for etiqueta in ETIQUETAS.get(campo, [])):
+                    columna = j if ":" in str(valor) else j + 1
+                    celdas[campo] = f"{get_column_letter(columna)}{n_fila}"
+                    break
+    faltantes = [c for c in campos if c not in celdas]
+    if faltantes:
+        raise ValueError(f"no se encontraron las etiquetas de: {', '.join(faltantes)}")
+    return celdas
+
+
+def derivar(ruta, anexo):
+    """Escanea una plantilla en blanco y devuelve su plan (metadatos, ítems) y su huella."""
+    plan = plan_anexo(anexo)
+    filas = leer_filas(ruta, MAX_FILAS, MAX_COLUMNAS)
+
+    fila_encabezado, col_numero, col_fin = _grilla(filas)
+    items = {
+        "rangos": _rangos(filas, fila_encabezado + 1, col_numero),
+        "col_inicio": col_numero + 1,
+        "col_fin": col_fin,
+    }
+    metadatos = _metadatos(filas, fila_encabezado, list(plan.metadatos))
+
+    huella, dimension = None, None
+    if plan.plantillas is not None:
+        huella, dimension, _ = huella_ficha(ruta, filas, plan.plantillas.celdas)
+    estado = os.stat(ruta)
+    return {
+        "version": VERSION_DERIVADA,
+        "plantilla": ruta.name,
+        "mtime_ns": estado.st_mtime_ns,
+        "tamano": estado.st_size,
+        "huella": huella,
+        "dimension": dimension,
+        "metadatos": metadatos,
+        "items": items,
+    }
+
+# ============================================================
+# 💾 CACHÉ POR PLANTILLA
+# ============================================================
+def _vigente(ruta, anexo):
+    """Derivación guardada si la plantilla no cambió desde el escaneo; None si hay que escanear."""
+    try:
+        with open(ruta_derivada(anexo), "r", encoding="utf-8") as f:
+            guardada = json.load(f)
+    except (OSError, ValueError):
+        return None
+    estado = os.stat(ruta)
+    vigente = (
+        guardada.get("version") == VERSION_DERIVADA
+        and guardada.get("plantilla") == ruta.name
+        and guardada.get("mtime_ns") == estado.st_mtime_ns
+        and guardada.get("tamano") == estado.st_size
+    )
+    return guardada if vigente else None
+
+
+def _guardar(anexo, derivada):
+    destino = ruta_derivada(anexo)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(derivada, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, destino)
+
+
+def plantillas_formatos():
+    """{anexo: ruta} de las plantillas .xlsx en blanco de formatos/."""
+    if not CARPETA_FORMATOS.exists():
+        return {}
+    rutas = {}
+    for ruta in sorted(CARPETA_FORMATOS.iterdir()):
+        anexo = clasificar(ruta.name)
+        if anexo and ruta.suffix.lower() == ".xlsx":
+            rutas[anexo] = ruta
+    return rutas
+
+
+def actualizar(anexo):
+    """
+    Deriva el plan de formatos/ANEXO_N.xlsx si la plantilla es nueva o cambió.
+    Devuelve la derivación vigente, o None si el anexo no tiene plantilla en blanco.
+    """
+    ruta = plantillas_formatos().get(anexo)
+    if ruta is None:
+        return None
+    derivada = _vigente(ruta, anexo)
+    if derivada is None:
+        derivada = derivar(ruta, anexo)
+        _guardar(anexo, derivada)
+    return derivada
+
+# ============================================================
+# 🚀 CLI: PLAN DERIVADO EN FORMATO YAML
+# ============================================================
+def _como_yaml(derivada):
+    lineas = ["metadatos:"]
+    lineas += [f'  {campo}: "{celda}"' for campo, celda in derivada["metadatos"].items()]
+    lineas += ["", "estructura_items:", "  rangos:"]
+    lineas += [f"    - {{ fila_inicio: {r['fila_inicio']}, fila_fin: {r['fila_fin']} }}" for r in derivada["items"]["rangos"]]
+    lineas += [f"  col_inicio: {derivada['items']['col_inicio']}", f"  col_fin: {derivada['items']['col_fin']}"]
+    return "\n".join(lineas)
+
+
+if __name__ == "__main__":
+    from utils.planes import compilar_plan
+
+    formatos = plantillas_formatos()
+    for anexo in sys.argv[1:] or sorted(formatos):
+        if anexo not in formatos:
+            print(f"⚠️ {anexo}: no hay plantilla en blanco en {CARPETA_FORMATOS}")
+            continue
+        derivada = actualizar(anexo)
+        plan = plan_anexo(anexo)
+        coincide = compilar_plan(derivada["metadatos"], derivada["items"]) == plan.extraccion
+        print(f"# {anexo} ← formatos/{derivada['plantilla']} (huella {derivada['huella']}, dimensión {derivada['dimension']})")
+        print(f"# {'coincide con' if coincide else 'DIFIERE de'} settings_{anexo}.yaml")
+        print(_como_yaml(derivada))
+        print()
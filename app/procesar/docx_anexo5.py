@@ -0,0 +1,104 @@
+# ============================================================
+# procesar/docx_anexo5.py
+# Lectura de las actas Word del ANEXO 5 (puntos críticos y acuerdos)
+# ============================================================
+
+import os
+import re
+
+import pandas as pd
+
+# Patrones compilados una sola vez para todas las actas
+PATRON_UNIDAD = re.compile(r"UNIDAD\s*TERRITORIAL\s*:\s*([A-ZÁÉÍÓÚÑ\s]+)", re.IGNORECASE)
+PATRON_FECHA = re.compile(r"FECHA\s*:\s*([\d/]+)", re.IGNORECASE)
+PATRON_PLAZO_FECHA = re.compile(r"(?P<dia>\d{1,2})/(?P<mes>\d{1,2})/(?P<anio>\d{2,4})")
+PATRON_PLAZO_DIAS = re.compile(r"(?<!\d)(\d{1,9})\s*d[ií]as?", re.IGNORECASE)
+
+
+def leer_docx(path):
+    """Lee el texto completo y las tablas del documento Word (python-docx; el ETL usa docx_streaming)."""
+    from docx import Document
+
+    doc = Document(path)
+    full_text = "\n".join(p.text for p in doc.paragraphs)
+    return full_text, doc.tables
+
+
+def extraer_metadatos(text, doc_path):
+    """Extrae Unidad Territorial y Fecha del documento o carpeta."""
+    # Se busca sobre el texto tal cual; solo se normalizan los espacios del valor capturado
+    unidad_match = PATRON_UNIDAD.search(text)
+    fecha_match = PATRON_FECHA.search(text)
+
+    if unidad_match:
+        unidad = " ".join(unidad_match.group(1).split()).upper()
+    else:
+        unidad = os.path.basename(os.path.dirname(doc_path)).replace("_", " ").upper()
+
+    fecha = fecha_match.group(1).strip() if fecha_match else None
+
+    return {"unidad_territorial": unidad, "fecha": fecha}
+
+
+def leer_tabla_docx(tables):
+    """Extrae todas las filas de las tablas del documento."""
+    data = []
+    for table in tables:
+        for row in table.rows:
+            cells = [cell.text.strip() for cell in row.cells]
+            if any(cells):
+                data.append(cells)
+    return data
+
+
+def procesar_tabla(raw_data, meta, region, mes, anio, archivo):
+    """Convierte la tabla de Word en registros del consolidado (PLAZO se separa por lote con separar_plazos)."""
+    filas = [f for f in raw_data if f and f[0].strip().isdigit()]
+
+    registros = []
+    for fila in filas:
+        fila += [""] * (5 - len(fila))
+        registros.append({
+            "Año": anio,
+            "Mes": mes,
+            "Región": region,
+            "Archivo": archivo,
+            "Unidad Territorial": meta["unidad_territorial"].title(),
+            "Distrito": "",  # Campo vacío (no disponible en el Word)
+            "Supervisor": "",  # Campo vacío (no disponible en el Word)
+            "Fecha Supervisión": meta["fecha"],
+            "PUNTOS_CRITICOS": fila[1],
+            "ACUERDOS_MEJORA": fila[2],
+            "RESPONSABLE": fila[3],
+            "PLAZO": fila[4].strip(),
+        })
+
+    return registros
+
+
+def separar_plazos(plazos):
+    """
+    Separa en bloque los textos de PLAZO (Serie) en PLAZO_DÍAS (entero, "15 días" → 15)
+    y FECHA_LÍMITE (fecha dd/mm/aa[aa]). Si el texto trae una fecha, manda la fecha;
+    "Permanente", "Por precisar", etc. quedan vacíos en ambas (el texto sigue en PLAZO).
+    Los textos se repiten mucho: cada texto distinto se analiza una sola vez.
+    """
+    plazos = pd.Series(plazos, dtype=object).fillna("").astype(str)
+    codigos, unicos = pd.factorize(plazos)
+    textos = pd.Series(unicos, dtype=object)
+
+    fecha = textos.str.extract(PATRON_PLAZO_FECHA).astype(float)
+    dias = textos.str.extract(PATRON_PLAZO_DIAS)[0].astype(float)
+
+    anio = fecha["anio"].where(fecha["anio"] >= 100, fecha["anio"] + 2000)
+    anio = anio.where(anio >= 1000)  # "1/2/202": año incompleto
+    fecha_limite = pd.to_datetime(
+        pd.DataFrame({"year": anio, "month": fecha["mes"], "day": fecha["dia"]}), errors="coerce"
+    ).astype("datetime64[ns]")
+    con_fecha = fecha["dia"].notna()
+
+    por_texto = pd.DataFrame({
+        "PLAZO_DÍAS": dias.where(~con_fecha).astype("Int64"),
+        "FECHA_LÍMITE": fecha_limite,
+    })
+    return por_texto.take(codigos).set_axis(plazos.index)
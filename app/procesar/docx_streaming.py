@@ -0,0 +1,140 @@
+# ============================================================
+# procesar/docx_streaming.py
+# Lectura en streaming de las actas Word del ANEXO 5
+#
+# Recorre word/document.xml directamente desde el zip con iterparse
+# (sin python-docx) y se queda solo con lo que usa el ETL: el texto
+# de los párrafos del cuerpo (para extraer_metadatos) y las filas
+# numeradas de las tablas del cuerpo (las que conserva procesar_tabla).
+# Cada fila se procesa y se descarta al cerrarse, así una tabla
+# grande no se construye completa en memoria.
+#
+# El texto sigue las reglas de python-docx: párrafos y tablas de
+# primer nivel, runs directos y de hipervínculos, <w:tab> → "\t",
+# <w:br> → "\n"; en row.cells una celda con gridSpan se repite y
+# una celda vMerge="continue" toma la celda de la fila de arriba.
+# ============================================================
+
+import posixpath
+import zipfile
+
+# ElementTree de la biblioteca estándar: en este recorrido (un evento por
+# elemento) es más rápido que lxml, que crea un proxy por cada nodo
+from xml.etree.ElementTree import iterparse, fromstring
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+NS_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+REL_DOCUMENTO = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+BODY, P, R, HYPERLINK = f"{NS_W}body", f"{NS_W}p", f"{NS_W}r", f"{NS_W}hyperlink"
+TBL, TR, TC = f"{NS_W}tbl", f"{NS_W}tr", f"{NS_W}tc"
+TC_PR, GRID_SPAN, V_MERGE = f"{NS_W}tcPr", f"{NS_W}gridSpan", f"{NS_W}vMerge"
+GRID_BEFORE = f"{NS_W}trPr/{NS_W}gridBefore"
+VAL, TIPO = f"{NS_W}val", f"{NS_W}type"
+
+# Texto equivalente de cada hijo de un <w:r> (igual que CT_R.text de python-docx)
+_TEXTO_RUN = {
+    f"{NS_W}t": lambda n: n.text or "",
+    f"{NS_W}tab": lambda n: "\t",
+    f"{NS_W}ptab": lambda n: "\t",
+    f"{NS_W}cr": lambda n: "\n",
+    f"{NS_W}noBreakHyphen": lambda n: "-",
+    f"{NS_W}br": lambda n: "\n" if n.get(TIPO, "textWrapping") == "textWrapping" else "",
+}
+
+# ============================================================
+# 🔤 TEXTO DE PÁRRAFOS Y CELDAS
+# ============================================================
+def _texto_run(run):
+    return "".join(_TEXTO_RUN[h.tag](h) for h in run if h.tag in _TEXTO_RUN)
+
+
+def _texto_parrafo(parrafo):
+    """Runs directos y runs de hipervínculos, en orden (paragraph.text)."""
+    partes = []
+    for hijo in parrafo:
+        if hijo.tag == R:
+            partes.append(_texto_run(hijo))
+        elif hijo.tag == HYPERLINK:
+            partes.extend(_texto_run(r) for r in hijo.iterfind(R))
+    return "".join(partes)
+
+
+def _texto_celda(tc):
+    """Párrafos directos de la celda unidos por salto de línea (cell.text), sin espacios extremos."""
+    return "\n".join(_texto_parrafo(p) for p in tc.iterfind(P)).strip()
+
+
+def _celdas_fila(tr, raices_arriba):
+    """
+    Textos de la fila como row.cells de python-docx y {columna de la grilla: (texto, ancho)}
+    de sus celdas raíz, que la fila siguiente usa para resolver vMerge="continue".
+    """
+    antes = tr.find(GRID_BEFORE)
+    columna = int(antes.get(VAL)) if antes is not None else 0
+    celdas, raices = [], {}
+    for tc in tr.iterfind(TC):
+        propiedades = tc.find(TC_PR)
+        ancho, continua = 1, False
+        if propiedades is not None:
+            span = propiedades.find(GRID_SPAN)
+            vmerge = propiedades.find(V_MERGE)
+            ancho = int(span.get(VAL)) if span is not None else 1
+            continua = vmerge is not None and vmerge.get(VAL, "continue") == "continue"
+        if continua:
+            if columna not in raices_arriba:
+                raise ValueError(f"celda vMerge sin celda arriba en la columna {columna} de la grilla")
+            raiz = raices_arriba[columna]
+        else:
+            raiz = (_texto_celda(tc), ancho)
+        raices[columna] = raiz
+        celdas.extend([raiz[0]] * raiz[1])
+        columna += ancho
+    return celdas, raices
+
+# ============================================================
+# 📄 LECTURA DEL DOCUMENTO
+# ============================================================
+def _documento_principal(zf):
+    """Ruta interna del documento principal según _rels/.rels (normalmente word/document.xml)."""
+    try:
+        rels = fromstring(zf.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    destino = next(
+        (r.get("Target") for r in rels.iterfind(f"{NS_PKG}Relationship") if r.get("Type") == REL_DOCUMENTO),
+        "word/document.xml",
+    )
+    return destino.lstrip("/") if destino.startswith("/") else posixpath.normpath(destino)
+
+
+def leer_acta(ruta):
+    """
+    (texto, filas) del acta en un solo recorrido: texto de los párrafos del cuerpo
+    unidos por "\\n" (como leer_docx) y filas de las tablas del cuerpo cuya primera
+    celda es un número (como leer_tabla_docx + el filtro de procesar_tabla).
+    """
+    parrafos, filas = [], []
+    raices = {}
+    camino = []  # etiquetas abiertas desde <w:document>
+    with zipfile.ZipFile(ruta) as zf, zf.open(_documento_principal(zf)) as src:
+        for evento, nodo in iterparse(src, events=("start", "end")):
+            if evento == "start":
+                camino.append(nodo.tag)
+                continue
+            camino.pop()
+            if len(camino) == 3 and nodo.tag == TR and camino[2] == TBL and camino[1] == BODY:
+                celdas, raices = _celdas_fila(nodo, raices)
+                if celdas and celdas[0].isdigit():
+                    filas.append(celdas)
+                nodo.clear()
+            elif len(camino) == 2 and camino[1] == BODY:
+                if nodo.tag == P:
+                    parrafos.append(_texto_parrafo(nodo))
+                elif nodo.tag == TBL:
+                    raices = {}
+                nodo.clear()
+    return "\n".join(parrafos), filas
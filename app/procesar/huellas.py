@@ -0,0 +1,119 @@
+# ============================================================
+# procesar/huellas.py
+# Huella de la plantilla de cada ficha .xlsx y reporte de cuarentena
+#
+# La huella combina la dimensión declarada de la hoja activa
+# (<dimension ref="B1:P998">) con el texto de las celdas de
+# encabezado de `plantillas.celdas_huella` en el YAML. Con ella se
+# elige, sin tanteos, el plan de celdas de la versión de plantilla
+# registrada; una huella desconocida no se extrae y va a
+# data/processed/cuarentena_<anexo>.json.
+#
+# Para registrar una plantilla nueva:
+#   python app/procesar/huellas.py anexo2 ruta/a/la/ficha.xlsx
+# ============================================================
+
+import hashlib
+import json
+import os
+import re
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from procesar.lectores import _hoja_activa, leer_filas
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+BASE_DIR = APP_DIR.parent
+CARPETA_CUARENTENA = BASE_DIR / "data" / "processed"
+
+# <dimension> va al inicio del XML de la hoja: basta con leer el primer bloque
+PATRON_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+BYTES_INICIO = 4096
+
+# ============================================================
+# 🔎 HUELLA
+# ============================================================
+def dimension_hoja(ruta):
+    """Rango declarado en <dimension> de la hoja activa ("" si el libro no lo declara)."""
+    with zipfile.ZipFile(ruta) as zf:
+        ruta_hoja, _ = _hoja_activa(zf)
+        with zf.open(ruta_hoja) as src:
+            inicio = src.read(BYTES_INICIO)
+    coincidencia = PATRON_DIMENSION.search(inicio)
+    return coincidencia.group(1).decode() if coincidencia else ""
+
+
+def normalizar(valor):
+    """Texto de encabezado comparable: sin espacios repetidos y en mayúsculas."""
+    return " ".join(str(valor).split()).upper() if valor is not None else ""
+
+
+def calcular_huella(dimension, textos):
+    """Huella corta (16 hex) de la dimensión y los textos de encabezado en orden."""
+    return hashlib.sha1("\x1f".join([dimension, *textos]).encode("utf-8")).hexdigest()[:16]
+
+
+def huella_ficha(ruta, filas_hoja, celdas):
+    """
+    (huella, dimensión, {celda: texto}) de una ficha cuyas filas (desde la fila 1)
+    ya se leyeron; `celdas` son las de plantillas.celdas_huella compiladas.
+    """
+    textos = {}
+    for celda, fila, columna in celdas:
+        valores = filas_hoja[fila - 1] if fila <= len(filas_hoja) else ()
+        textos[celda] = normalizar(valores[columna - 1] if columna <= len(valores) else None)
+    dimension = dimension_hoja(ruta)
+    return calcular_huella(dimension, textos.values()), dimension, textos
+
+# ============================================================
+# 🚧 REPORTE DE CUARENTENA
+# ============================================================
+def ruta_cuarentena(anexo):
+    return CARPETA_CUARENTENA / f"cuarentena_{anexo}.json"
+
+
+def guardar_cuarentena(anexo, entradas):
+    """Reescribe el reporte del anexo con las fichas de plantilla desconocida (lo borra si no hay)."""
+    ruta = ruta_cuarentena(anexo)
+    if not entradas:
+        ruta.unlink(missing_ok=True)
+        return None
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    reporte = {
+        "generado": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "fichas": entradas,
+    }
+    tmp = ruta.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, ruta)
+    return ruta
+
+# ============================================================
+# 🚀 CLI: HUELLA DE UNA FICHA PARA REGISTRARLA EN EL YAML
+# ============================================================
+if __name__ == "__main__":
+    from utils.planes import plan_anexo
+
+    if len(sys.argv) != 3:
+        sys.exit("Uso: python app/procesar/huellas.py <anexoN> <ficha.xlsx>")
+    anexo, ruta = sys.argv[1], Path(sys.argv[2])
+    plantillas = plan_anexo(anexo).plantillas
+    if plantillas is None:
+        sys.exit(f"❌ settings_{anexo}.yaml no declara `plantillas.celdas_huella`")
+
+    filas = leer_filas(ruta, plantillas.max_fila, plantillas.max_col)
+    huella, dimension, textos = huella_ficha(ruta, filas, plantillas.celdas)
+    conocida = plantillas.por_huella.get(huella)
+    print(f"huella: {huella}  ({'plantilla ' + conocida.nombre if conocida else 'desconocida'})")
+    print(f"dimensión: {dimension}")
+    for celda, texto in textos.items():
+        print(f"  {celda}: {texto}")
@@ -0,0 +1,238 @@
+# ============================================================
+# procesar/lectores.py
+# Lectores de fichas .xlsx intercambiables (backend en settings_general.yaml)
+#
+#   openpyxl  → load_workbook(read_only=True, data_only=True)
+#   xml       → streaming directo del XML de la hoja (zipfile + iterparse,
+#               lxml si está instalado); se detiene en la última fila útil
+#   calamine  → paquete opcional python-calamine (pip install python-calamine)
+#
+# Todos devuelven las filas 1..max_fila como tuplas de max_col valores
+# con los mismos tipos que openpyxl en modo data_only.
+# ============================================================
+
+import posixpath
+import zipfile
+from datetime import date, datetime
+from pathlib import Path
+
+import yaml
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from openpyxl.utils.datetime import from_excel, from_ISO8601, CALENDAR_MAC_1904, WINDOWS_EPOCH
+
+try:
+    from lxml.etree import iterparse, fromstring
+except ImportError:
+    from xml.etree.ElementTree import iterparse, fromstring
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+BASE_DIR = Path(__file__).resolve().parents[2]
+CONFIG_GENERAL = BASE_DIR / "config" / "settings_general.yaml"
+BACKEND_POR_DEFECTO = "openpyxl"
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def backend_configurado():
+    """Lee procesamiento.lector de settings_general.yaml (por defecto openpyxl)."""
+    try:
+        with open(CONFIG_GENERAL, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        backend = str(config.get("procesamiento", {}).get("lector", BACKEND_POR_DEFECTO)).strip().lower()
+    except Exception:
+        backend = BACKEND_POR_DEFECTO
+    if backend not in BACKENDS:
+        raise ValueError(f"Lector desconocido '{backend}'. Opciones: {', '.join(BACKENDS)}")
+    return backend
+
+
+def _rellenar(filas, max_fila, max_col):
+    """Completa con filas vacías hasta max_fila (la hoja puede terminar antes)."""
+    vacia = (None,) * max_col
+    return filas + [vacia] * (max_fila - len(filas))
+
+# ============================================================
+# 📗 BACKEND OPENPYXL
+# ============================================================
+def _filas_openpyxl(ruta, max_fila, max_col):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(ruta, data_only=True, read_only=True)
+    try:
+        filas = [
+            tuple(f)
+            for f in wb.active.iter_rows(min_row=1, max_row=max_fila, max_col=max_col, values_only=True)
+        ]
+    finally:
+        wb.close()
+    return _rellenar(filas, max_fila, max_col)
+
+# ============================================================
+# ⚡ BACKEND XML (STREAMING DE LA HOJA ACTIVA)
+# ============================================================
+def _texto(nodo):
+    """Texto plano de un <si>/<is>: <t> directos + <r><t>, sin fonética (igual que openpyxl)."""
+    partes = [t.text or "" for t in nodo.findall(f"{NS_MAIN}t")]
+    partes += [t.text or "" for t in nodo.findall(f"{NS_MAIN}r/{NS_MAIN}t")]
+    return "".join(partes)
+
+
+def _cadenas_compartidas(zf):
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    cadenas = []
+    with zf.open("xl/sharedStrings.xml") as src:
+        for _, nodo in iterparse(src):
+            if nodo.tag == f"{NS_MAIN}si":
+                cadenas.append(_texto(nodo).replace("x005F_", ""))
+                nodo.clear()
+    return cadenas
+
+
+def _formatos_fecha(zf):
+    """Índices de estilo (cellXfs) con formato de fecha y de duración."""
+    fechas, duraciones = set(), set()
+    if "xl/styles.xml" not in zf.namelist():
+        return fechas, duraciones
+    raiz = fromstring(zf.read("xl/styles.xml"))
+    propios = {
+        int(n.get("numFmtId")): n.get("formatCode")
+        for n in raiz.iterfind(f"{NS_MAIN}numFmts/{NS_MAIN}numFmt")
+    }
+    for idx, xf in enumerate(raiz.iterfind(f"{NS_MAIN}cellXfs/{NS_MAIN}xf")):
+        num_fmt = int(xf.get("numFmtId", 0))
+        formato = propios.get(num_fmt) or builtin_format_code(num_fmt)
+        if is_date_format(formato):
+            fechas.add(idx)
+        if is_timedelta_format(formato):
+            duraciones.add(idx)
+    return fechas, duraciones
+
+
+def _hoja_activa(zf):
+    """Ruta interna de la hoja activa y época de fechas del libro."""
+    libro = fromstring(zf.read("xl/workbook.xml"))
+    vista = libro.find(f"{NS_MAIN}bookViews/{NS_MAIN}workbookView")
+    activa = int(vista.get("activeTab", 0)) if vista is not None else 0
+    props = libro.find(f"{NS_MAIN}workbookPr")
+    mac = props is not None and props.get("date1904", "0").lower() in ("1", "true")
+
+    hojas = libro.findall(f"{NS_MAIN}sheets/{NS_MAIN}sheet")
+    rel_id = hojas[activa if activa < len(hojas) else 0].get(f"{NS_REL}id")
+    rels = fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    destino = next(r.get("Target") for r in rels.iterfind(f"{NS_PKG}Relationship") if r.get("Id") == rel_id)
+    ruta = destino.lstrip("/") if destino.startswith("/") else posixpath.normpath(f"xl/{destino}")
+    return ruta, CALENDAR_MAC_1904 if mac else WINDOWS_EPOCH
+
+
+def _numero(texto):
+    if "." in texto or "E" in texto or "e" in texto:
+        return float(texto)
+    return int(texto)
+
+
+def _valor_celda(celda, cadenas, fechas, duraciones, epoca):
+    tipo = celda.get("t", "n")
+    if tipo == "inlineStr":
+        nodo = celda.find(f"{NS_MAIN}is")
+        return _texto(nodo) if nodo is not None else None
+
+    texto = celda.findtext(f"{NS_MAIN}v") or None
+    if texto is None:
+        return None
+    if tipo == "n":
+        valor = _numero(texto)
+        estilo = int(celda.get("s", 0) or 0)
+        if estilo in fechas:
+            try:
+                return from_excel(valor, epoca, timedelta=estilo in duraciones)
+            except (OverflowError, ValueError):
+                return "#VALUE!"
+        return valor
+    if tipo == "s":
+        return cadenas[int(texto)]
+    if tipo == "b":
+        return bool(int(texto))
+    if tipo == "d":
+        return from_ISO8601(texto)
+    return texto  # "str" (fórmula de texto) y "e" (error)
+
+
+def _filas_xml(ruta, max_fila, max_col):
+    with zipfile.ZipFile(ruta) as zf:
+        cadenas = _cadenas_compartidas(zf)
+        fechas, duraciones = _formatos_fecha(zf)
+        ruta_hoja, epoca = _hoja_activa(zf)
+
+        filas = []
+        n_fila = 0
+        with zf.open(ruta_hoja) as src:
+            for _, nodo in iterparse(src):
+                if nodo.tag != f"{NS_MAIN}row":
+                    continue
+                n_fila = int(float(nodo.get("r"))) if nodo.get("r") else n_fila + 1
+                if n_fila > max_fila:
+                    break
+                valores = [None] * max_col
+                n_col = 0
+                for celda in nodo.iterfind(f"{NS_MAIN}c"):
+                    coordenada = celda.get("r")
+                    n_col = column_index_from_string(coordinate_from_string(coordenada)[0]) if coordenada else n_col + 1
+                    if n_col <= max_col:
+                        valores[n_col - 1] = _valor_celda(celda, cadenas, fechas, duraciones, epoca)
+                nodo.clear()
+                filas.extend([(None,) * max_col] * (n_fila - len(filas) - 1))
+                filas.append(tuple(valores))
+    return _rellenar(filas, max_fila, max_col)
+
+# ============================================================
+# 🦀 BACKEND CALAMINE (OPCIONAL)
+# ============================================================
+def _normalizar_calamine(valor):
+    """Ajusta los tipos de calamine a los de openpyxl ('' → None, 5.0 → 5, date → datetime)."""
+    if valor == "":
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return datetime(valor.year, valor.month, valor.day)
+    return valor
+
+
+def _filas_calamine(ruta, max_fila, max_col):
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError as e:
+        raise ImportError("El lector 'calamine' requiere: pip install python-calamine") from e
+
+    with zipfile.ZipFile(ruta) as zf:
+        libro = fromstring(zf.read("xl/workbook.xml"))
+    vista = libro.find(f"{NS_MAIN}bookViews/{NS_MAIN}workbookView")
+    activa = int(vista.get("activeTab", 0)) if vista is not None else 0
+
+    hoja = CalamineWorkbook.from_path(str(ruta)).get_sheet_by_index(activa)
+    filas = [
+        tuple(_normalizar_calamine(v) for v in (list(fila[:max_col]) + [None] * max_col)[:max_col])
+        for fila in hoja.to_python(skip_empty_area=False)[:max_fila]
+    ]
+    return _rellenar(filas, max_fila, max_col)
+
+# ============================================================
+# 🚀 API
+# ============================================================
+BACKENDS = {
+    "openpyxl": _filas_openpyxl,
+    "xml": _filas_xml,
+    "calamine": _filas_calamine,
+}
+
+
+def leer_filas(ruta, max_fila, max_col, backend=None):
+    """Filas 1..max_fila de la hoja activa como tuplas de max_col valores crudos."""
+    backend = backend or backend_configurado()
+    return BACKENDS[backend](ruta, max_fila, max_col)
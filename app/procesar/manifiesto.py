@@ -0,0 +1,202 @@
+# ============================================================
+# procesar/manifiesto.py
+# Manifiesto de fichas procesadas para el ETL incremental
+# ============================================================
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+BASE_DIR = Path(__file__).resolve().parents[2]
+MANIFIESTO_DIR = BASE_DIR / "data" / "processed"
+VERSION_MANIFIESTO = 2  # 2: Anexo 5 con PLAZO_DÍAS entero y FECHA_LÍMITE como fecha
+
+
+# ============================================================
+# 🔑 HUELLAS DE ARCHIVOS Y CONFIGURACIÓN
+# ============================================================
+def hash_archivo(ruta, bloque=1 << 20):
+    """SHA-256 del contenido del archivo, leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for chunk in iter(lambda: f.read(bloque), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def digest_config(*rutas):
+    """SHA-256 combinado de los YAML usados por el ETL (cambia si cambia cualquiera)."""
+    h = hashlib.sha256()
+    for ruta in rutas:
+        ruta = Path(ruta)
+        h.update(ruta.name.encode("utf-8"))
+        if ruta.exists():
+            h.update(ruta.read_bytes())
+    return h.hexdigest()
+
+
+def _clave(ruta):
+    ruta = Path(ruta).resolve()
+    try:
+        return ruta.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return ruta.as_posix()
+
+
+# ============================================================
+# 📒 LECTURA / ESCRITURA DEL MANIFIESTO
+# ============================================================
+def cargar_manifiesto(anexo, *config_paths):
+    """
+    Carga data/processed/manifiesto_<anexo>.json.
+    Si el digest de configuración cambió, se descartan las entradas para reprocesar todo.
+    """
+    ruta = MANIFIESTO_DIR / f"manifiesto_{anexo}.json"
+    digest = digest_config(*config_paths)
+    archivos = {}
+
+    if ruta.exists():
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                previo = json.load(f)
+            if previo.get("version") == VERSION_MANIFIESTO and previo.get("config_digest") == digest:
+                archivos = previo.get("archivos", {})
+        except (OSError, ValueError):
+            archivos = {}
+
+    return {"ruta": ruta, "config_digest": digest, "archivos": archivos, "pendientes": {}}
+
+
+def guardar_manifiesto(manifiesto):
+    """Escribe el manifiesto de forma atómica (archivo temporal + replace)."""
+    ruta = manifiesto["ruta"]
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    contenido = {
+        "version": VERSION_MANIFIESTO,
+        "config_digest": manifiesto["config_digest"],
+        "archivos": manifiesto["archivos"],
+    }
+    tmp = ruta.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, ruta)
+
+
+# ============================================================
+# 🔍 DETECCIÓN DE FICHAS NUEVAS O MODIFICADAS
+# ============================================================
+def filtrar_pendientes(manifiesto, tareas):
+    """
+    Devuelve solo las tareas cuyo archivo (tarea[0]) es nuevo o cambió.
+    Primero compara tamaño y mtime; solo si difieren se calcula el hash.
+    """
+    archivos = manifiesto["archivos"]
+    pendientes = []
+
+    for tarea in tareas:
+        archivo = tarea[0]
+        clave = _clave(archivo)
+        st = os.stat(archivo)
+        entrada = archivos.get(clave)
+
+        if entrada and entrada["size"] == st.st_size and entrada["mtime_ns"] == st.st_mtime_ns:
+            continue
+
+        nueva = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": hash_archivo(archivo)}
+        if entrada and entrada["sha256"] == nueva["sha256"]:
+            # Solo cambió la fecha (copia, touch): se actualiza sin reprocesar
+            archivos[clave] = nueva
+            continue
+
+        manifiesto["pendientes"][clave] = nueva
+        pendientes.append(tarea)
+
+    return pendientes
+
+
+def registrar(manifiesto, archivos_ok):
+    """Marca como procesados los archivos que se exportaron correctamente."""
+    for archivo in archivos_ok:
+        clave = _clave(archivo)
+        entrada = manifiesto["pendientes"].pop(clave, None)
+        if entrada is None:
+            st = os.stat(archivo)
+            entrada = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": hash_archivo(archivo)}
+        manifiesto["archivos"][clave] = entrada
+
+
+# ============================================================
+# 👯 FICHAS IDÉNTICAS CON OTRO NOMBRE O EN OTRA CARPETA
+# ============================================================
+def _reactivar(manifiesto, clave):
+    """Una ficha que era alias vuelve a pendientes (su ficha original ya no está o cambió)."""
+    entrada = dict(manifiesto["archivos"].pop(clave))
+    entrada.pop("alias_de")
+    manifiesto["pendientes"][clave] = entrada
+
+
+def separar_duplicados(manifiesto, tareas):
+    """
+    Agrupa las fichas por sha256 (el del manifiesto si no cambiaron, sin releerlas) y
+    deja una sola por contenido: la que ya está procesada o, si ninguna lo está, la
+    primera en orden año/mes/región/archivo. Las demás son alias: no se abren y
+    quedan en el manifiesto con `alias_de`.
+    Devuelve (tareas pendientes sin alias, grupos para el reporte, tareas que pasaron
+    a ser alias en esta corrida y cuyas filas previas hay que quitar del consolidado).
+    """
+    archivos, en_curso = manifiesto["archivos"], manifiesto["pendientes"]
+    por_hash = {}
+    for tarea in tareas:
+        clave = _clave(tarea[0])
+        entrada = en_curso.get(clave) or archivos.get(clave)
+        if entrada is not None:
+            por_hash.setdefault(entrada["sha256"], []).append((clave, tarea))
+
+    grupos, nuevos = [], []
+    for sha, fichas in por_hash.items():
+        procesadas = [c for c, _ in fichas if c in archivos and c not in en_curso and "alias_de" not in archivos[c]]
+        canonica = procesadas[0] if procesadas else fichas[0][0]
+        if canonica not in en_curso and "alias_de" in archivos.get(canonica, {}):
+            _reactivar(manifiesto, canonica)
+        if len(fichas) == 1:
+            continue
+
+        alias = []
+        for clave, tarea in fichas:
+            if clave == canonica:
+                continue
+            previa = archivos.get(clave, {})
+            if previa.get("alias_de") is None or previa.get("sha256") != sha:
+                nuevos.append(tarea)
+            archivos[clave] = {**(en_curso.pop(clave, None) or previa), "alias_de": canonica}
+            alias.append(clave)
+        grupos.append({"sha256": sha, "ficha": canonica, "alias": alias})
+
+    return [t for t in tareas if _clave(t[0]) in en_curso], grupos, nuevos
+
+
+def ruta_duplicados(anexo):
+    return MANIFIESTO_DIR / f"duplicados_{anexo}.json"
+
+
+def guardar_duplicados(anexo, grupos):
+    """Reescribe el reporte de fichas idénticas del anexo (lo borra si no hay)."""
+    ruta = ruta_duplicados(anexo)
+    if not grupos:
+        ruta.unlink(missing_ok=True)
+        return None
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    reporte = {
+        "generado": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "grupos": grupos,
+    }
+    tmp = ruta.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, ruta)
+    return ruta
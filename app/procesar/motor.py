@@ -0,0 +1,509 @@
+# ============================================================
+# procesar/motor.py
+# Motor ETL común a todos los anexos: extraer → puntuar → escribir
+#
+# Importar este módulo no lee ni escribe nada; cada anexo se
+# ejecuta en el proceso actual con:
+#
+#   from procesar.motor import ejecutar
+#   ejecutar("anexo2")
+#
+# Las diferencias entre anexos viven en DEFINICIONES (columnas y
+# tipo de ficha) y en config/settings_<anexo>.yaml (celdas, rangos,
+# límites, clasificación y regla de puntaje).
+# ============================================================
+
+from datetime import datetime
+from functools import lru_cache, partial
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from procesar.buffer import BufferColumnas
+from procesar.catalogo import escanear
+from procesar.consola import imprimir
+from procesar.derivar_plantillas import actualizar as actualizar_derivada
+from procesar.docx_anexo5 import extraer_metadatos, procesar_tabla, separar_plazos
+from procesar.docx_streaming import leer_acta
+from procesar.huellas import guardar_cuarentena, huella_ficha
+from procesar.lectores import backend_configurado, leer_filas
+from procesar.manifiesto import (
+    cargar_manifiesto, filtrar_pendientes, registrar, guardar_manifiesto,
+    separar_duplicados, guardar_duplicados,
+)
+from procesar.paralelo import iterar_fichas
+from procesar.plan_extraccion import ejecutar_plan, extraer_ficha
+from utils.almacen import (
+    CLAVE_FICHA, anexar_consolidado, contar_filas, eliminar_fichas, exportar_excel_configurado, exportar_xlsx,
+    migrar_legado,
+)
+from utils.planes import plan_anexo
+from utils.puntuacion import (
+    celdas_marcadas, clasificar, decodificar_marcas, items_de_marcas, matriz_items,
+    puntuar_matriz, sumas_como_python, totales_por_seccion,
+)
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+BASE_DIR = Path(__file__).resolve().parents[2]
+CONFIG_DIR = BASE_DIR / "config"
+CONFIG_GENERAL = CONFIG_DIR / "settings_general.yaml"
+CARPETA_RAW = BASE_DIR / "data" / "raw"
+
+
+class DefinicionAnexo(NamedTuple):
+    etiqueta: str              # "ANEXO_2": prefijo de logs y patrón de archivos
+    extension: str             # ".xlsx" o ".docx"
+    tipo: str                  # "items" | "secciones" | "docx"
+    campos: dict               # campo de metadatos del YAML → columna del consolidado
+    columnas_comunes: list     # columnas que encabezan el consolidado
+    clave_duplicados: list = None
+
+
+DEFINICIONES = {
+    "anexo2": DefinicionAnexo(
+        etiqueta="ANEXO_2",
+        extension=".xlsx",
+        tipo="items",
+        campos={
+            "unidad_territorial": "Unidad Territorial",
+            "distrito": "Distrito",
+            "supervisor": "Supervisor",
+            "fecha": "Fecha Supervisión",
+        },
+        columnas_comunes=[
+            "Año", "Mes", "Región", "Archivo",
+            "Unidad Territorial", "Distrito", "Supervisor", "Fecha Supervisión",
+        ],
+    ),
+    "anexo3": DefinicionAnexo(
+        etiqueta="ANEXO_3",
+        extension=".xlsx",
+        tipo="secciones",
+        campos={
+            "responsable": "Responsable",
+            "facilitador": "Facilitador",
+            "comunidad": "Comunidad/Distrito",
+            "fecha_sesion": "Fecha Sesión",
+            "sesion_observada": "Sesión Observada",
+        },
+        columnas_comunes=[
+            "Año", "Mes", "Región", "Archivo",
+            "Responsable", "Facilitador", "Comunidad/Distrito",
+            "Fecha Sesión", "Sesión Observada",
+        ],
+    ),
+    "anexo4": DefinicionAnexo(
+        etiqueta="ANEXO_4",
+        extension=".xlsx",
+        tipo="items",
+        campos={
+            "unidad_territorial": "Unidad Territorial",
+            "provincia": "Provincia",
+            "distrito": "Distrito",
+            "supervisor": "Supervisor",
+            "fecha": "Fecha Supervisión",
+        },
+        columnas_comunes=[
+            "Año", "Mes", "Región", "Archivo",
+            "Unidad Territorial", "Provincia", "Distrito", "Supervisor", "Fecha Supervisión",
+        ],
+    ),
+    "anexo5": DefinicionAnexo(
+        etiqueta="ANEXO_5",
+        extension=".docx",
+        tipo="docx",
+        campos={},
+        columnas_comunes=[
+            "Año", "Mes", "Región", "Archivo",
+            "Unidad Territorial", "Distrito", "Supervisor", "Fecha Supervisión",
+            "PUNTOS_CRITICOS", "ACUERDOS_MEJORA", "RESPONSABLE",
+            "PLAZO", "PLAZO_DÍAS", "FECHA_LÍMITE",
+        ],
+        # Un documento reprocesado reemplaza todas sus filas y se eliminan
+        # duplicados reales dentro de cada partición año/mes/región
+        clave_duplicados=CLAVE_FICHA + ["PUNTOS_CRITICOS"],
+    ),
+}
+
+
+def ruta_config(anexo):
+    return CONFIG_DIR / f"settings_{anexo}.yaml"
+
+
+def _limites_secciones(plan):
+    """Columnas (relativas al plan, fin exclusivo) de cada fila y fila inicial de cada sección."""
+    col_inicio, col_fin, cortes = [], [], []
+    for s in plan.secciones:
+        cortes.append(len(col_inicio))
+        n = s.fila_fin - s.fila_inicio + 1
+        col_inicio += [s.col_inicio - plan.extraccion.col_inicio] * n
+        col_fin += [s.col_fin - plan.extraccion.col_inicio + 1] * n
+    return col_inicio, col_fin, cortes
+
+
+@lru_cache(maxsize=None)
+def _lector():
+    return backend_configurado()
+
+# ============================================================
+# 🧩 FUNCIONES AUXILIARES Y LOG
+# ============================================================
+def log(mensaje, tipo="INFO", anexo="ETL"):
+    """Imprime un mensaje estándar con fecha, tipo y anexo."""
+    hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    simbolo = {"INFO": "ℹ️", "OK": "✅", "WARN": "⚠️", "ERROR": "❌"}.get(tipo, "")
+    imprimir(f"{simbolo} [{anexo}] [{hora}] {mensaje}")
+
+def extraer_valor(valor):
+    if isinstance(valor, str) and ":" in valor:
+        return valor.split(":", 1)[1].strip()
+    return valor
+
+def limpiar_texto(v):
+    return v.strip().title() if isinstance(v, str) else v
+
+def formatear_fecha(v):
+    if isinstance(v, (pd.Timestamp, datetime)):
+        return v.strftime("%Y-%m-%d")
+    return v
+
+def _metadatos(anexo, meta):
+    """Aplica limpieza de texto (o formato de fecha) a cada campo y lo renombra a su columna."""
+    datos = {}
+    for campo, columna in DEFINICIONES[anexo].campos.items():
+        valor = extraer_valor(meta[campo])
+        datos[columna] = (formatear_fecha(valor) if campo.startswith("fecha") else limpiar_texto(valor)) or ""
+    return datos
+
+# ============================================================
+# 🚀 RECOLECTAR FICHAS
+# ============================================================
+def recolectar(anexo):
+    """Tareas (archivo, región, mes, año) del anexo según el catálogo de data/raw, en orden estable."""
+    d = DEFINICIONES[anexo]
+    catalogo = escanear(CARPETA_RAW)
+
+    tareas, con_fichas = [], set()
+    for f in catalogo.fichas:
+        if f.anexo == anexo and f.ruta.suffix.lower() == d.extension:
+            tareas.append((f.ruta, f.region, f.mes, f.anio))
+            con_fichas.add((f.anio, f.mes, f.region))
+
+    periodo = None
+    for anio, mes, region in catalogo.regiones:
+        if (anio, mes) != periodo:
+            periodo = (anio, mes)
+            log(f"Procesando: {anio}/{mes}", "INFO", d.etiqueta)
+        if (anio, mes, region) not in con_fichas:
+            log(f"{anio}/{mes}/{region}: sin archivos {d.extension}", "WARN", d.etiqueta)
+    return tareas
+
+# ============================================================
+# 📥 ETAPA 1: EXTRAER (en los workers del pool)
+# ============================================================
+def _leer_ficha(anexo, ruta):
+    """
+    Lee la ficha una sola vez y aplica el plan de su versión de plantilla (por huella).
+    Devuelve ((meta, filas), None) o (None, datos de cuarentena) si la huella es desconocida.
+    """
+    plan = plan_anexo(anexo)
+    if plan.plantillas is None:
+        return extraer_ficha(ruta, plan.extraccion, _lector()), None
+
+    filas_hoja = leer_filas(ruta, plan.plantillas.max_fila, plan.plantillas.max_col, _lector())
+    huella, dimension, textos = huella_ficha(ruta, filas_hoja, plan.plantillas.celdas)
+    plantilla = plan.plantillas.por_huella.get(huella)
+    if plantilla is None:
+        return None, {"huella": huella, "dimension": dimension, "encabezados": textos}
+    return ejecutar_plan(filas_hoja, plantilla.extraccion), None
+
+
+def _extraer_items(anexo, ruta, region, mes, anio):
+    """Anexo 2 y 4: metadatos + primer valor informado de cada pregunta."""
+    lectura, cuarentena = _leer_ficha(anexo, ruta)
+    if cuarentena:
+        return {"cuarentena": cuarentena}
+    meta, filas = lectura
+
+    items_dict = {}
+    for fila in filas:
+        if not fila or all(v is None for v in fila):
+            continue
+        pregunta = str(fila[0]).strip() if fila[0] else None
+        calificaciones = fila[1:]
+        if pregunta:
+            valor = next((v for v in calificaciones if v not in [None, ""]), "NA")
+            items_dict[pregunta[:120]] = valor
+
+    if not items_dict:
+        raise ValueError(f"La ficha {ruta.name} no contiene ítems válidos.")
+    return {"meta": _metadatos(anexo, meta), "items": list(items_dict.values())}
+
+
+def _extraer_secciones(anexo, ruta, region, mes, anio):
+    """Anexo 3: metadatos + celdas marcadas de las secciones (se decodifican por lote al puntuar)."""
+    lectura, cuarentena = _leer_ficha(anexo, ruta)
+    if cuarentena:
+        return {"cuarentena": cuarentena}
+    meta, filas = lectura
+    return {"meta": _metadatos(anexo, meta), "marcado": celdas_marcadas(filas)}
+
+
+def _extraer_docx(anexo, ruta, region, mes, anio):
+    """Anexo 5: filas de la tabla de puntos críticos del documento Word."""
+    texto, filas = leer_acta(ruta)
+    meta = extraer_metadatos(texto, ruta)
+    return {"filas": procesar_tabla(filas, meta, region, mes, anio, ruta.name)}
+
+
+EXTRACTORES = {"items": _extraer_items, "secciones": _extraer_secciones, "docx": _extraer_docx}
+
+
+def extraer(anexo, tareas, procesados, cuarentena=None):
+    """
+    Genera (tarea, crudo) por ficha extraída en paralelo, en orden; agrega a `procesados`
+    los archivos OK y a `cuarentena` los de plantilla desconocida (no se extraen).
+    """
+    d = DEFINICIONES[anexo]
+    for tarea, crudo, error in iterar_fichas(partial(EXTRACTORES[d.tipo], anexo), tareas):
+        archivo, region, mes, anio = tarea
+        if error:
+            log(f"Error en {anio}/{mes}/{region}/{archivo.name}: {error}", "ERROR", d.etiqueta)
+            continue
+        if "cuarentena" in crudo:
+            log(f"{anio}/{mes}/{region}/{archivo.name}: plantilla desconocida "
+                f"(huella {crudo['cuarentena']['huella']}), enviada a cuarentena", "WARN", d.etiqueta)
+            if cuarentena is not None:
+                cuarentena.append({"anio": anio, "mes": mes, "region": region,
+                                   "archivo": str(archivo), **crudo["cuarentena"]})
+            continue
+        procesados.append(archivo)
+        log(f"{anio}/{mes}/{region}/{archivo.name} procesado", "OK", d.etiqueta)
+        yield tarea, crudo
+
+# ============================================================
+# 🧮 ETAPA 2: PUNTUAR
+# ============================================================
+def _en_lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def _puntuar_items(plan, fichas_items):
+    """Columnas de puntaje de un lote de fichas (lista de ítems por ficha) según `puntaje` del YAML."""
+    matriz = matriz_items(fichas_items)
+    r = puntuar_matriz(matriz, plan.max_por_item, plan.base_puntaje)
+
+    referencia = r["puntaje"] if plan.clasificar_por == "puntaje" else r["suma"]
+    puntajes = [p if t > 0 else 0 for p, t in zip(r["puntaje"].tolist(), r["total_items"].tolist())]
+    return [
+        {"Ítems válidos": validos, "Ítems NA": na, "Suma Total": suma, "Puntaje (%)": puntaje, "Evaluación": categoria}
+        for validos, na, suma, puntaje, categoria in zip(
+            r["num_validos"].tolist(),
+            r["num_na"].tolist(),
+            sumas_como_python(r["suma"], matriz.decimal),
+            puntajes,
+            clasificar(referencia, plan.umbrales).tolist(),
+        )
+    ]
+
+
+def puntuar(anexo, extraidas):
+    """
+    Genera, por ficha, {salida: [registros]} para el consolidado, puntuando
+    en lotes de filas_por_lote fichas con utils/puntuacion.py.
+    La salida es el nombre de sección en Anexo 3 y None en el resto.
+    """
+    d = DEFINICIONES[anexo]
+    plan = plan_anexo(anexo)
+
+    if d.tipo == "docx":
+        for _, crudo in extraidas:
+            yield {None: crudo["filas"]}
+        return
+
+    if d.tipo == "secciones":
+        col_inicio, col_fin, cortes = _limites_secciones(plan)
+        limites = list(zip(cortes, cortes[1:] + [len(col_inicio)]))
+
+        for lote in _en_lotes(extraidas, filas_por_lote()):
+            codigos = decodificar_marcas(np.stack([crudo["marcado"] for _, crudo in lote]), col_inicio, col_fin)
+            totales = totales_por_seccion(codigos, cortes)
+            categorias = [clasificar(totales[:, j], s.umbrales).tolist() for j, s in enumerate(plan.secciones)]
+            items = [items_de_marcas(codigos[:, desde:hasta]) for desde, hasta in limites]
+            totales = totales.tolist()
+
+            for k, ((archivo, region, mes, anio), crudo) in enumerate(lote):
+                base = {"Año": anio, "Mes": mes, "Región": region, "Archivo": archivo.name, **crudo["meta"]}
+                por_seccion = {}
+                for j, s in enumerate(plan.secciones):
+                    por_seccion[s.nombre] = [{
+                        **base,
+                        **{f"Item_{i+1}": v for i, v in enumerate(items[j][k])},
+                        "Total": totales[k][j],
+                        "Evaluación": categorias[j][k],
+                    }]
+                yield por_seccion
+        return
+
+    for lote in _en_lotes(extraidas, filas_por_lote()):
+        puntajes = _puntuar_items(plan, [crudo["items"] for _, crudo in lote])
+        for ((archivo, region, mes, anio), crudo), puntaje in zip(lote, puntajes):
+            yield {None: [{
+                "Año": anio, "Mes": mes, "Región": region, "Archivo": archivo.name,
+                **crudo["meta"],
+                **{f"Item_{i+1}": v for i, v in enumerate(crudo["items"])},
+                **puntaje,
+            }]}
+
+# ============================================================
+# 💾 ETAPA 3: ESCRIBIR
+# ============================================================
+@lru_cache(maxsize=None)
+def filas_por_lote():
+    """Lee procesamiento.filas_por_lote de settings_general.yaml (por defecto 5000)."""
+    try:
+        with open(CONFIG_GENERAL, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        return max(1, int(config.get("procesamiento", {}).get("filas_por_lote", 5000)))
+    except Exception:
+        return 5000
+
+
+def _ruta_salida(anexo, salida):
+    salida_cfg = plan_anexo(anexo).salida
+    salida_dir = BASE_DIR / salida_cfg["carpeta"]
+    salida_dir.mkdir(parents=True, exist_ok=True)
+    if salida is None:
+        return salida_dir / salida_cfg["archivo_excel"]
+    return salida_dir / f"{anexo}_{salida.lower().replace(' ', '_')}_consolidado.xlsx"
+
+
+def _volcar(anexo, buffer, salida_excel):
+    """Ordena columnas del lote y lo anexa al dataset (solo particiones tocadas, sin .xlsx)."""
+    d = DEFINICIONES[anexo]
+    columnas = d.columnas_comunes
+    df = buffer.vaciar()
+    if d.tipo == "docx":
+        # PLAZO → PLAZO_DÍAS (entero) y FECHA_LÍMITE (fecha) para todo el lote de una vez
+        df = df.join(separar_plazos(df["PLAZO"]))
+    df = df[columnas + [c for c in df.columns if c not in columnas]]
+    anexar_consolidado(df, salida_excel, subset_duplicados=d.clave_duplicados,
+                       exportar_excel=False)
+
+
+def escribir(anexo, fichas):
+    """
+    Consume {salida: [registros]} por ficha en buffers de columnas y vuelca
+    cada buffer al alcanzar filas_por_lote (siempre entre fichas, para que
+    un documento no quede repartido en dos lotes). El .xlsx se exporta al final.
+    """
+    d = DEFINICIONES[anexo]
+    lote = filas_por_lote()
+    buffers, escritas = {}, set()
+
+    for por_salida in fichas:
+        for salida, registros in por_salida.items():
+            buffer = buffers.setdefault(salida, BufferColumnas())
+            for registro in registros:
+                buffer.agregar(registro)
+        for salida, buffer in buffers.items():
+            if len(buffer) >= lote:
+                _volcar(anexo, buffer, _ruta_salida(anexo, salida))
+                escritas.add(salida)
+
+    for salida, buffer in buffers.items():
+        if len(buffer):
+            _volcar(anexo, buffer, _ruta_salida(anexo, salida))
+            escritas.add(salida)
+
+    if not escritas:
+        log("No se procesó ninguna ficha nueva.", "WARN", d.etiqueta)
+        return
+
+    exportar = exportar_excel_configurado()
+    for salida in sorted(escritas, key=str):
+        salida_excel = _ruta_salida(anexo, salida)
+        if exportar:
+            exportar_xlsx(salida_excel)
+        log(f"Consolidado actualizado: {salida_excel}", "OK", d.etiqueta)
+        detalle = f"en {salida}" if salida else "acumuladas"
+        log(f"Total de filas {detalle}: {contar_filas(salida_excel)}", "INFO", d.etiqueta)
+
+def _salidas(anexo):
+    """Salidas del anexo: una por sección en el ANEXO 3, una sola (None) en los demás."""
+    if DEFINICIONES[anexo].tipo == "secciones":
+        return [s.nombre for s in plan_anexo(anexo).secciones]
+    return [None]
+
+
+def _quitar_alias(anexo, alias):
+    """Quita del consolidado las filas que dejaron de ser una ficha propia (ahora son alias)."""
+    d = DEFINICIONES[anexo]
+    for ruta, region, mes, anio in alias:
+        log(f"{ruta.name} ({region}) es idéntica a otra ficha: se omite", "WARN", d.etiqueta)
+    claves = pd.DataFrame(
+        [(ruta.name, region, mes, anio) for ruta, region, mes, anio in alias], columns=CLAVE_FICHA,
+    )
+    for salida in _salidas(anexo):
+        salida_excel = _ruta_salida(anexo, salida)
+        quitadas = eliminar_fichas(claves, salida_excel)
+        if quitadas:
+            if exportar_excel_configurado():
+                exportar_xlsx(salida_excel)
+            log(f"{quitadas} fila(s) de fichas duplicadas quitadas de {salida_excel.name}", "OK", d.etiqueta)
+
+# ============================================================
+# 🚀 EJECUCIÓN DE UN ANEXO COMPLETO
+# ============================================================
+def ejecutar(anexo):
+    """Procesa las fichas nuevas o modificadas de un anexo. Devuelve cuántas se procesaron."""
+    d = DEFINICIONES[anexo]
+
+    # Plan derivado de formatos/ANEXO_N.xlsx (solo se escanea si la plantilla cambió)
+    if d.extension == ".xlsx":
+        try:
+            derivada = actualizar_derivada(anexo)
+        except Exception as e:
+            log(f"No se pudo derivar el plan de la plantilla en blanco: {e}", "WARN", d.etiqueta)
+        else:
+            if derivada:
+                log(f"Plantilla formatos/{derivada['plantilla']}: huella {derivada['huella']}", "INFO", d.etiqueta)
+
+    # Solo se procesan fichas nuevas o modificadas desde la última corrida
+    manifiesto = cargar_manifiesto(anexo, ruta_config(anexo))
+    for salida in _salidas(anexo):
+        # Antes de escribir nada: un consolidado previo que no se puede particionar detiene el anexo
+        migrar_legado(_ruta_salida(anexo, salida))
+    todas = recolectar(anexo)
+    filtrar_pendientes(manifiesto, todas)
+
+    # Misma ficha subida con otro nombre o en otra región: se procesa una sola vez
+    tareas, duplicados, alias = separar_duplicados(manifiesto, todas)
+    if alias:
+        _quitar_alias(anexo, alias)
+    log(f"Fichas nuevas o modificadas: {len(tareas)}", "INFO", d.etiqueta)
+
+    # extraer → puntuar → escribir encadenados como generadores: memoria acotada por lote
+    procesados, cuarentena = [], []
+    escribir(anexo, puntuar(anexo, extraer(anexo, tareas, procesados, cuarentena)))
+
+    # Las fichas en cuarentena no se registran: se revisan otra vez en la siguiente corrida
+    registrar(manifiesto, procesados)
+    guardar_manifiesto(manifiesto)
+    reporte = guardar_duplicados(anexo, duplicados)
+    if reporte:
+        n_alias = sum(len(g["alias"]) for g in duplicados)
+        log(f"{n_alias} ficha(s) idéntica(s) a otra se omiten. Reporte: {reporte}", "WARN", d.etiqueta)
+    reporte = guardar_cuarentena(anexo, cuarentena)
+    if reporte:
+        log(f"{len(cuarentena)} ficha(s) con plantilla desconocida. Reporte: {reporte}", "WARN", d.etiqueta)
+    log(f"Procesamiento de {d.etiqueta.replace('_', ' ')} finalizado.", "OK", d.etiqueta)
+    return len(procesados)
@@ -0,0 +1,87 @@
+# ============================================================
+# procesar/paralelo.py
+# Extracción de fichas en paralelo con un pool de procesos
+# ============================================================
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+import yaml
+
+# ============================================================
+# ⚙️ CONFIGURACIÓN
+# ============================================================
+BASE_DIR = Path(__file__).resolve().parents[2]
+CONFIG_GENERAL = BASE_DIR / "config" / "settings_general.yaml"
+
+# maestro.py ejecuta varios anexos en hilos del mismo intérprete: "forkserver"
+# evita que los workers hereden locks tomados por otros hilos (fork directo)
+CONTEXTO = (
+    multiprocessing.get_context("forkserver")
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else None
+)
+
+
+def leer_workers():
+    """Lee el número de procesos de settings_general.yaml (0 = todos los núcleos, 1 = secuencial)."""
+    try:
+        with open(CONFIG_GENERAL, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        workers = int(config.get("procesamiento", {}).get("workers", 1))
+    except Exception:
+        workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+# ============================================================
+# 🧩 EJECUCIÓN AISLADA POR FICHA
+# ============================================================
+def _ejecutar(args):
+    """Corre una tarea dentro del worker y captura su error sin abortar el lote."""
+    funcion, indice, tarea = args
+    try:
+        return indice, funcion(*tarea), None
+    except Exception as e:
+        return indice, None, f"{type(e).__name__}: {e} (pid {os.getpid()})"
+
+
+def iterar_fichas(funcion, tareas, workers=None):
+    """
+    Aplica `funcion(*tarea)` a cada tarea y genera (tarea, resultado, error)
+    en el mismo orden de `tareas`, con a lo sumo workers * 4 fichas en vuelo
+    para que la memoria no crezca con el tamaño del lote.
+    Con workers <= 1 se procesa en el proceso actual.
+    """
+    tareas = list(tareas)
+    workers = leer_workers() if workers is None else workers
+
+    if workers <= 1 or len(tareas) <= 1:
+        for i, tarea in enumerate(tareas):
+            _, resultado, error = _ejecutar((funcion, i, tarea))
+            yield tarea, resultado, error
+        return
+
+    workers = min(workers, len(tareas))
+    pendientes = iter(enumerate(tareas))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=CONTEXTO) as pool:
+        en_vuelo = deque(
+            (tarea, pool.submit(_ejecutar, (funcion, i, tarea)))
+            for i, tarea in islice(pendientes, workers * 4)
+        )
+        while en_vuelo:
+            tarea, futuro = en_vuelo.popleft()
+            _, resultado, error = futuro.result()
+            for i, siguiente in islice(pendientes, 1):
+                en_vuelo.append((siguiente, pool.submit(_ejecutar, (funcion, i, siguiente))))
+            yield tarea, resultado, error
+
+
+def extraer_fichas(funcion, tareas, workers=None):
+    """Versión en lista de iterar_fichas: [(tarea, resultado, error)] en el orden de `tareas`."""
+    return list(iterar_fichas(funcion, tareas, workers))
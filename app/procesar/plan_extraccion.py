@@ -0,0 +1,57 @@
+# ============================================================
+# procesar/plan_extraccion.py
+# Plan de extracción en una sola pasada por la hoja
+#
+# En modo read_only cada acceso hoja["C2"] vuelve a recorrer el XML
+# de la hoja, y cada rango de ítems abre otro iter_rows. El plan
+# compila las celdas de metadatos y los rangos de ítems del YAML en
+# una lista de filas ordenada y los llena con una única lectura
+# (procesar/lectores.py). El plan se compila desde el YAML en
+# utils/planes.py.
+# ============================================================
+
+from procesar.lectores import leer_filas
+from utils.planes import PlanExtraccion, compilar_plan, items_de_config  # noqa: F401 (compilación en utils/planes.py)
+
+
+# ============================================================
+# 🚀 EJECUCIÓN EN UNA SOLA PASADA
+# ============================================================
+def ejecutar_plan(filas_hoja, plan):
+    """
+    Recorre las filas de la hoja (desde la fila 1) una sola vez hasta plan.max_fila y devuelve:
+      - meta: {campo: valor crudo de la celda}
+      - filas: tuplas de col_inicio..col_fin de cada fila de los rangos, en el orden del YAML
+    """
+    celdas_por_fila = {}
+    for campo, fila, columna in plan.celdas:
+        celdas_por_fila.setdefault(fila, []).append((campo, columna))
+
+    filas_items = set()
+    for inicio, fin in plan.rangos:
+        filas_items.update(range(inicio, fin + 1))
+
+    meta, capturadas = {}, {}
+    if plan.max_fila:
+        for n_fila, valores in enumerate(filas_hoja, start=1):
+            if n_fila > plan.max_fila:
+                break
+            for campo, columna in celdas_por_fila.get(n_fila, ()):
+                meta[campo] = valores[columna - 1] if columna <= len(valores) else None
+            if n_fila in filas_items:
+                capturadas[n_fila] = tuple(valores[plan.col_inicio - 1:plan.col_fin])
+
+    vacia = (None,) * (plan.col_fin - plan.col_inicio + 1)
+    filas = [
+        capturadas.get(n, vacia)
+        for inicio, fin in plan.rangos
+        for n in range(inicio, fin + 1)
+    ]
+    for campo, _, _ in plan.celdas:
+        meta.setdefault(campo, None)
+    return meta, filas
+
+
+def extraer_ficha(ruta, plan, backend=None):
+    """Lee la ficha con el lector configurado y aplica el plan."""
+    return ejecutar_plan(leer_filas(ruta, plan.max_fila, plan.max_col, backend), plan)
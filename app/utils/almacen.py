@@ -0,0 +1,603 @@
+# ==============================================================
+# utils/almacen.py
+# Almacén de consolidados: dataset Parquet particionado por
+# año/mes/región (principal) + Excel (exportación)
+#
+#   data/processed/anexo2_consolidado/
+#       anio=2025/mes=OCTUBRE/region=LA%20LIBERTAD/part.parquet
+#       anio=2025/mes=OCTUBRE/region=LA%20LIBERTAD/part-00001.parquet
+#       anio=2025/mes=OCTUBRE/region=LA%20LIBERTAD/_claves.npz
+#       _version                                  (cambia en cada escritura)
+#   data/processed/anexo2_consolidado.xlsx      (para revisión humana)
+#
+# Cada partición guarda un índice de claves (hash de Archivo/Región/
+# Mes/Año → fragmento que tiene sus filas). Las fichas nuevas se
+# escriben como un fragmento más sin leer las filas previas; solo
+# los fragmentos con fichas reprocesadas se reescriben.
+#
+# Cada escritura se replica por ficha en data/processed/consolidados.sqlite
+# (utils/almacen_sql.py), que es lo que consultan las páginas.
+# El dashboard cachea por version_datos(): ve los datos nuevos en el
+# siguiente rerun y nunca relee un consolidado que no cambió.
+# ==============================================================
+
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from utils.almacen_sql import (
+    eliminar_fichas_sql, existe_tabla, reemplazar_tabla, tabla_de, tiene_clave, upsert_fichas,
+)
+
+# ==============================================================
+# ⚙️ CONFIGURACIÓN
+# ==============================================================
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+CONFIG_GENERAL = BASE_DIR / "config" / "settings_general.yaml"
+
+# (nombre en la ruta, columna del consolidado)
+PARTICIONES = [("anio", "Año"), ("mes", "Mes"), ("region", "Región")]
+CLAVE_FICHA = ["Archivo", "Región", "Mes", "Año"]
+ARCHIVO_PARTE = "part.parquet"          # fragmento base (migrado o compactado)
+PATRON_FRAGMENTO = re.compile(r"^part(?:-(\d+))?\.parquet$")
+ARCHIVO_INDICE = "_claves.npz"
+VERSION_INDICE = 1
+ARCHIVO_VERSION = "_version"            # token que el ETL renueva en cada escritura
+MAX_FRAGMENTOS = 16                     # más fragmentos en una partición → se compacta
+
+# ==============================================================
+# 📁 RUTAS
+# ==============================================================
+
+def ruta_parquet(ruta_excel):
+    """Ruta del Parquet de archivo único (formato anterior a las particiones)."""
+    return Path(ruta_excel).with_suffix(".parquet")
+
+
+def ruta_dataset(ruta_excel):
+    """Carpeta del dataset particionado equivalente a un consolidado .xlsx."""
+    return Path(ruta_excel).with_suffix("")
+
+
+def _normalizar(valor):
+    return str(valor).strip().upper()
+
+
+def _dir_particion(dataset, valores):
+    ruta = Path(dataset)
+    for (nombre, _), valor in zip(PARTICIONES, valores):
+        ruta = ruta / f"{nombre}={quote(_normalizar(valor), safe='')}"
+    return ruta
+
+
+def _numero_fragmento(ruta):
+    """0 para part.parquet, n para part-0000n.parquet, None si no es un fragmento."""
+    coincidencia = PATRON_FRAGMENTO.match(ruta.name)
+    if not coincidencia:
+        return None
+    return int(coincidencia.group(1) or 0)
+
+
+def _fragmentos(carpeta):
+    """Fragmentos Parquet de una partición en orden de escritura."""
+    if not carpeta.is_dir():
+        return []
+    fragmentos = [r for r in carpeta.iterdir() if _numero_fragmento(r) is not None]
+    return sorted(fragmentos, key=_numero_fragmento)
+
+
+def listar_particiones(ruta_excel):
+    """
+    Lista los fragmentos Parquet de todas las particiones como dicts
+    {Año, Mes, Región, ruta} sin abrir ningún archivo.
+    """
+    dataset = ruta_dataset(ruta_excel)
+    if not dataset.is_dir():
+        return []
+    patron = "/".join(f"{nombre}=*" for nombre, _ in PARTICIONES)
+    particiones = []
+    for carpeta in sorted(dataset.glob(patron)):
+        valores = {}
+        for parte, (nombre, columna) in zip(carpeta.parts[-len(PARTICIONES):], PARTICIONES):
+            valores[columna] = unquote(parte.split("=", 1)[1])
+        particiones += [{**valores, "ruta": fragmento} for fragmento in _fragmentos(carpeta)]
+    return particiones
+
+
+def _coincide(particion, filtros):
+    for columna, permitidos in (filtros or {}).items():
+        if columna not in particion or not permitidos:
+            continue
+        if particion[columna] not in {_normalizar(v) for v in permitidos}:
+            return False
+    return True
+
+# ==============================================================
+# 🧩 TIPADO PARA ARROW
+# ==============================================================
+
+def tipar_para_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte las columnas object mezcladas (p. ej. 0/1/2 con "NA") a un tipo
+    estable: numérico si todos los valores informados son números, texto si no.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        serie = df[col].replace({"NA": None, "": None})
+        informados = serie.notna()
+        numerica = pd.to_numeric(serie, errors="coerce")
+        if informados.any() and numerica[informados].notna().all():
+            df[col] = numerica
+        else:
+            df[col] = df[col].map(lambda v: None if pd.isna(v) else str(v)).astype("string")
+    return df
+
+
+# ==============================================================
+# 📐 ESQUEMA CANÓNICO DEL CONSOLIDADO
+# ==============================================================
+# Por nombre de columna (sin tildes, mayúsculas, "_" como separador), así
+# sirve igual para "Unidad Territorial" del ETL y UNIDAD_TERRITORIAL:
+#   dimensiones → category, ítems 0/1/2/3/NA → Int8, porcentajes → float32
+DIMENSIONES = {"UNIDAD_TERRITORIAL", "SUPERVISOR", "REGION", "MES", "PROVINCIA", "DISTRITO", "RESPONSABLE"}
+PATRON_EVALUACION = re.compile(r"^EVALUACION(_[A-Z0-9]+)?$")
+PATRON_ITEM = re.compile(r"^ITEM_\d+$")
+PATRON_PORCENTAJE = re.compile(r"^(PORCENTAJE(_[A-Z0-9]+)?|PUNTAJE_%)$")
+
+
+def _nombre_canonico(columna):
+    texto = unicodedata.normalize("NFKD", str(columna)).encode("ascii", "ignore").decode().upper()
+    return re.sub(r"[^A-Z0-9%]+", "_", texto).strip("_")
+
+
+def tipo_canonico(columna):
+    """"category", "Int8", "float32" o None (la columna conserva su tipo)."""
+    nombre = _nombre_canonico(columna)
+    if nombre in DIMENSIONES or PATRON_EVALUACION.match(nombre):
+        return "category"
+    if PATRON_ITEM.match(nombre):
+        return "Int8"
+    if PATRON_PORCENTAJE.match(nombre):
+        return "float32"
+    return None
+
+
+def _numerica(serie):
+    """Serie numérica si todos los valores informados ("NA" y "" cuentan como vacíos) son números; si no, None."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie
+    serie = serie.replace({"NA": None, "": None})
+    numerica = pd.to_numeric(serie, errors="coerce")
+    return numerica if numerica.notna().sum() == serie.notna().sum() else None
+
+
+def aplicar_esquema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica los tipos canónicos en el mismo DataFrame. Una columna que no encaja
+    (texto en un ítem, un ítem fuera de int8) se deja como está.
+    """
+    for col in df.columns:
+        tipo = tipo_canonico(col)
+        if tipo is None or df[col].dtype == tipo:
+            continue
+        if tipo == "category":
+            df[col] = df[col].astype("category")
+            continue
+        numerica = _numerica(df[col])
+        if numerica is None:
+            continue
+        if tipo == "Int8":
+            informados = numerica.dropna()
+            if not ((informados % 1 == 0).all() and informados.between(-128, 127).all()):
+                continue
+        df[col] = numerica.astype(tipo)
+    return df
+
+
+def _escribir_parquet(df, destino):
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_suffix(".parquet.tmp")
+    aplicar_esquema(tipar_para_parquet(df)).to_parquet(tmp, index=False)
+    os.replace(tmp, destino)
+
+
+def _config_almacen(clave, defecto):
+    try:
+        with open(CONFIG_GENERAL, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        return bool(config.get("almacen", {}).get(clave, defecto))
+    except Exception:
+        return defecto
+
+
+def exportar_excel_configurado():
+    """Lee almacen.exportar_excel de settings_general.yaml (por defecto True)."""
+    return _config_almacen("exportar_excel", True)
+
+
+def sqlite_configurado():
+    """Lee almacen.sqlite de settings_general.yaml (por defecto True)."""
+    return _config_almacen("sqlite", True)
+
+# ==============================================================
+# 🔑 ÍNDICE DE CLAVES POR PARTICIÓN
+# ==============================================================
+
+class IndiceClaves(NamedTuple):
+    hashes: np.ndarray       # uint64: hash de la clave normalizada
+    fragmentos: np.ndarray   # int64: número del fragmento que tiene sus filas
+
+
+def hash_claves(df, clave=CLAVE_FICHA):
+    """Hash uint64 de la clave normalizada de cada fila (SipHash de pandas, estable entre corridas)."""
+    partes = [df[c].astype(str).str.strip().str.upper() for c in clave]
+    unida = partes[0].str.cat(partes[1:], sep="\x1f") if len(partes) > 1 else partes[0]
+    return pd.util.hash_array(unida.to_numpy(dtype=object))
+
+
+def _reconstruir_indice(carpeta, clave):
+    """Índice leyendo solo las columnas de la clave (particiones escritas antes del índice)."""
+    hashes, fragmentos = [], []
+    for fragmento in _fragmentos(carpeta):
+        h = hash_claves(pd.read_parquet(fragmento, columns=clave), clave)
+        hashes.append(h)
+        fragmentos.append(np.full(len(h), _numero_fragmento(fragmento), dtype=np.int64))
+    if not hashes:
+        return IndiceClaves(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64))
+    return IndiceClaves(np.concatenate(hashes), np.concatenate(fragmentos))
+
+
+def _leer_indice(carpeta, clave):
+    try:
+        with np.load(carpeta / ARCHIVO_INDICE) as guardado:
+            if int(guardado["version"]) == VERSION_INDICE and guardado["clave"].tolist() == list(clave):
+                return IndiceClaves(guardado["hashes"], guardado["fragmentos"])
+    except (OSError, ValueError, KeyError):
+        pass
+    return _reconstruir_indice(carpeta, clave)
+
+
+def _guardar_indice(carpeta, indice, clave):
+    destino = carpeta / ARCHIVO_INDICE
+    tmp = destino.with_name(f"{destino.name}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, version=VERSION_INDICE, clave=np.array(clave), **indice._asdict())
+    os.replace(tmp, destino)
+
+
+def _ruta_fragmento(carpeta, numero):
+    return carpeta / (ARCHIVO_PARTE if numero == 0 else f"part-{numero:05d}.parquet")
+
+
+def _compactar(carpeta, indice):
+    """
+    Une los fragmentos agregados después de part.parquet en uno solo; si entre todos ya
+    tienen tantas filas como part.parquet, une la partición completa en part.parquet.
+    Así el fragmento base (el historial) solo se reescribe cuando duplica su tamaño.
+    """
+    import pyarrow.parquet as pq
+
+    fragmentos = _fragmentos(carpeta)
+    base = fragmentos[0] if fragmentos[0].name == ARCHIVO_PARTE else None
+    recientes = fragmentos[1:] if base is not None else fragmentos
+    filas_base = pq.ParquetFile(base).metadata.num_rows if base is not None else 0
+    filas_recientes = sum(pq.ParquetFile(f).metadata.num_rows for f in recientes)
+
+    unir = recientes if filas_recientes < filas_base else fragmentos
+    destino = unir[0]
+    df = pd.concat([pd.read_parquet(f) for f in unir], ignore_index=True)
+    _escribir_parquet(df, destino)
+    for fragmento in unir[1:]:
+        fragmento.unlink()
+
+    unidos = np.isin(indice.fragmentos, [_numero_fragmento(f) for f in unir])
+    return indice._replace(fragmentos=np.where(unidos, _numero_fragmento(destino), indice.fragmentos))
+
+
+def _quitar_claves(carpeta, indice, hashes, clave):
+    """
+    Reescribe sin esas fichas solo los fragmentos que las contienen (o los borra si
+    quedan vacíos). Devuelve (índice sin esas fichas, filas quitadas).
+    """
+    previas = np.isin(indice.hashes, hashes)
+    quitadas = 0
+    for numero in np.unique(indice.fragmentos[previas]).tolist():
+        fragmento = _ruta_fragmento(carpeta, numero)
+        previo = pd.read_parquet(fragmento)
+        conservar = ~np.isin(hash_claves(previo, clave), hashes)
+        quitadas += int((~conservar).sum())
+        if conservar.any():
+            _escribir_parquet(previo[conservar], fragmento)
+        else:
+            fragmento.unlink()
+    return IndiceClaves(indice.hashes[~previas], indice.fragmentos[~previas]), quitadas
+
+
+def _anexar_particion(carpeta, grupo, clave):
+    """
+    Agrega las filas de una partición en O(filas nuevas): las fichas que no están en el
+    índice van a un fragmento nuevo; si alguna ficha ya estaba, solo se reescriben los
+    fragmentos que la contienen (sin sus filas previas).
+    """
+    hashes = hash_claves(grupo, clave)
+    indice, _ = _quitar_claves(carpeta, _leer_indice(carpeta, clave), hashes, clave)
+
+    existentes = _fragmentos(carpeta)
+    numero = _numero_fragmento(existentes[-1]) + 1 if existentes else 0
+    _escribir_parquet(grupo, _ruta_fragmento(carpeta, numero))
+    indice = IndiceClaves(
+        np.concatenate([indice.hashes, hashes]),
+        np.concatenate([indice.fragmentos, np.full(len(hashes), numero, dtype=np.int64)]),
+    )
+
+    if len(existentes) + 1 > MAX_FRAGMENTOS:
+        indice = _compactar(carpeta, indice)
+    _guardar_indice(carpeta, indice, clave)
+
+# ==============================================================
+# 💾 ESCRITURA
+# ==============================================================
+
+def escribir_consolidado(df: pd.DataFrame, ruta_excel, exportar_excel=True):
+    """Escribe un Parquet de archivo único y, opcionalmente, el .xlsx (reescritura completa)."""
+    ruta_excel = Path(ruta_excel)
+    _escribir_parquet(df, ruta_parquet(ruta_excel))
+    if exportar_excel:
+        df.to_excel(ruta_excel, index=False)
+
+
+# Nombres de los consolidados del dashboard anterior (AÑO/MES/REGION) → los del ETL
+NOMBRES_LEGADO = {"AÑO": "Año", "MES": "Mes", "REGION": "Región", "REGIÓN": "Región", "ARCHIVO": "Archivo"}
+
+
+def migrar_legado(ruta_excel, clave=CLAVE_FICHA):
+    """
+    Reparte un consolidado previo (Parquet único o .xlsx) en particiones la primera vez,
+    conservando todas sus filas. Las que no traen Archivo (consolidados del dashboard
+    anterior) reciben una clave sintética LEGADO_<n>. Sin año/mes/región no se puede
+    particionar: lanza ValueError sin tocar el consolidado previo. Si la tabla SQLite
+    ya existía (creada por el dashboard desde el consolidado previo), se rehace desde
+    el dataset para que ambos tengan las mismas fichas y claves.
+    """
+    dataset = ruta_dataset(ruta_excel)
+    if dataset.is_dir():
+        return
+    df_prev = leer_consolidado(ruta_excel)
+    if df_prev is None or df_prev.empty:
+        return
+    df_prev = df_prev.rename(columns={k: v for k, v in NOMBRES_LEGADO.items() if v not in df_prev.columns})
+    columnas = [c for _, c in PARTICIONES]
+    faltantes = [c for c in dict.fromkeys([*columnas, *clave]) if c != "Archivo" and c not in df_prev.columns]
+    if faltantes:
+        raise ValueError(
+            f"{Path(ruta_excel).name} no tiene {', '.join(faltantes)}: no se puede particionar. "
+            "Agrega esas columnas o mueve el archivo fuera de data/processed para reconstruirlo desde data/raw."
+        )
+    if "Archivo" in clave:
+        sinteticas = pd.Series([f"LEGADO_{n}" for n in range(1, len(df_prev) + 1)], index=df_prev.index)
+        archivo = df_prev["Archivo"] if "Archivo" in df_prev.columns else pd.Series(pd.NA, index=df_prev.index)
+        df_prev["Archivo"] = archivo.astype("object").where(archivo.notna(), sinteticas)
+    for col in dict.fromkeys([*clave, *columnas]):
+        df_prev[col] = df_prev[col].astype(str).str.strip().str.upper()
+    for valores, grupo in df_prev.groupby(columnas, sort=True):
+        _escribir_parquet(tipar_para_parquet(grupo), _dir_particion(dataset, valores) / ARCHIVO_PARTE)
+    if ruta_parquet(ruta_excel).exists():
+        ruta_parquet(ruta_excel).unlink()
+    if sqlite_configurado() and existe_tabla(tabla_de(ruta_excel)):
+        _reconstruir_sql(ruta_excel, clave)
+
+
+def anexar_consolidado(df_nuevo, ruta_excel, clave=CLAVE_FICHA, subset_duplicados=None, exportar_excel=None):
+    """
+    Integra df_nuevo al dataset en las particiones año/mes/región que toca,
+    consultando el índice de claves de cada una: las filas previas de un mismo
+    archivo (clave) se reemplazan y las fichas nuevas se agregan sin releer el
+    historial. Los duplicados (subset_duplicados) se eliminan dentro del lote.
+    Devuelve el total de filas del dataset.
+    """
+    dataset = ruta_dataset(ruta_excel)
+    migrar_legado(ruta_excel, clave)
+
+    df_nuevo = df_nuevo.copy()
+    for col in clave:
+        df_nuevo[col] = df_nuevo[col].astype(str).str.strip().str.upper()
+
+    columnas = [c for _, c in PARTICIONES]
+    escritos = []
+    for valores, grupo in df_nuevo.groupby(columnas, sort=True):
+        grupo = aplicar_esquema(tipar_para_parquet(grupo.drop_duplicates(subset=subset_duplicados or clave, keep="last")))
+        _anexar_particion(_dir_particion(dataset, valores), grupo, clave)
+        escritos.append(grupo)
+
+    if escritos and sqlite_configurado():
+        _sincronizar_sql(ruta_excel, pd.concat(escritos, ignore_index=True), clave)
+
+    if exportar_excel is None:
+        exportar_excel = exportar_excel_configurado()
+    if exportar_excel:
+        exportar_xlsx(ruta_excel)
+
+    if escritos:
+        marcar_version(ruta_excel)
+    return contar_filas(ruta_excel)
+
+
+def eliminar_fichas(claves, ruta_excel, clave=CLAVE_FICHA):
+    """
+    Quita del dataset las filas de las fichas indicadas (DataFrame con las columnas
+    de la clave), consultando el índice de cada partición: solo se reescriben los
+    fragmentos que las contienen. Devuelve cuántas filas se quitaron.
+    """
+    dataset = ruta_dataset(ruta_excel)
+    if not dataset.is_dir() or claves.empty:
+        return 0
+    claves = claves[clave].copy()
+    for col in clave:
+        claves[col] = claves[col].astype(str).str.strip().str.upper()
+
+    quitadas = 0
+    columnas = [c for _, c in PARTICIONES]
+    for valores, grupo in claves.groupby(columnas, sort=True):
+        carpeta = _dir_particion(dataset, valores)
+        if not carpeta.is_dir():
+            continue
+        indice, n = _quitar_claves(carpeta, _leer_indice(carpeta, clave), hash_claves(grupo, clave), clave)
+        if n:
+            _guardar_indice(carpeta, indice, clave)
+            quitadas += n
+
+    if quitadas and sqlite_configurado():
+        if tiene_clave(tabla_de(ruta_excel), clave):
+            eliminar_fichas_sql(tabla_de(ruta_excel), claves, clave)
+        elif existe_tabla(tabla_de(ruta_excel)):
+            _reconstruir_sql(ruta_excel, clave)
+    if quitadas:
+        marcar_version(ruta_excel)
+    return quitadas
+
+
+def _sincronizar_sql(ruta_excel, escritos, clave):
+    """
+    Lleva a SQLite las fichas recién escritas. Si la tabla aún no existe o no tiene
+    la clave de ficha (creada desde un consolidado previo), la rehace con todo el dataset:
+    un upsert por clave no podría quitar esas filas.
+    """
+    tabla = tabla_de(ruta_excel)
+    if tiene_clave(tabla, clave):
+        upsert_fichas(tabla, escritos, clave)
+    else:
+        _reconstruir_sql(ruta_excel, clave)
+
+
+def _reconstruir_sql(ruta_excel, clave):
+    """Reescribe la tabla SQLite completa desde el dataset."""
+    reemplazar_tabla(tabla_de(ruta_excel), leer_consolidado(ruta_excel), clave)
+
+
+def exportar_xlsx(ruta_excel):
+    """Regenera el .xlsx de revisión a partir del dataset completo."""
+    df = leer_consolidado(ruta_excel)
+    # float32 → float64 por su texto: en el Excel se ve 61.1 y no 61.09999847
+    for col in df.select_dtypes("float32").columns:
+        df[col] = df[col].astype(str).astype(float)
+    df.to_excel(ruta_excel, index=False)
+
+# ==============================================================
+# 📥 LECTURA
+# ==============================================================
+
+def contar_filas(ruta_excel):
+    """Total de filas del dataset leyendo solo los metadatos Parquet."""
+    import pyarrow.parquet as pq
+    return sum(pq.ParquetFile(p["ruta"]).metadata.num_rows for p in listar_particiones(ruta_excel))
+
+
+def _leer_parquet(ruta, columnas=None, vacio=False):
+    """
+    Lee un Parquet proyectando solo las `columnas` que el archivo tiene. Con
+    vacio=True devuelve sus columnas y tipos sin filas (solo lee el esquema).
+    """
+    if columnas is not None or vacio:
+        import pyarrow.parquet as pq
+        esquema = pq.read_schema(ruta)
+        if columnas is not None:
+            columnas = [c for c in columnas if c in set(esquema.names)]
+        if vacio:
+            df = esquema.empty_table().to_pandas()
+            return df if columnas is None else df[columnas]
+    return pd.read_parquet(ruta, columns=columnas)
+
+
+def leer_consolidado(ruta_excel, columnas=None, filtros=None):
+    """
+    Lee el consolidado priorizando el dataset particionado, luego el Parquet
+    único y por último el .xlsx. `columnas` proyecta la lectura (las que el
+    consolidado no tiene se omiten). `filtros` ({"Mes": [...], "Año": [...],
+    "Región": [...]}) descarta particiones completas sin abrirlas.
+    Devuelve None si no existe ningún formato. Las columnas salen con el
+    esquema canónico (aplicar_esquema), también desde consolidados previos.
+    """
+    ruta_excel = Path(ruta_excel)
+    particiones = listar_particiones(ruta_excel)
+
+    if particiones:
+        seleccion = [p for p in particiones if _coincide(p, filtros)]
+        if not seleccion:
+            # Sin filas, pero con las columnas y tipos de una lectura con datos
+            return aplicar_esquema(pd.concat(
+                [_leer_parquet(p["ruta"], columnas, vacio=True) for p in particiones],
+                ignore_index=True,
+            ))
+        # concat pierde las categóricas si las categorías difieren entre fragmentos
+        return aplicar_esquema(pd.concat(
+            [_leer_parquet(p["ruta"], columnas) for p in seleccion],
+            ignore_index=True,
+        ))
+
+    if ruta_parquet(ruta_excel).exists():
+        df = _leer_parquet(ruta_parquet(ruta_excel), columnas)
+    elif ruta_excel.exists():
+        pedidas = None if columnas is None else set(columnas)
+        df = pd.read_excel(ruta_excel, usecols=None if pedidas is None else pedidas.__contains__)
+    else:
+        return None
+
+    for columna, permitidos in (filtros or {}).items():
+        if columna in df.columns and permitidos:
+            normal = {_normalizar(v) for v in permitidos}
+            df = df[df[columna].map(_normalizar).isin(normal)].copy()
+    return aplicar_esquema(df)
+
+
+def existe_consolidado(ruta_excel):
+    ruta_excel = Path(ruta_excel)
+    return bool(listar_particiones(ruta_excel)) or ruta_parquet(ruta_excel).exists() or ruta_excel.exists()
+
+# ==============================================================
+# 🏷️ VERSIÓN DE LOS DATOS
+# ==============================================================
+
+def marcar_version(ruta_excel):
+    """Renueva el token de versión del dataset (lo último que escribe el ETL)."""
+    destino = ruta_dataset(ruta_excel) / ARCHIVO_VERSION
+    if not destino.parent.is_dir():
+        return  # sin dataset (solo .xlsx/Parquet único): basta su fecha
+    tmp = destino.with_name(f"{destino.name}.tmp")
+    tmp.write_text(f"{time.time_ns()}-{os.getpid()}", encoding="utf-8")
+    os.replace(tmp, destino)
+
+
+def _firma(ruta):
+    try:
+        estado = ruta.stat()
+        return estado.st_mtime_ns, estado.st_size
+    except OSError:
+        return None
+
+
+def version_datos(ruta_excel):
+    """
+    Token que cambia cada vez que cambia el consolidado: el _version del dataset
+    más la fecha y tamaño del .xlsx y del Parquet único. Datasets escritos antes
+    del token usan la fecha más reciente de sus archivos.
+    """
+    ruta_excel = Path(ruta_excel)
+    dataset = ruta_dataset(ruta_excel)
+    try:
+        token = (dataset / ARCHIVO_VERSION).read_text(encoding="utf-8")
+    except OSError:
+        firmas = [f for f in map(_firma, dataset.rglob("*.parquet")) if f]
+        token = (len(firmas), max(firmas)) if firmas else None
+    return token, _firma(ruta_parquet(ruta_excel)), _firma(ruta_excel)
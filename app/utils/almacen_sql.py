@@ -0,0 +1,367 @@
+# ==============================================================
+# utils/almacen_sql.py
+# Copia consultable de los consolidados en SQLite:
+#   data/processed/consolidados.sqlite
+#       anexo2, anexo3_gel, anexo3_facilitador, anexo3_ctz,
+#       anexo4, anexo5  (una tabla por consolidado)
+#
+# almacen.py la mantiene al día al escribir el dataset Parquet:
+# las filas de cada ficha (Archivo/Región/Mes/Año) se reemplazan
+# en bloque. Las tablas usan el esquema del dashboard (el de los
+# consolidados históricos) venga el dato del ETL o de una migración:
+# mayúsculas con "_" ("Unidad Territorial" → UNIDAD_TERRITORIAL),
+# los alias de ALIAS_COLUMNAS ("Puntaje (%)" → PORCENTAJE, "Región"
+# → REGION) y los porcentajes como fracción 0–1 (esquema_sql).
+# Índices en UNIDAD_TERRITORIAL, MES, SUPERVISOR y la clave de
+# ficha. utils/consultas.py filtra y agrega dentro del motor para
+# las páginas del dashboard.
+#
+# Junto a cada tabla se mantienen tres agregados al grano
+# UNIDAD_TERRITORIAL × MES × SUPERVISOR (solo se recalculan los
+# grupos que toca cada escritura):
+#   anexo2__medidas     N, SUMA__<col> y N__<col> de cada columna numérica
+#   anexo2__items       histograma: VALOR y N__ITEM_<n> (fichas con ese valor)
+#   anexo2__categorias  conteos de EVALUACIÓN*: COLUMNA, VALOR, N
+# Cualquier combinación de filtros sobre el grano se obtiene sumando
+# filas de estos agregados, sin recorrer las fichas.
+#
+# Para reconstruir todas las tablas desde los datasets Parquet:
+#   python app/utils/almacen_sql.py
+# ==============================================================
+
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+# ==============================================================
+# ⚙️ CONFIGURACIÓN
+# ==============================================================
+BASE_DIR = Path(__file__).resolve().parents[2]
+RUTA_BASE = BASE_DIR / "data" / "processed" / "consolidados.sqlite"
+COLUMNAS_INDICE = ["UNIDAD_TERRITORIAL", "MES", "SUPERVISOR"]   # también el grano de los agregados
+ESPERA_BLOQUEO = 120    # segundos que una conexión espera a que otro proceso suelte la base
+_ESCRITURA = threading.RLock()   # anexos en hilos (en_proceso): una transacción de escritura a la vez
+PATRON_ITEM = re.compile(r"^ITEM_\d+$")
+PATRON_CATEGORIA = re.compile(r"^EVALUACI[OÓ]N")
+
+# Nombres del ETL que en el dashboard (y en los consolidados históricos) se llaman distinto
+ALIAS_COLUMNAS = {
+    "REGIÓN": "REGION",
+    "PUNTAJE": "PORCENTAJE",
+    "EVALUACIÓN": "EVALUACION",
+    "ÍTEMS_VÁLIDOS": "ITEMS_VALIDO",
+    "ÍTEMS_NA": "ITEMS_NA",
+}
+
+
+def nombre_columna(columna):
+    """"Unidad Territorial" → UNIDAD_TERRITORIAL, "Puntaje (%)" → PORCENTAJE, "Región" → REGION."""
+    texto = re.sub(r"\s+", "_", str(columna).replace("(%)", "").strip().upper())
+    return ALIAS_COLUMNAS.get(texto, texto)
+
+
+def tabla_de(ruta_excel):
+    """anexo3_gel_consolidado.xlsx → anexo3_gel."""
+    return Path(ruta_excel).stem.removesuffix("_consolidado")
+
+
+def _id(nombre):
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def conectar(solo_lectura=False):
+    """Conexión a la base; en modo WAL el dashboard lee mientras el ETL escribe."""
+    if solo_lectura:
+        return sqlite3.connect(
+            f"{RUTA_BASE.as_uri()}?mode=ro", uri=True, check_same_thread=False, timeout=ESPERA_BLOQUEO
+        )
+    RUTA_BASE.parent.mkdir(parents=True, exist_ok=True)
+    nueva = not RUTA_BASE.exists()
+    con = sqlite3.connect(RUTA_BASE, timeout=ESPERA_BLOQUEO)
+    if nueva:
+        con.execute("PRAGMA journal_mode=WAL")   # queda guardado en el archivo
+    return con
+
+
+@contextmanager
+def escritura():
+    """Conexión dentro de una transacción, una a la vez entre los hilos de este proceso."""
+    with _ESCRITURA, closing(conectar()) as con, con:
+        yield con
+
+
+def columnas_tabla(con, tabla):
+    """{columna: tipo declarado} de la tabla ({} si no existe)."""
+    return {fila[1]: fila[2] for fila in con.execute(f"PRAGMA table_info({_id(tabla)})")}
+
+# ==============================================================
+# ✏️ ESCRITURA
+# ==============================================================
+def _tipo_sql(serie):
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(serie):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def esquema_sql(df):
+    """
+    df con el esquema de las tablas: nombres de nombre_columna, columnas "(%)" (0–100)
+    como fracción 0–1 igual que PORCENTAJE, y float32 → float64 por su texto (61.1 y
+    no 61.09999847 en REAL). Columnas que dan el mismo nombre ("Unidad Territorial"
+    del ETL y UNIDAD_TERRITORIAL de un consolidado previo) se unen en una.
+    """
+    df = df.copy(deep=False)
+    for columna in df.select_dtypes("float32").columns:
+        df[columna] = df[columna].astype(str).astype(float)
+    for columna in [c for c in df.columns if "(%)" in str(c)]:
+        df[columna] = (df[columna] / 100).round(6)
+    nombres = [nombre_columna(c) for c in df.columns]
+    if len(set(nombres)) == len(nombres):
+        return df.set_axis(nombres, axis=1)
+    unidas = {}
+    for (_, serie), nombre in zip(df.items(), nombres):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(object)
+        unidas[nombre] = unidas[nombre].combine_first(serie) if nombre in unidas else serie
+    return pd.DataFrame(unidas, index=df.index)
+
+
+def _crear_indices(con, tabla, columnas, clave):
+    for columna in COLUMNAS_INDICE:
+        if columna in columnas:
+            con.execute(f"CREATE INDEX IF NOT EXISTS {_id(f'ix_{tabla}_{columna}')} ON {_id(tabla)} ({_id(columna)})")
+    con.execute(
+        f"CREATE INDEX IF NOT EXISTS {_id(f'ix_{tabla}_clave')} ON {_id(tabla)} ({', '.join(map(_id, clave))})"
+    )
+
+
+def _borrar_claves(con, tabla, claves, grano=None):
+    """
+    DELETE de las filas cuya clave de ficha está en `claves` (DataFrame con columnas
+    SQL). Con `grano`, antes de borrar anota en temp._grano los grupos afectados.
+    """
+    columnas = ", ".join(map(_id, claves.columns))
+    con.execute(f"CREATE TEMP TABLE _claves ({columnas})")
+    try:
+        con.executemany(
+            f"INSERT INTO temp._claves VALUES ({', '.join('?' * len(claves.columns))})",
+            claves.astype(object).itertuples(index=False, name=None),
+        )
+        if grano:
+            g = ", ".join(map(_id, grano))
+            con.execute(
+                f"INSERT INTO temp._grano SELECT DISTINCT {g} FROM {_id(tabla)} "
+                f"WHERE ({columnas}) IN (SELECT {columnas} FROM temp._claves)"
+            )
+        borradas = con.execute(
+            f"DELETE FROM {_id(tabla)} WHERE ({columnas}) IN (SELECT {columnas} FROM temp._claves)"
+        ).rowcount
+    finally:
+        con.execute("DROP TABLE temp._claves")
+    return borradas
+
+
+def existe_tabla(tabla):
+    if not RUTA_BASE.exists():
+        return False
+    with closing(conectar()) as con:
+        return bool(columnas_tabla(con, tabla))
+
+
+def tiene_clave(tabla, clave):
+    """True si la tabla existe y tiene todas las columnas de la clave de ficha."""
+    if not RUTA_BASE.exists():
+        return False
+    with closing(conectar()) as con:
+        existentes = columnas_tabla(con, tabla)
+    return bool(existentes) and all(nombre_columna(c) in existentes for c in clave)
+
+
+def reemplazar_tabla(tabla, df, clave):
+    """Reescribe la tabla completa con df (primera vez o reconstrucción)."""
+    df = esquema_sql(df)
+    clave = [nombre_columna(c) for c in clave]
+    with escritura() as con:
+        con.execute(f"DROP TABLE IF EXISTS {_id(tabla)}")
+        df.to_sql(tabla, con, index=False)
+        _crear_indices(con, tabla, df.columns, clave)
+        crear_agregados(con, tabla, clave)
+
+
+def upsert_fichas(tabla, df, clave):
+    """Reemplaza en la tabla las filas de las fichas presentes en df por las de df."""
+    df = esquema_sql(df)
+    clave = [nombre_columna(c) for c in clave]
+    with escritura() as con:
+        existentes = columnas_tabla(con, tabla)
+        nuevas = [c for c in df.columns if c not in existentes]
+        for columna in nuevas:
+            con.execute(f"ALTER TABLE {_id(tabla)} ADD COLUMN {_id(columna)} {_tipo_sql(df[columna])}")
+        # Columnas nuevas cambian la forma de los agregados: se recalculan completos
+        grano = None if nuevas else _grano_agregados(con, tabla)
+        if grano:
+            _crear_grano(con, grano, df.reindex(columns=grano).drop_duplicates())
+        _borrar_claves(con, tabla, df[clave].drop_duplicates(), grano)
+        df.to_sql(tabla, con, index=False, if_exists="append")
+        if grano:
+            _actualizar_agregados(con, tabla, clave, grano)
+        else:
+            crear_agregados(con, tabla, clave)
+
+
+def eliminar_fichas_sql(tabla, claves, clave):
+    """Quita de la tabla las fichas de `claves` (DataFrame con las columnas de la clave)."""
+    if not existe_tabla(tabla):
+        return 0
+    claves = claves[clave].rename(columns=nombre_columna)
+    clave = list(claves.columns)
+    with escritura() as con:
+        grano = _grano_agregados(con, tabla)
+        if grano:
+            _crear_grano(con, grano)
+        borradas = _borrar_claves(con, tabla, claves, grano)
+        if grano:
+            _actualizar_agregados(con, tabla, clave, grano)
+        else:
+            crear_agregados(con, tabla, clave)
+        return borradas
+
+# ==============================================================
+# 📊 AGREGADOS MATERIALIZADOS (UT × MES × SUPERVISOR)
+# ==============================================================
+
+def tablas_agregados(tabla):
+    """Nombres de (medidas, items, categorias) de una tabla."""
+    return f"{tabla}__medidas", f"{tabla}__items", f"{tabla}__categorias"
+
+
+def columnas_agregadas(tipos, clave):
+    """(grano, numéricas, ítems, categorías) que se agregan de una tabla con columnas `tipos`."""
+    grano = [c for c in COLUMNAS_INDICE if c in tipos]
+    items = [c for c in tipos if PATRON_ITEM.match(c)]
+    numericas = [
+        c for c, tipo in tipos.items()
+        if tipo in ("INTEGER", "REAL") and c not in grano and c not in clave and c not in items
+    ]
+    categorias = [c for c in tipos if PATRON_CATEGORIA.match(c) and c not in numericas]
+    return grano, numericas, items, categorias
+
+
+def _grano_agregados(con, tabla):
+    """Grano de los agregados existentes; None si aún no se han creado."""
+    medidas = tablas_agregados(tabla)[0]
+    if not columnas_tabla(con, medidas):
+        return None
+    return [c for c in COLUMNAS_INDICE if c in columnas_tabla(con, tabla)] or None
+
+
+def _crear_grano(con, grano, valores=None):
+    con.execute(f"CREATE TEMP TABLE _grano ({', '.join(map(_id, grano))})")
+    if valores is not None:
+        con.executemany(
+            f"INSERT INTO temp._grano VALUES ({', '.join('?' * len(grano))})",
+            valores.astype(object).where(valores.notna(), None).itertuples(index=False, name=None),
+        )
+
+
+def _insertar_agregados(con, tabla, clave, origen=None):
+    """Agrega `origen` (por defecto la tabla completa) al grano e inserta el resultado."""
+    medidas, items_t, categorias_t = tablas_agregados(tabla)
+    grano, numericas, items, categorias = columnas_agregadas(columnas_tabla(con, tabla), clave)
+    origen = _id(tabla) if origen is None else origen
+    g = ", ".join(map(_id, grano))
+    sumas = "".join(f", SUM({_id(c)}), COUNT({_id(c)})" for c in numericas)
+
+    con.execute(f"INSERT INTO {_id(medidas)} SELECT {g}, COUNT(*){sumas} FROM {origen} GROUP BY {g}")
+    if items:
+        # Valores que aparecen en los ítems (0/1/2) y una sola pasada agrupada que cuenta todos
+        # los pares ítem × valor; luego una fila por valor desde ese resultado pequeño
+        valores = [v for (v,) in con.execute(
+            " UNION ".join(f"SELECT {_id(c)} FROM {origen} WHERE {_id(c)} IS NOT NULL" for c in items)
+        )]
+        conteos = ", ".join(
+            f"SUM({_id(c)} IS ?) AS {_id(f'{k}__{c}')}" for k in range(len(valores)) for c in items
+        )
+        con.execute(f"CREATE TEMP TABLE _conteos AS SELECT {g}, {conteos} FROM {origen} GROUP BY {g}",
+                    [v for v in valores for _ in items])
+        try:
+            for k, valor in enumerate(valores):
+                columnas = [_id(f"{k}__{c}") for c in items]
+                con.execute(f"INSERT INTO {_id(items_t)} SELECT {g}, ?, {', '.join(columnas)} FROM temp._conteos "
+                            f"WHERE {' + '.join(columnas)} > 0", (valor,))
+        finally:
+            con.execute("DROP TABLE temp._conteos")
+    for columna in categorias:
+        con.execute(f"INSERT INTO {_id(categorias_t)} SELECT {g}, ?, {_id(columna)}, COUNT(*) FROM {origen} "
+                    f"GROUP BY {g}, {_id(columna)}", (columna,))
+
+
+def crear_agregados(con, tabla, clave):
+    """(Re)crea los tres agregados de la tabla completos."""
+    for nombre in tablas_agregados(tabla):
+        con.execute(f"DROP TABLE IF EXISTS {_id(nombre)}")
+    grano, numericas, items, _ = columnas_agregadas(columnas_tabla(con, tabla), clave)
+    if not grano:
+        return
+    medidas, items_t, categorias_t = tablas_agregados(tabla)
+    g = ", ".join(map(_id, grano))
+    sumas = "".join(f", {_id('SUMA__' + c)} REAL, {_id('N__' + c)} INTEGER" for c in numericas)
+    conteos = "".join(f", {_id('N__' + c)} INTEGER" for c in items)
+    con.execute(f"CREATE TABLE {_id(medidas)} ({g}, N INTEGER{sumas})")
+    con.execute(f"CREATE TABLE {_id(items_t)} ({g}, VALOR{conteos})")
+    con.execute(f"CREATE TABLE {_id(categorias_t)} ({g}, COLUMNA TEXT, VALOR, N INTEGER)")
+    for nombre in tablas_agregados(tabla):
+        con.execute(f"CREATE INDEX {_id(f'ix_{nombre}_grano')} ON {_id(nombre)} ({g})")
+    _insertar_agregados(con, tabla, clave)
+
+
+def _actualizar_agregados(con, tabla, clave, grano):
+    """Recalcula solo los grupos anotados en temp._grano (los que tocó la escritura)."""
+    # CROSS JOIN fija temp._grano como bucle externo: cada grupo se busca por índice
+    filas_de = "SELECT t.rowid FROM temp._grano d CROSS JOIN {} t ON " + " AND ".join(
+        f"t.{_id(c)} IS d.{_id(c)}" for c in grano)
+    try:
+        afectados = con.execute("SELECT COUNT(*) FROM (SELECT DISTINCT * FROM temp._grano)").fetchone()[0]
+        grupos = con.execute(f"SELECT COUNT(*) FROM {_id(tablas_agregados(tabla)[0])}").fetchone()[0]
+        if afectados * 4 > grupos:
+            # Si la escritura toca buena parte de los grupos, recalcular todo es más rápido
+            crear_agregados(con, tabla, clave)
+            return
+        for nombre in tablas_agregados(tabla):
+            con.execute(f"DELETE FROM {_id(nombre)} WHERE rowid IN ({filas_de.format(_id(nombre))})")
+        # Las fichas de esos grupos se copian una vez y se agregan desde la copia
+        con.execute(f"CREATE TEMP TABLE _afectadas AS SELECT * FROM {_id(tabla)} "
+                    f"WHERE rowid IN ({filas_de.format(_id(tabla))})")
+        _insertar_agregados(con, tabla, clave, origen="temp._afectadas")
+    finally:
+        con.execute("DROP TABLE IF EXISTS temp._afectadas")
+        con.execute("DROP TABLE temp._grano")
+
+# ==============================================================
+# 🚀 CLI: RECONSTRUIR DESDE LOS DATASETS PARQUET
+# ==============================================================
+if __name__ == "__main__":
+    sys.path.insert(0, str(BASE_DIR / "app"))
+    from utils.almacen import CLAVE_FICHA, leer_consolidado, marcar_version
+
+    carpeta = BASE_DIR / "data" / "processed"
+    # Dataset particionado, Parquet único o .xlsx: todos comparten el nombre base
+    # (sin los archivos de bloqueo de Excel "~$anexo2_consolidado.xlsx")
+    rutas = [p for patron in ("*_consolidado", "*_consolidado.parquet", "*_consolidado.xlsx")
+             for p in carpeta.glob(patron) if not p.name.startswith("~$")]
+    for ruta_excel in sorted({carpeta / f"{p.name.split('.')[0]}.xlsx" for p in rutas}):
+        df = leer_consolidado(ruta_excel)
+        if df is None:
+            continue
+        reemplazar_tabla(tabla_de(ruta_excel), df, CLAVE_FICHA)
+        marcar_version(ruta_excel)
+        print(f"✅ {tabla_de(ruta_excel)}: {len(df):,} filas")
@@ -0,0 +1,214 @@
+# ==============================================================
+# utils/consultas.py
+# Consultas de las páginas sobre data/processed/consolidados.sqlite
+#
+# Los filtros de la barra (UT, mes, supervisor) se traducen a un
+# WHERE ... IN (...) que usa los índices de la tabla, y los
+# promedios/modas por grupo se calculan con GROUP BY dentro de
+# SQLite: a pandas solo llegan las filas o los grupos pedidos.
+#
+# Conteos, promedios, modas e histogramas de ítems se suman desde
+# los agregados UT × MES × SUPERVISOR que mantiene el ETL
+# (almacen_sql.tablas_agregados); si una tabla aún no los tiene,
+# o se filtra por otra columna, se calculan sobre las fichas.
+#
+#   filtros = {"UNIDAD_TERRITORIAL": ut_sel, "MES": mes_sel, "SUPERVISOR": sup_sel}
+#   df = filtrar("anexo2", filtros)
+#   ranking = promedios_por("anexo2", "UNIDAD_TERRITORIAL", ["PORCENTAJE"], filtros)
+# ==============================================================
+
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from utils.almacen import aplicar_esquema
+from utils import almacen_sql
+from utils.almacen_sql import COLUMNAS_INDICE, PATRON_CATEGORIA, PATRON_ITEM, _id, columnas_tabla, conectar, tablas_agregados
+
+# ==============================================================
+# 🔧 AUXILIARES
+# ==============================================================
+def _where(filtros):
+    """(cláusula WHERE, parámetros) de {columna: valores}; listas vacías no filtran."""
+    condiciones, parametros = [], []
+    for columna, valores in (filtros or {}).items():
+        if valores is None or len(valores) == 0:
+            continue
+        valores = list(valores)
+        condiciones.append(f"{_id(columna)} IN ({', '.join('?' * len(valores))})")
+        parametros += valores
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+
+def _consultar(sql, parametros=(), fechas=()):
+    """DataFrame del resultado; None si la base aún no existe."""
+    if not almacen_sql.RUTA_BASE.exists():
+        return None
+    with closing(conectar(solo_lectura=True)) as con:
+        return pd.read_sql_query(sql, con, params=list(parametros), parse_dates=list(fechas) or None)
+
+
+def _agregados(tabla, filtros):
+    """(medidas, items, categorias) si la tabla tiene agregados y los filtros son del grano; si no None."""
+    activos = [c for c, v in (filtros or {}).items() if v is not None and len(v)]
+    medidas = tablas_agregados(tabla)[0]
+    if any(c not in COLUMNAS_INDICE for c in activos) or not columnas(medidas):
+        return None
+    return tablas_agregados(tabla)
+
+
+def columnas(tabla):
+    """{columna: tipo declarado} de la tabla ({} si la base o la tabla no existen)."""
+    if not almacen_sql.RUTA_BASE.exists():
+        return {}
+    try:
+        with closing(conectar(solo_lectura=True)) as con:
+            return columnas_tabla(con, tabla)
+    except sqlite3.Error:
+        return {}
+
+# ==============================================================
+# 🔎 CONSULTAS
+# ==============================================================
+def opciones(tabla, columna, filtros=None):
+    """Valores distintos (ordenados, sin vacíos) de una columna, para los multiselect."""
+    where, parametros = _where(filtros)
+    where += (" AND " if where else " WHERE ") + f"{_id(columna)} IS NOT NULL"
+    df = _consultar(f"SELECT DISTINCT {_id(columna)} FROM {_id(tabla)}{where} ORDER BY 1", parametros)
+    return [] if df is None else df.iloc[:, 0].tolist()
+
+
+def filtrar(tabla, filtros=None, seleccion=None):
+    """
+    Filas de la tabla que cumplen los filtros (solo las columnas de `seleccion` si se
+    indica). El índice es el rowid: una fila conserva su índice con cualquier filtro.
+    """
+    tipos = columnas(tabla)
+    if not tipos:
+        return None
+    seleccion = [c for c in (seleccion or tipos) if c in tipos]
+    where, parametros = _where(filtros)
+    fechas = [c for c in seleccion if tipos[c] in ("TIMESTAMP", "DATE")]
+    df = _consultar(
+        f"SELECT rowid AS _fila, {', '.join(map(_id, seleccion))} FROM {_id(tabla)}{where}", parametros, fechas
+    )
+    return aplicar_esquema(df.set_index("_fila").rename_axis(None))
+
+
+def contar(tabla, filtros=None):
+    where, parametros = _where(filtros)
+    agregados = _agregados(tabla, filtros)
+    if agregados:
+        df = _consultar(f"SELECT COALESCE(SUM(N), 0) FROM {_id(agregados[0])}{where}", parametros)
+    else:
+        df = _consultar(f"SELECT COUNT(*) FROM {_id(tabla)}{where}", parametros)
+    return 0 if df is None else int(df.iloc[0, 0])
+
+
+def promedios_por(tabla, grupo, columnas_promedio, filtros=None):
+    """
+    AVG de cada columna por grupo (una fila por valor del grupo); sin grupo, una
+    sola fila con el promedio de la selección. Desde los agregados: SUMA/N de las
+    medidas y Σ valor·n / Σ n del histograma de cada ítem.
+    """
+    where, parametros = _where(filtros)
+    agregados = _agregados(tabla, filtros)
+    medidas_t, items_t, _ = agregados or (None, None, None)
+    disponibles = {**columnas(medidas_t), **columnas(items_t)} if agregados else {}
+    items = [c for c in columnas_promedio if PATRON_ITEM.match(c)]
+    medidas = [c for c in columnas_promedio if c not in items]
+    if (not agregados or any(f"SUMA__{c}" not in disponibles for c in medidas)
+            or any(f"N__{c}" not in disponibles for c in items)):
+        promedios = ", ".join(f"AVG({_id(c)}) AS {_id(c)}" for c in columnas_promedio)
+        df = _consultar(_por_grupo(f"SELECT {{g}}{promedios} FROM {_id(tabla)}{where}", grupo), parametros)
+        return _como_float(df, columnas_promedio)
+
+    promedios = "".join(
+        f", 1.0 * SUM({_id('SUMA__' + c)}) / NULLIF(SUM({_id('N__' + c)}), 0) AS {_id(c)}" for c in medidas
+    )
+    df = _consultar(_por_grupo(f"SELECT {{g}}COUNT(*) AS _n{promedios} FROM {_id(medidas_t)}{where}", grupo), parametros)
+    if items and df is not None:
+        promedios = ", ".join(
+            f"1.0 * SUM(VALOR * {_id('N__' + c)}) / NULLIF(SUM({_id('N__' + c)}), 0) AS {_id(c)}" for c in items
+        )
+        de_items = _consultar(_por_grupo(f"SELECT {{g}}{promedios} FROM {_id(items_t)}{where}", grupo), parametros)
+        if grupo:
+            df = df.merge(de_items, on=grupo, how="left")
+        else:
+            df = pd.concat([df, de_items], axis=1)
+    if df is not None:
+        df = df[([grupo] if grupo else []) + list(columnas_promedio)]
+    return _como_float(df, columnas_promedio)
+
+
+def _como_float(df, columnas_promedio):
+    """Promedios como float (NaN si no hay valores), sin columnas object de None."""
+    if df is None:
+        return None
+    return df.astype({c: float for c in columnas_promedio})
+
+
+def _por_grupo(sql, grupo, *otras):
+    """Completa {g} del SELECT y agrega GROUP BY/ORDER BY por el grupo (y otras columnas)."""
+    claves = ([_id(grupo)] if grupo else []) + list(otras)
+    sql = sql.format(g="".join(f"{c}, " for c in claves))
+    if claves:
+        sql += f" GROUP BY {', '.join(claves)} ORDER BY 1"
+    return sql
+
+
+def moda_por(tabla, grupo, columna, filtros=None, sin_dato="Sin dato"):
+    """
+    Valor más frecuente de `columna` por grupo (como x.mode()[0]: ante empate, el menor).
+    Los grupos sin ningún valor informado reciben `sin_dato`.
+    """
+    where, parametros = _where(filtros)
+    agregados = _agregados(tabla, filtros)
+    if agregados and PATRON_CATEGORIA.match(columna):
+        where += (" AND " if where else " WHERE ") + "COLUMNA = ?"
+        df = _consultar(
+            f"SELECT {_id(grupo)} AS grupo, VALOR AS valor, SUM(N) AS n FROM {_id(agregados[2])}{where} GROUP BY 1, 2",
+            parametros + [columna],
+        )
+    else:
+        df = _consultar(
+            f"SELECT {_id(grupo)} AS grupo, {_id(columna)} AS valor, COUNT(*) AS n "
+            f"FROM {_id(tabla)}{where} GROUP BY 1, 2",
+            parametros,
+        )
+    if df is None:
+        return None
+    informados = df[df["valor"].notna()].sort_values(["grupo", "n", "valor"], ascending=[True, False, True])
+    moda = informados.drop_duplicates("grupo").set_index("grupo")["valor"]
+    grupos = df["grupo"].drop_duplicates().sort_values()
+    return moda.reindex(grupos).fillna(sin_dato).rename(columna).rename_axis(grupo)
+
+
+def histograma_items(tabla, filtros=None):
+    """Conteo de cada valor por ítem (filas ITEM_n, columnas valor; sin NA), p. ej. h.loc["ITEM_3", 0]."""
+    where, parametros = _where(filtros)
+    agregados = _agregados(tabla, filtros)
+    if agregados:
+        conteos = [c for c in columnas(agregados[1]) if c.startswith("N__")]
+        if not conteos:
+            return pd.DataFrame()
+        sumas = ", ".join(f"SUM({_id(c)}) AS {_id(c[3:])}" for c in conteos)
+        ancho = _consultar(f"SELECT VALOR, {sumas} FROM {_id(agregados[1])}{where} GROUP BY 1", parametros)
+        df = None if ancho is None else ancho.melt(id_vars="VALOR", var_name="ITEM", value_name="N")
+    else:
+        items = [c for c in columnas(tabla) if PATRON_ITEM.match(c)]
+        if not items:
+            return pd.DataFrame()
+        partes = " UNION ALL ".join(
+            f"SELECT ? AS ITEM, {_id(c)} AS VALOR, COUNT(*) AS N FROM {_id(tabla)}{where}"
+            f"{' AND ' if where else ' WHERE '}{_id(c)} IS NOT NULL GROUP BY 2"
+            for c in items
+        )
+        df = _consultar(partes, [p for c in items for p in [c, *parametros]])
+    if df is None or df.empty:
+        return pd.DataFrame()
+    histograma = df.pivot_table(index="ITEM", columns="VALOR", values="N", aggfunc="sum", fill_value=0)
+    histograma = histograma[histograma.sum(axis=1) > 0]   # ítems sin ningún valor en la selección
+    orden = sorted(histograma.index, key=lambda c: int(c.split("_")[1]))
+    return histograma.reindex(orden).rename_axis(index=None, columns=None).astype(int)
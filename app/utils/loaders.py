@@ -7,6 +7,11 @@ import pandas as pd
 import streamlit as st
 import yaml
 
+from utils import consultas
+from utils.almacen import CLAVE_FICHA, leer_consolidado, existe_consolidado, ruta_parquet, version_datos
+from utils.almacen_sql import existe_tabla, reemplazar_tabla
+from utils.vistas import vista
+
 # ==============================================================
 # ⚙️ CONFIGURACIÓN GENERAL
 # ==============================================================
@@ -31,44 +36,127 @@ def leer_configuracion():
         st.error(f"❌ Error al leer settings_general.yaml: {e}")
         return {}
 
-def ttl_cache():
-    """Convierte minutos a segundos según la configuración YAML."""
+def max_entradas_cache():
+    """Resultados guardados por función cacheada, según la configuración YAML."""
     config = leer_configuracion()
     try:
-        minutos = config.get("cache", {}).get("ttl_minutos", 60)
-        return int(minutos) * 60
+        return int(config.get("cache", {}).get("max_entradas", 64))
     except Exception:
-        return 3600  # valor por defecto
+        return 64  # valor por defecto
 
 # ==============================================================
-# 🧩 CARGA DE ARCHIVOS EXCEL
+# 🧩 CARGA DE CONSOLIDADOS (Parquet si existe, Excel como respaldo)
 # ==============================================================
+# Las funciones cacheadas reciben la versión de los datos (version_datos:
+# token que el ETL renueva al escribir) como argumento: con datos nuevos la
+# clave cambia y se leen en el siguiente rerun; sin cambios nunca se releen.
+# Los frames se guardan una vez por proceso (st.cache_resource, sin copia por
+# sesión) y se entregan como vistas (utils/vistas.py), nunca el original:
+# sin filtros no se copian datos; con filtros se copian solo las filas elegidas.
+
+MAX_FRAMES_COMPARTIDOS = 16   # frames completos en memoria (anexo/tabla × columnas)
+
+ARCHIVOS = {
+    "a2": DATA_DIR / "anexo2_consolidado.xlsx",
+    "a3": DATA_DIR / "anexo3_consolidado.xlsx",
+    "a4": DATA_DIR / "anexo4_consolidado.xlsx",
+    "a5": DATA_DIR / "anexo5_consolidado.xlsx",
+}
+
+def cargar_anexo(clave, columnas=None, meses=None):
+    """
+    Carga un solo anexo ("a2".."a5") bajo demanda. Con `columnas` solo se leen
+    esas columnas (proyección en el Parquet) y con `meses` solo las particiones
+    de esos meses. main.py y las páginas comparten esta caché.
+    """
+    columnas = tuple(columnas) if columnas else None
+    meses = tuple(meses) if meses else None
+    return vista(_cargar_anexo(clave, columnas, meses, version_datos(ARCHIVOS[clave])))
+
+@st.cache_resource(max_entries=MAX_FRAMES_COMPARTIDOS, show_spinner="Cargando datos procesados...")
+def _cargar_anexo(clave, columnas, meses, version):
+    ruta = ARCHIVOS[clave]
+    if not existe_consolidado(ruta):
+        st.warning(f"⚠️ No se encontró el archivo: {ruta.name}")
+        return None
+    filtros = {"Mes": list(meses)} if meses else None
+    try:
+        return leer_consolidado(ruta, columnas=list(columnas) if columnas else None, filtros=filtros)
+    except Exception as e:
+        st.error(f"❌ Error al cargar {ruta.name}: {e}")
+        return None
 
-@st.cache_data(ttl=ttl_cache(), show_spinner="Cargando datos procesados...")
 def cargar_datos():
-    """Carga los 4 anexos desde /data/processed."""
-    archivos = {
-        "a2": DATA_DIR / "anexo2_consolidado.xlsx",
-        "a3": DATA_DIR / "anexo3_consolidado.xlsx",
-        "a4": DATA_DIR / "anexo4_consolidado.xlsx",
-        "a5": DATA_DIR / "anexo5_consolidado.xlsx",
-    }
-
-    data = {}
-
-    for clave, ruta in archivos.items():
-        if not ruta.exists():
-            st.warning(f"⚠️ No se encontró el archivo: {ruta.name}")
-            data[clave] = None
-            continue
-
-        try:
-            data[clave] = pd.read_excel(ruta)
-        except Exception as e:
-            st.error(f"❌ Error al cargar {ruta.name}: {e}")
-            data[clave] = None
-
-    return data
+    """Los 4 anexos completos (compatibilidad); mejor cargar_anexo con lo que usa la página."""
+    return {clave: cargar_anexo(clave) for clave in ARCHIVOS}
+
+# ==============================================================
+# 🔎 CONSULTAS A SQLITE (utils/consultas.py) CACHEADAS POR VERSIÓN
+# ==============================================================
+
+def version_tabla(tabla):
+    """
+    Versión del consolidado que respalda una tabla de consolidados.sqlite. Si la
+    tabla aún no existe (consolidados anteriores al almacén SQLite, o el ETL no
+    ha corrido), se crea antes desde el consolidado Parquet/xlsx.
+    """
+    version = version_datos(DATA_DIR / f"{tabla}_consolidado.xlsx")
+    _asegurar_tabla(tabla, version)
+    return version
+
+@st.cache_resource(show_spinner="Preparando consolidado para consultas...")
+def _asegurar_tabla(tabla, version):
+    ruta = DATA_DIR / f"{tabla}_consolidado.xlsx"
+    if existe_tabla(tabla) or not existe_consolidado(ruta):
+        return False
+    try:
+        df = leer_consolidado(ruta)
+        if df is not None:
+            reemplazar_tabla(tabla, df, CLAVE_FICHA)
+        return True
+    except Exception as e:
+        st.error(f"❌ Error al preparar {ruta.name} para consultas: {e}")
+        return False
+
+@st.cache_data(max_entries=max_entradas_cache(), show_spinner=False)
+def _consulta(funcion, tabla, version, *args):
+    return getattr(consultas, funcion)(tabla, *args)
+
+def columnas(tabla):
+    return _consulta("columnas", tabla, version_tabla(tabla))
+
+def contar(tabla, filtros=None):
+    return _consulta("contar", tabla, version_tabla(tabla), filtros)
+
+def opciones(tabla, columna, filtros=None):
+    return _consulta("opciones", tabla, version_tabla(tabla), columna, filtros)
+
+@st.cache_resource(max_entries=MAX_FRAMES_COMPARTIDOS, show_spinner="Cargando datos procesados...")
+def _tabla_compartida(tabla, seleccion, version):
+    return consultas.filtrar(tabla, seleccion=list(seleccion) if seleccion else None)
+
+def filtrar(tabla, filtros=None, seleccion=None):
+    """
+    Filas de la tabla que cumplen los filtros: la tabla (con las columnas de
+    `seleccion` y las de los filtros) se lee una vez por proceso y cada llamada
+    recibe una vista con la máscara de los filtros.
+    """
+    if seleccion:
+        seleccion = tuple(dict.fromkeys([*(filtros or {}), *seleccion]))
+    return vista(_tabla_compartida(tabla, seleccion or None, version_tabla(tabla)), filtros)
+
+def promedios_por(tabla, grupo, columnas_promedio, filtros=None):
+    return _consulta("promedios_por", tabla, version_tabla(tabla), grupo, columnas_promedio, filtros)
+
+def moda_por(tabla, grupo, columna, filtros=None):
+    return _consulta("moda_por", tabla, version_tabla(tabla), grupo, columna, filtros)
+
+def promedios(tabla, columnas_promedio, filtros=None):
+    """Una fila con el promedio de cada columna en la selección."""
+    return _consulta("promedios_por", tabla, version_tabla(tabla), None, columnas_promedio, filtros)
+
+def histograma_items(tabla, filtros=None):
+    return _consulta("histograma_items", tabla, version_tabla(tabla), filtros)
 
 # ==============================================================
 # 🧪 FUNCIÓN DE PRUEBA
@@ -83,5 +171,6 @@ def mostrar_diagnostico():
         "Anexo 4": DATA_DIR / "anexo4_consolidado.xlsx",
         "Anexo 5": DATA_DIR / "anexo5_consolidado.xlsx",
     }.items():
-        existe = "✅" if ruta.exists() else "❌"
-        st.write(f"{existe} **{clave}** — {ruta.name}")
+        existe = "✅" if existe_consolidado(ruta) else "❌"
+        formato = ruta_parquet(ruta).name if ruta_parquet(ruta).exists() else ruta.name
+        st.write(f"{existe} **{clave}** — {formato}")
@@ -36,9 +36,10 @@ def normalizar_anexo5(df: pd.DataFrame) -> pd.DataFrame:
     if "UNIDAD_TERRITORIAL" in df.columns:
         df.rename(columns={"UNIDAD_TERRITORIAL": "Unidad Territorial"}, inplace=True)
 
-    # Normaliza plazo en días
+    # Normaliza plazo en días (el ETL ya lo entrega como entero; solo se parsea el formato anterior)
     if "PLAZO_DÍAS" in df.columns:
-        df["PLAZO_DÍAS"] = pd.to_numeric(df["PLAZO_DÍAS"].astype(str).str.extract(r"(\d+)")[0], errors="coerce")
+        if not pd.api.types.is_numeric_dtype(df["PLAZO_DÍAS"]):
+            df["PLAZO_DÍAS"] = pd.to_numeric(df["PLAZO_DÍAS"].astype(str).str.extract(r"(\d+)")[0], errors="coerce")
     elif "PLAZO" in df.columns:
         df["PLAZO_DÍAS"] = pd.to_numeric(df["PLAZO"].astype(str).str.extract(r"(\d+)")[0], errors="coerce")
     else:
@@ -0,0 +1,337 @@
+# ==============================================================
+# utils/planes.py
+# Compilador de config/settings_anexoN.yaml (ETL y dashboard)
+#
+# Cada YAML se valida y compila una sola vez en un PlanAnexo
+# inmutable: celdas y rangos de extracción (uno por versión de
+# plantilla registrada, indexado por huella), secciones, umbrales
+# ordenados, nombres y grupos de ítems. El plan queda en memoria
+# del proceso y solo se recompila si cambia el mtime (o el tamaño)
+# del archivo, así las páginas y el ETL no vuelven a parsear el YAML.
+# ==============================================================
+
+import json
+import os
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import NamedTuple
+
+import yaml
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+
+from utils.puntuacion import Umbrales, compilar_umbrales
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+CONFIG_DIR = BASE_DIR / "config"
+CARPETA_DERIVADAS = BASE_DIR / "data" / "processed"
+
+_PLANES = {}
+_LOCK = threading.Lock()
+
+# ==============================================================
+# 🧱 ESTRUCTURAS DEL PLAN
+# ==============================================================
+
+class PlanExtraccion(NamedTuple):
+    celdas: tuple      # ((campo, fila, columna), ...) ordenado por fila
+    rangos: tuple      # ((fila_inicio, fila_fin), ...) en el orden del YAML
+    col_inicio: int
+    col_fin: int
+    max_fila: int
+    max_col: int
+
+
+class Seccion(NamedTuple):
+    nombre: str
+    fila_inicio: int
+    fila_fin: int
+    col_inicio: int
+    col_fin: int
+    umbrales: Umbrales   # clasificación de la suma de la sección ("Sin escala" por defecto)
+
+
+class Plantilla(NamedTuple):
+    nombre: str
+    extraccion: PlanExtraccion
+
+
+class Plantillas(NamedTuple):
+    celdas: tuple                   # ((celda, fila, columna), ...) cuyo texto forma la huella
+    por_huella: MappingProxyType    # huella → Plantilla
+    max_fila: int                   # filas/columnas a leer para cubrir la huella y todos los planes
+    max_col: int
+
+
+class PlanAnexo(NamedTuple):
+    anexo: str                      # "anexo2"
+    ruta: Path
+    version: tuple                  # (mtime_ns, tamaño) del YAML y de la plantilla derivada
+    metadatos: MappingProxyType     # campo → celda ("C2") o etiqueta de texto (Anexo 5)
+    extraccion: PlanExtraccion      # None si el anexo no es .xlsx con ítems
+    plantillas: Plantillas          # registro de versiones de plantilla (None = plan único)
+    secciones: tuple                # (Seccion, ...) una por rango (Anexo 3)
+    max_por_item: int
+    base_puntaje: str               # "numericos" | "validos"
+    clasificar_por: str             # "suma" | "puntaje"
+    umbrales: Umbrales              # clasificación de cada ficha
+    umbrales_tablero: Umbrales      # clasificación del promedio por UT en el dashboard
+    items_nombres: MappingProxyType # ITEM_n → texto
+    grupos_items: MappingProxyType  # grupo → (ITEM_n, ...)
+    salida: MappingProxyType        # carpeta, archivo_excel
+
+# ==============================================================
+# 🧩 COMPILACIÓN
+# ==============================================================
+
+def compilar_plan(metadatos, items_cfg):
+    """Compila `metadatos` ({campo: "C2"}) y `items` (rangos + columnas) en un PlanExtraccion."""
+    celdas = []
+    for campo, coordenada in (metadatos or {}).items():
+        letra, fila = coordinate_from_string(coordenada)
+        celdas.append((campo, fila, column_index_from_string(letra)))
+    celdas.sort(key=lambda c: (c[1], c[2]))
+
+    rangos = tuple((int(r["fila_inicio"]), int(r["fila_fin"])) for r in items_cfg.get("rangos", []))
+    col_inicio = int(items_cfg["col_inicio"])
+    col_fin = int(items_cfg["col_fin"])
+
+    filas = [f for _, f, _ in celdas] + [fin for _, fin in rangos]
+    columnas = [c for _, _, c in celdas] + [col_fin]
+    return PlanExtraccion(
+        celdas=tuple(celdas),
+        rangos=rangos,
+        col_inicio=col_inicio,
+        col_fin=col_fin,
+        max_fila=max(filas) if filas else 0,
+        max_col=max(columnas),
+    )
+
+
+def items_de_config(config):
+    """Bloque de ítems del YAML: `items` (Anexo 4) o `estructura_items` (Anexo 2/3)."""
+    return config.get("items") or config.get("estructura_items") or {}
+
+
+def _error(ruta, mensaje):
+    return ValueError(f"❌ {ruta.name}: {mensaje}")
+
+
+def _validar_reglas(ruta, clave, reglas, max_opcional=False):
+    if not isinstance(reglas, list):
+        raise _error(ruta, f"`{clave}` debe ser una lista de reglas")
+    for regla in reglas:
+        if not isinstance(regla, dict) or "categoria" not in regla:
+            raise _error(ruta, f"cada regla de `{clave}` necesita `categoria`")
+        if "max" in regla:
+            if not isinstance(regla["max"], (int, float)):
+                raise _error(ruta, f"`max` no numérico en `{clave}`: {regla['max']!r}")
+        elif not max_opcional:
+            raise _error(ruta, f"falta `max` en una regla de `{clave}`")
+    return reglas
+
+
+def _umbrales_tablero(reglas):
+    """La regla sin `max` (o, si no hay, la de mayor max) cubre todo valor por encima del resto."""
+    con_max = sorted((r for r in reglas if "max" in r), key=lambda r: r["max"])
+    abiertas = [r for r in reglas if "max" not in r]
+    if abiertas:
+        return compilar_umbrales(con_max, abiertas[0]["categoria"])
+    if con_max:
+        return compilar_umbrales(con_max[:-1], con_max[-1]["categoria"])
+    return compilar_umbrales([], "Sin dato")
+
+
+def _secciones(ruta, config, items_cfg):
+    """`secciones` (una entrada por sección) o `rangos` (columnas comunes en el bloque de ítems)."""
+    if config.get("secciones"):
+        entradas = config["secciones"]
+    else:
+        entradas = [
+            {
+                "nombre": r.get("nombre", f"Seccion {i}"),
+                "col_inicio": items_cfg.get("col_inicio"),
+                "col_fin": items_cfg.get("col_fin"),
+                **r,
+            }
+            for i, r in enumerate(items_cfg.get("rangos", []), start=1)
+        ]
+
+    secciones = []
+    for s in entradas:
+        try:
+            fila_inicio, fila_fin = int(s["fila_inicio"]), int(s["fila_fin"])
+            col_inicio, col_fin = int(s["col_inicio"]), int(s["col_fin"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise _error(ruta, f"sección o rango incompleto {s!r} ({e})") from e
+        if fila_fin < fila_inicio or col_fin - col_inicio < 2:
+            raise _error(ruta, f"sección o rango inválido {s!r} (se esperan filas crecientes y al menos 3 columnas)")
+        reglas = _validar_reglas(ruta, "clasificacion", s.get("clasificacion", []))
+        secciones.append(Seccion(
+            str(s["nombre"]), fila_inicio, fila_fin, col_inicio, col_fin,
+            compilar_umbrales(reglas, "Sin escala"),
+        ))
+    return tuple(secciones)
+
+
+def _extraccion(ruta, config, items_cfg, secciones):
+    """Plan de una sola pasada; en Anexo 3 los rangos son las secciones."""
+    if not items_cfg:
+        return None
+    if config.get("secciones"):
+        items_cfg = {
+            "rangos": [s._asdict() for s in secciones],
+            "col_inicio": min(s.col_inicio for s in secciones),
+            "col_fin": max(s.col_fin for s in secciones),
+        }
+    try:
+        return compilar_plan(config.get("metadatos"), items_cfg)
+    except (KeyError, TypeError, ValueError) as e:
+        raise _error(ruta, f"celdas o rangos inválidos ({e})") from e
+
+
+def ruta_derivada(anexo):
+    """Plan derivado de formatos/ANEXO_N.xlsx (procesar/derivar_plantillas.py)."""
+    return CARPETA_DERIVADAS / f"plantilla_derivada_{anexo}.json"
+
+
+def _leer_derivada(anexo):
+    try:
+        with open(ruta_derivada(anexo), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _plantillas(ruta, config, extraccion, derivada=None):
+    """
+    Registro `plantillas` del YAML: celdas de la huella y versiones conocidas.
+    Cada versión usa los `metadatos`/ítems del nivel superior o los suyos propios.
+    La plantilla derivada de formatos/ se agrega si su huella no está ya en el YAML.
+    """
+    bloque = config.get("plantillas")
+    if not bloque or extraccion is None:
+        return None
+
+    celdas = []
+    for celda in bloque.get("celdas_huella") or []:
+        try:
+            letra, fila = coordinate_from_string(celda)
+        except ValueError as e:
+            raise _error(ruta, f"celda de huella inválida {celda!r}") from e
+        celdas.append((celda, fila, column_index_from_string(letra)))
+    if not celdas:
+        raise _error(ruta, "`plantillas` necesita `celdas_huella`")
+
+    por_huella, planes = {}, [extraccion]
+    for entrada in bloque.get("conocidas") or []:
+        propia = entrada.get("metadatos") or items_de_config(entrada)
+        plan = extraccion
+        if propia:
+            try:
+                plan = compilar_plan(
+                    entrada.get("metadatos", config.get("metadatos")),
+                    items_de_config(entrada) or items_de_config(config),
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                raise _error(ruta, f"plantilla {entrada.get('nombre')!r} inválida ({e})") from e
+            planes.append(plan)
+        for huella in entrada.get("huellas") or []:
+            if str(huella) in por_huella:
+                raise _error(ruta, f"huella repetida en `plantillas`: {huella}")
+            por_huella[str(huella)] = Plantilla(str(entrada.get("nombre", huella)), plan)
+
+    if derivada and derivada.get("huella") and derivada["huella"] not in por_huella:
+        try:
+            plan = compilar_plan(derivada["metadatos"], derivada["items"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise _error(ruta, f"plan derivado de formatos/{derivada.get('plantilla')} inválido ({e})") from e
+        por_huella[derivada["huella"]] = Plantilla(f"formatos/{derivada['plantilla']}", plan)
+        planes.append(plan)
+
+    return Plantillas(
+        celdas=tuple(celdas),
+        por_huella=MappingProxyType(por_huella),
+        max_fila=max([f for _, f, _ in celdas] + [p.max_fila for p in planes]),
+        max_col=max([c for _, _, c in celdas] + [p.max_col for p in planes]),
+    )
+
+
+def _version(ruta, anexo):
+    """(mtime_ns, tamaño) del YAML y del plan derivado (0, 0 si no existe)."""
+    estado = os.stat(ruta)
+    try:
+        derivada = os.stat(ruta_derivada(anexo))
+        extra = (derivada.st_mtime_ns, derivada.st_size)
+    except OSError:
+        extra = (0, 0)
+    return (estado.st_mtime_ns, estado.st_size) + extra
+
+
+def compilar(anexo, ruta=None):
+    """Lee y valida settings_<anexo>.yaml y lo compila en un PlanAnexo (sin caché)."""
+    ruta = Path(ruta or CONFIG_DIR / f"settings_{anexo}.yaml")
+    version = _version(ruta, anexo)
+    with open(ruta, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+    if not isinstance(config, dict):
+        raise _error(ruta, "el YAML debe ser un diccionario")
+
+    salida = config.get("salida") or {}
+    if "carpeta" not in salida or "archivo_excel" not in salida:
+        raise _error(ruta, "`salida` necesita `carpeta` y `archivo_excel`")
+
+    items_cfg = items_de_config(config)
+    secciones = _secciones(ruta, config, items_cfg)
+    extraccion = _extraccion(ruta, config, items_cfg, secciones)
+    max_por_item = (config.get("limites") or {}).get("max_por_item")
+    if extraccion and not isinstance(max_por_item, (int, float)):
+        raise _error(ruta, "falta `limites.max_por_item`")
+
+    regla = config.get("puntaje") or {}
+    if regla.get("base", "numericos") not in ("numericos", "validos"):
+        raise _error(ruta, f"`puntaje.base` desconocida: {regla['base']!r}")
+    if regla.get("clasificar_por", "suma") not in ("suma", "puntaje"):
+        raise _error(ruta, f"`puntaje.clasificar_por` desconocido: {regla['clasificar_por']!r}")
+
+    clasificacion = _validar_reglas(ruta, "clasificacion", config.get("clasificacion") or [])
+    tablero = _validar_reglas(
+        ruta, "clasificacion_tablero",
+        config.get("clasificacion_tablero") or config.get("clasificacion") or [], max_opcional=True,
+    )
+
+    return PlanAnexo(
+        anexo=anexo,
+        ruta=ruta,
+        version=version,
+        metadatos=MappingProxyType(dict(config.get("metadatos") or {})),
+        extraccion=extraccion,
+        plantillas=_plantillas(ruta, config, extraccion, _leer_derivada(anexo)),
+        secciones=secciones,
+        max_por_item=max_por_item,
+        base_puntaje=regla.get("base", "numericos"),
+        clasificar_por=regla.get("clasificar_por", "suma"),
+        umbrales=compilar_umbrales(clasificacion, regla.get("categoria_defecto")),
+        umbrales_tablero=_umbrales_tablero(tablero),
+        items_nombres=MappingProxyType(dict(config.get("items_nombres") or {})),
+        grupos_items=MappingProxyType({g: tuple(i or ()) for g, i in (config.get("grupos_items") or {}).items()}),
+        salida=MappingProxyType(dict(salida)),
+    )
+
+# ==============================================================
+# 🚀 CACHÉ POR MTIME
+# ==============================================================
+
+def plan_anexo(anexo):
+    """PlanAnexo de settings_<anexo>.yaml ("anexo2"...), recompilado solo si el archivo cambió."""
+    ruta = CONFIG_DIR / f"settings_{anexo}.yaml"
+    version = _version(ruta, anexo)
+
+    plan = _PLANES.get(anexo)
+    if plan is None or plan.version != version:
+        with _LOCK:
+            plan = _PLANES.get(anexo)
+            if plan is None or plan.version != version:
+                plan = compilar(anexo, ruta)
+                _PLANES[anexo] = plan
+    return plan
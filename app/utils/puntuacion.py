@@ -0,0 +1,188 @@
+# ==============================================================
+# utils/puntuacion.py
+# Puntaje y clasificación vectorizados (ETL y dashboard)
+#
+# Las fichas de un lote se convierten en una matriz de ítems
+# (fichas × ítems) y suma, válidos, NA, puntaje (%) y categoría
+# se calculan con NumPy. La categoría se obtiene con búsqueda
+# binaria (np.searchsorted) sobre los umbrales compilados del YAML
+# (utils/planes.py).
+# ==============================================================
+
+from itertools import chain, repeat
+from operator import is_not
+from typing import NamedTuple
+
+import numpy as np
+
+# ==============================================================
+# 🏷️ UMBRALES DE CLASIFICACIÓN
+# ==============================================================
+
+class Umbrales(NamedTuple):
+    maximos: np.ndarray      # límites superiores ascendentes (valor <= max)
+    categorias: np.ndarray   # una por límite + la categoría por defecto al final
+
+
+def compilar_umbrales(reglas, defecto=None):
+    """Compila [{max, categoria}, ...] en arrays ordenados para clasificar por búsqueda binaria."""
+    reglas = sorted(reglas or [], key=lambda r: r["max"])
+    maximos = np.array([r["max"] for r in reglas], dtype=float)
+    categorias = np.array([r["categoria"] for r in reglas] + [defecto], dtype=object)
+    maximos.flags.writeable = categorias.flags.writeable = False
+    return Umbrales(maximos, categorias)
+
+
+def clasificar(valores, umbrales):
+    """Categoría de cada valor: la primera regla con valor <= max; si ninguna, la de defecto (NaN incluido)."""
+    valores = np.asarray(valores, dtype=float)
+    return umbrales.categorias[np.searchsorted(umbrales.maximos, valores, side="left")]
+
+# ==============================================================
+# 🧮 MATRIZ DE ÍTEMS Y PUNTAJE POR LOTE
+# ==============================================================
+
+class MatrizItems(NamedTuple):
+    valores: np.ndarray      # float, NaN donde el ítem no es numérico
+    numerico: np.ndarray     # bool: el ítem es int/float
+    na: np.ndarray           # bool: el ítem es "NA"
+    presente: np.ndarray     # bool: la ficha tiene ese ítem (las fichas pueden tener distinto largo)
+    decimal: np.ndarray      # bool por ficha: algún ítem numérico es float
+
+
+# Código por tipo de celda: 0 = otro (texto, None), 1 = entero/bool, 2 = decimal, 3 = "NA"
+_CODIGOS = {int: 1, bool: 1, float: 2, str: 0, type(None): 0}
+
+
+def _codigo(v):
+    """Código de un tipo no previsto en _CODIGOS (p. ej. escalares de NumPy)."""
+    if isinstance(v, (int, float)):
+        return 2 if isinstance(v, float) else 1
+    return 3 if v == "NA" else 0
+
+
+def matriz_items(fichas):
+    """Convierte una lista de listas de ítems (2/1/0, "NA", texto...) en una MatrizItems."""
+    n = len(fichas)
+    largos = np.fromiter((len(f) for f in fichas), dtype=np.int64, count=n)
+    m = int(largos.max()) if n else 0
+
+    planos = [v for items in fichas for v in items]
+    celdas = np.empty(len(planos), dtype=object)
+    celdas[:] = planos
+    codigos = np.fromiter(map(_CODIGOS.get, map(type, planos), repeat(-1)), dtype=np.int8, count=len(planos))
+    for i in np.flatnonzero(codigos == -1).tolist():
+        codigos[i] = _codigo(planos[i])
+    codigos[(codigos == 0) & (celdas == "NA")] = 3
+
+    es_numero = (codigos == 1) | (codigos == 2)
+    numeros = np.full(len(planos), np.nan)
+    numeros[es_numero] = celdas[es_numero].astype(float)
+
+    # Posición (ficha, ítem) de cada celda del vector plano
+    filas = np.repeat(np.arange(n), largos)
+    columnas = np.arange(len(planos)) - np.repeat(np.cumsum(largos) - largos, largos)
+
+    valores = np.full((n, m), np.nan)
+    codigo = np.zeros((n, m), dtype=np.int8)
+    presente = np.zeros((n, m), dtype=bool)
+    valores[filas, columnas] = numeros
+    codigo[filas, columnas] = codigos
+    presente[filas, columnas] = True
+
+    numerico = (codigo == 1) | (codigo == 2)
+    return MatrizItems(
+        valores=valores,
+        numerico=numerico,
+        na=codigo == 3,
+        presente=presente,
+        decimal=(codigo == 2).any(axis=1),
+    )
+
+
+def puntuar_matriz(matriz, max_por_item, base="numericos"):
+    """
+    Suma, ítems numéricos, NA, válidos y puntaje (%) por ficha.
+    base: "numericos" (ítems con valor numérico) o "validos" (ítems no NA)
+    como denominador del puntaje, multiplicado por max_por_item.
+    """
+    suma = np.where(matriz.numerico, matriz.valores, 0.0).sum(axis=1)
+    total_items = matriz.numerico.sum(axis=1)
+    num_na = matriz.na.sum(axis=1)
+    num_validos = matriz.presente.sum(axis=1) - num_na
+
+    denominador = (num_validos if base == "validos" else total_items) * max_por_item
+    with np.errstate(divide="ignore", invalid="ignore"):
+        puntaje = np.where(total_items > 0, np.round(suma / denominador * 100, 1), 0.0)
+
+    return {
+        "suma": suma,
+        "total_items": total_items,
+        "num_na": num_na,
+        "num_validos": num_validos,
+        "puntaje": puntaje,
+    }
+
+
+def sumas_como_python(suma, decimal):
+    """Suma como int de Python cuando la ficha solo tiene ítems enteros (igual que sum() sobre la lista)."""
+    return [float(s) if d else int(s) for s, d in zip(suma.tolist(), decimal.tolist())]
+
+# ==============================================================
+# ☑️ MARCAS SÍ / PARCIAL / NO (ANEXO 3)
+# ==============================================================
+
+# Códigos de la matriz de marcas: 2 = Sí, 1 = Parcial, 0 = No, NA = fila sin marca, VACIA = fila en blanco
+NA = -1
+VACIA = -2
+_VALOR_MARCA = np.array([None, "NA", 0, 1, 2], dtype=object)  # índice = código + 2
+
+
+def celdas_marcadas(filas):
+    """Matriz booleana (filas × columnas) de celdas no vacías; es lo único que se guarda de cada ficha."""
+    ancho = len(filas[0]) if filas else 0
+    marcado = np.fromiter(map(is_not, chain.from_iterable(filas), repeat(None)), dtype=bool, count=len(filas) * ancho)
+    return marcado.reshape(len(filas), ancho)
+
+
+def decodificar_marcas(marcado, col_inicio, col_fin):
+    """
+    Decodifica en un solo paso un lote de celdas marcadas (fichas × filas × columnas)
+    en una matriz de códigos 2/1/0/NA/VACIA (fichas × filas).
+    col_inicio/col_fin: límites (0-based, fin exclusivo) de cada fila; las tres últimas
+    columnas son Sí/Parcial/No y, como en la ficha, manda la primera marcada.
+    """
+    col_inicio = np.asarray(col_inicio)[:, None]
+    col_fin = np.asarray(col_fin)[:, None]
+    columnas = np.arange(marcado.shape[-1])
+    en_bloque = (columnas >= col_inicio) & (columnas < col_fin)
+    posiciones = np.broadcast_to(col_fin + np.array([-3, -2, -1]), marcado.shape[:-1] + (3,))
+    si, parcial, no = np.moveaxis(np.take_along_axis(marcado, posiciones, axis=-1), -1, 0)
+
+    codigos = np.full(marcado.shape[:-1], NA, dtype=np.int8)
+    codigos[no] = 0
+    codigos[parcial] = 1
+    codigos[si] = 2
+    codigos[~(marcado & en_bloque).any(axis=-1)] = VACIA
+    return codigos
+
+
+def totales_por_seccion(codigos, cortes):
+    """
+    Suma por sección de una matriz de marcas (fichas × filas).
+    cortes: índice de la primera fila de cada sección. Devuelve una matriz fichas × secciones.
+    """
+    puntos = np.where(codigos >= 0, codigos, 0).astype(np.int64)
+    if puntos.shape[1] == 0:
+        return np.zeros((puntos.shape[0], len(cortes)), dtype=np.int64)
+    return np.add.reduceat(puntos, cortes, axis=1)
+
+
+def items_de_marcas(codigos):
+    """Ítems (2/1/0/"NA") de cada ficha de una matriz de marcas, sin las filas vacías."""
+    valores = _VALOR_MARCA[codigos + 2].tolist()
+    con_vacias = (codigos == VACIA).any(axis=1).tolist()
+    return [
+        [v for v in fila if v is not None] if vacias else fila
+        for fila, vacias in zip(valores, con_vacias)
+    ]
@@ -0,0 +1,52 @@
+# ==============================================================
+# utils/vistas.py
+# Frames compartidos de solo lectura y vistas filtradas
+#
+# loaders.py guarda cada tabla una sola vez por proceso
+# (st.cache_resource, sin copiar por sesión) y nunca entrega ese
+# frame: sin filtros, cada rerun recibe el frame sin copiar datos;
+# con filtros, una copia solo de las filas de la máscara booleana.
+# Con Copy-on-Write (siempre en pandas >= 3; en 2.x lo activa
+# main.py), lo que una página escriba en su vista (columnas nuevas,
+# tipos) se copia en ese momento y nunca llega al frame compartido.
+# Sin Copy-on-Write, la vista sin filtros es una copia completa.
+# ==============================================================
+
+import pandas as pd
+
+# ==============================================================
+# 🔎 MÁSCARAS Y VISTAS
+# ==============================================================
+
+def mascara(df, filtros=None):
+    """
+    Máscara booleana (ndarray) de las filas que cumplen {columna: valores};
+    None si ningún filtro restringe (listas vacías no filtran, como en SQL).
+    """
+    seleccion = None
+    for columna, valores in (filtros or {}).items():
+        if valores is None or len(valores) == 0:
+            continue
+        cumple = df[columna].isin(list(valores)).to_numpy()
+        seleccion = cumple if seleccion is None else seleccion & cumple
+    return seleccion
+
+
+def copy_on_write():
+    """True si pandas usa Copy-on-Write (siempre desde 3.0; en 2.x, si main.py lo activó)."""
+    return int(pd.__version__.split(".")[0]) >= 3 or pd.options.mode.copy_on_write is True
+
+
+def vista(df, filtros=None):
+    """
+    Filas de df que cumplen los filtros. Sin filtros (o si todas cumplen) devuelve
+    el frame sin copiar datos (con Copy-on-Write); si no, una copia de solo las
+    filas de la máscara.
+    """
+    if df is None:
+        return None
+    seleccion = mascara(df, filtros)
+    if seleccion is None or seleccion.all():
+        return df.copy(deep=not copy_on_write())
+    return df.loc[seleccion]
+
@@ -0,0 +1,190 @@
+# ============================================================
+# benchmarks/bench_agregados.py
+# Consultas de las páginas sumando los agregados UT × MES ×
+# SUPERVISOR que mantiene el ETL (almacen_sql.tablas_agregados)
+# frente a recorrer las fichas (GROUP BY sobre la tabla en SQLite y
+# groupby en pandas, como antes)
+#
+# Verifica que conteos, promedios por UT (medidas e ítems), modas
+# de EVALUACION e histogramas de ítems coincidan con pandas para
+# varios filtros, y que los agregados actualizados por grupo tras
+# reprocesar y quitar fichas sean iguales a recalcularlos completos.
+# El mantenimiento se mide solo en los agregados (sin los INSERT/
+# DELETE de fichas), con un caso que toca un solo grupo, e indica
+# cuándo se recurrió al recálculo completo. Termina con error si algo
+# difiere.
+#
+# Uso:
+#   python benchmarks/bench_agregados.py [filas ...]
+# ============================================================
+
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from bench_parquet_vs_excel import MESES, SUPERVISORES, UTS, generar_anexo2
+from utils import almacen_sql, consultas
+from utils.almacen import CLAVE_FICHA, aplicar_esquema, tipar_para_parquet
+from utils.almacen_sql import (conectar, crear_agregados, eliminar_fichas_sql, esquema_sql, nombre_columna, reemplazar_tabla,
+                               tablas_agregados, upsert_fichas)
+
+TABLA = "anexo2"
+FILTROS = {
+    "todo": {},
+    "1 UT": {"UNIDAD_TERRITORIAL": UTS[:1]},
+    "3 UT + 2 meses": {"UNIDAD_TERRITORIAL": UTS[:3], "MES": MESES[:2]},
+    "2 supervisores": {"SUPERVISOR": SUPERVISORES[:2]},
+}
+
+
+def con_agregados(filtros, items):
+    return (
+        consultas.contar(TABLA, filtros),
+        consultas.promedios_por(TABLA, "UNIDAD_TERRITORIAL", ["PORCENTAJE", *items], filtros),
+        consultas.moda_por(TABLA, "UNIDAD_TERRITORIAL", "EVALUACION", filtros),
+        consultas.histograma_items(TABLA, filtros),
+    )
+
+
+def con_pandas(df, filtros, items):
+    """Como las páginas antes: filtrar filas, groupby/mean, moda con lambda y (df == v).sum()."""
+    for columna, valores in filtros.items():
+        df = df[df[columna].isin(valores)]
+    grupos = df.groupby("UNIDAD_TERRITORIAL", observed=True)
+    promedios = grupos[["PORCENTAJE", *items]].mean().reset_index()
+    modas = grupos["EVALUACION"].agg(lambda x: x.mode()[0] if not x.mode().empty else "Sin dato")
+    histograma = pd.DataFrame({v: (df[items] == v).sum() for v in (0, 1, 2)})
+    return len(df), promedios, modas, histograma
+
+
+def iguales(a, b):
+    n_a, prom_a, moda_a, hist_a = a
+    n_b, prom_b, moda_b, hist_b = b
+    prom_a = prom_a.set_index("UNIDAD_TERRITORIAL").astype(float).sort_index()
+    prom_b = prom_b.set_index("UNIDAD_TERRITORIAL").astype(float).sort_index()
+    hist_a = hist_a.reindex(index=hist_b.index, columns=hist_b.columns, fill_value=0)
+    return (
+        n_a == n_b
+        and list(prom_a.index.astype(str)) == list(prom_b.index.astype(str))
+        and np.allclose(prom_a.to_numpy(), prom_b.to_numpy(), atol=1e-3, equal_nan=True)
+        and moda_a.astype(str).sort_index().tolist() == moda_b.astype(str).sort_index().tolist()
+        and (hist_a.to_numpy() == hist_b.to_numpy()).all()
+    )
+
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def mantenimiento(escritura):
+    """
+    Ejecuta escritura() (upsert/eliminar) y mide solo el mantenimiento de los agregados
+    (_actualizar_agregados, sin los INSERT/DELETE de fichas): segundos, grupos tocados,
+    grupos totales y si recurrió al recálculo completo.
+    """
+    medicion = {"segundos": 0.0, "afectados": 0, "grupos": 0, "completo": False}
+    actualizar, crear = almacen_sql._actualizar_agregados, almacen_sql.crear_agregados
+
+    def cronometrado(con, tabla, clave, grano):
+        medicion["afectados"] = con.execute("SELECT COUNT(*) FROM (SELECT DISTINCT * FROM temp._grano)").fetchone()[0]
+        medicion["grupos"] = con.execute(f'SELECT COUNT(*) FROM "{tablas_agregados(tabla)[0]}"').fetchone()[0]
+        t0 = time.perf_counter()
+        actualizar(con, tabla, clave, grano)
+        medicion["segundos"] = time.perf_counter() - t0
+
+    def completo(*args):
+        medicion["completo"] = True
+        crear(*args)
+
+    almacen_sql._actualizar_agregados, almacen_sql.crear_agregados = cronometrado, completo
+    try:
+        escritura()
+    finally:
+        almacen_sql._actualizar_agregados, almacen_sql.crear_agregados = actualizar, crear
+    if not medicion["grupos"]:
+        sys.exit("❌ la escritura no pasó por la actualización de agregados")
+    return medicion
+
+
+def contenido_agregados():
+    with closing(sqlite3.connect(almacen_sql.RUTA_BASE)) as con:
+        return [pd.read_sql_query(f'SELECT * FROM "{t}" ORDER BY 1, 2, 3, 4', con).fillna(-1).round(6)
+                for t in tablas_agregados(TABLA)]
+
+
+def main(tamanos):
+    errores = 0
+    for n in tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            almacen_sql.RUTA_BASE = Path(tmp) / "consolidados.sqlite"
+            df = aplicar_esquema(tipar_para_parquet(generar_anexo2(n)))
+            reemplazar_tabla(TABLA, df, CLAVE_FICHA)
+            filas = esquema_sql(df)
+            items = [c for c in filas.columns if c.startswith("ITEM_")]
+
+            with closing(sqlite3.connect(almacen_sql.RUTA_BASE)) as con:
+                n_agregados = con.execute(f'SELECT COUNT(*) FROM "{tablas_agregados(TABLA)[0]}"').fetchone()[0]
+            print(f"--- {n:,} fichas → {n_agregados:,} grupos UT × MES × SUPERVISOR ---")
+            for etiqueta, filtros in FILTROS.items():
+                t_pandas, esperado = medir(lambda: con_pandas(filas, filtros, items))
+                t_agregados, obtenido = medir(lambda: con_agregados(filtros, items))
+                with closing(conectar()) as con, con:
+                    for nombre in tablas_agregados(TABLA):
+                        con.execute(f'ALTER TABLE "{nombre}" RENAME TO "_{nombre}"')
+                t_fichas, sobre_fichas = medir(lambda: con_agregados(filtros, items))
+                with closing(conectar()) as con, con:
+                    for nombre in tablas_agregados(TABLA):
+                        con.execute(f'ALTER TABLE "_{nombre}" RENAME TO "{nombre}"')
+                ok = iguales(esperado, obtenido) and iguales(sobre_fichas, obtenido)
+                errores += not ok
+                print(f"{etiqueta:<15} | pandas {t_pandas * 1000:7.1f} ms | SQL sobre fichas {t_fichas * 1000:7.1f} ms | "
+                      f"agregados {t_agregados * 1000:6.1f} ms ({t_pandas / t_agregados:5.1f}x vs pandas) | "
+                      f"{'✅' if ok else '❌'}")
+
+            # Reprocesar y quitar fichas: solo sus grupos se recalculan (salvo que toquen más de 1/4)
+            rnd = np.random.default_rng(3)
+            un_grupo = df[(df["Unidad Territorial"] == UTS[0]) & (df["Mes"] == MESES[0])
+                          & (df["Supervisor"] == SUPERVISORES[0])].head(20).copy()
+            un_grupo["Puntaje (%)"] = rnd.uniform(0, 100, len(un_grupo)).round(1)
+            otra_ut = df.sample(max(n // 100, 1), random_state=1).copy()
+            otra_ut["Unidad Territorial"] = rnd.choice(UTS, len(otra_ut))
+            otra_ut["Puntaje (%)"] = rnd.uniform(0, 100, len(otra_ut)).round(1)
+            quitadas = df.sample(max(n // 100, 1), random_state=2)
+            casos = [
+                (f"reprocesar {len(un_grupo):,} fichas de 1 grupo", lambda: upsert_fichas(TABLA, un_grupo, CLAVE_FICHA)),
+                (f"reprocesar {len(otra_ut):,} con otra UT", lambda: upsert_fichas(TABLA, otra_ut, CLAVE_FICHA)),
+                (f"quitar {len(quitadas):,} fichas", lambda: eliminar_fichas_sql(TABLA, quitadas, CLAVE_FICHA)),
+            ]
+            for etiqueta, escritura in casos:
+                m = mantenimiento(escritura)
+                incrementales = contenido_agregados()
+                t0 = time.perf_counter()
+                with closing(conectar()) as con, con:
+                    crear_agregados(con, TABLA, [nombre_columna(c) for c in CLAVE_FICHA])
+                t_completo = time.perf_counter() - t0
+                ok = all(a.equals(b) for a, b in zip(incrementales, contenido_agregados()))
+                errores += not ok
+                camino = "recálculo completo (más de 1/4 de los grupos)" if m["completo"] else "por grupo"
+                print(f"{etiqueta:<34} | {m['afectados']:>6,} de {m['grupos']:,} grupos | agregados {m['segundos']:6.3f}s "
+                      f"{camino} | recalcular completos {t_completo:6.3f}s | iguales {'✅' if ok else '❌'}")
+
+    if errores:
+        sys.exit("❌ los agregados difieren de recorrer las fichas")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 200_000])
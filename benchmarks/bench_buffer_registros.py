@@ -0,0 +1,79 @@
+# ============================================================
+# benchmarks/bench_buffer_registros.py
+# Memoria y tiempo: DataFrame de una fila por ficha + pd.concat
+# frente a procesar/buffer.py (BufferColumnas con volcado por lotes)
+#
+# Uso:
+#   python benchmarks/bench_buffer_registros.py [n1 n2 ...]
+# ============================================================
+
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from procesar.buffer import BufferColumnas
+
+LOTE = 5000
+MAX_CONCAT = 10_000   # por encima, el método anterior tarda minutos bajo tracemalloc
+
+
+def registros(n, semilla=7):
+    """Registros con la forma de una ficha de Anexo 4 (metadatos + 18 ítems + puntajes)."""
+    rnd = random.Random(semilla)
+    for i in range(n):
+        items = [rnd.choice([0, 1, 2, "NA"]) for _ in range(18)]
+        yield {
+            "Año": "2025", "Mes": "OCTUBRE", "Región": f"R{i % 25}", "Archivo": f"ficha_{i}.xlsx",
+            "Unidad Territorial": "La Libertad", "Provincia": "Trujillo", "Distrito": f"D{i % 80}",
+            "Supervisor": f"Supervisor {i % 40}", "Fecha Supervisión": "2025-10-17",
+            **{f"Item_{k+1}": v for k, v in enumerate(items)},
+            "Ítems válidos": 18 - items.count("NA"), "Ítems NA": items.count("NA"),
+            "Suma Total": sum(v for v in items if v != "NA"), "Puntaje (%)": 50.0, "Evaluación": "Regular",
+        }
+
+
+def con_concat(n):
+    return pd.concat([pd.DataFrame([r]) for r in registros(n)], ignore_index=True)
+
+
+def con_buffer(n):
+    buffer, volcadas = BufferColumnas(), 0
+    for r in registros(n):
+        buffer.agregar(r)
+        if len(buffer) >= LOTE:
+            volcadas += len(buffer.vaciar())   # aquí el ETL anexa el lote al consolidado
+    return volcadas + len(buffer.vaciar())
+
+
+def medir(funcion, n):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    funcion(n)
+    segundos = time.perf_counter() - t0
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / 1e6
+
+
+def main(tamanos):
+    print(f"{'fichas':>8} | {'concat s':>9} | {'concat MB':>10} | {'buffer s':>9} | {'buffer MB':>10}")
+    print("-" * 60)
+    for n in tamanos:
+        t_b, m_b = medir(con_buffer, n)
+        if n <= MAX_CONCAT:
+            t_c, m_c = medir(con_concat, n)
+            concat = f"{t_c:>9.2f} | {m_c:>10.1f}"
+        else:
+            concat = f"{'—':>9} | {'—':>10}"
+        print(f"{n:>8,} | {concat} | {t_b:>9.2f} | {m_b:>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [1_000, 10_000, 50_000])
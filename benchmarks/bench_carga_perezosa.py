@@ -0,0 +1,67 @@
+# ============================================================
+# benchmarks/bench_carga_perezosa.py
+# Lecturas en frío del dashboard con la carga perezosa por anexo
+# (loaders.cargar_anexo con proyección de columnas) frente al
+# esquema anterior: cargar_datos leía los 4 anexos completos en
+# cada página y main.py volvía a leer 3 con su propia caché
+#
+# Mide solo las lecturas de leer_consolidado que hay detrás de
+# cada caché (sin Streamlit) y verifica que la lectura proyectada
+# coincida con las mismas columnas de la lectura completa. Termina
+# con error si difiere.
+#
+# Uso:
+#   python benchmarks/bench_carga_perezosa.py [filas_por_anexo]
+# ============================================================
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from bench_parquet_vs_excel import generar_anexo2
+from utils import almacen_sql
+from utils.almacen import anexar_consolidado, leer_consolidado
+
+# Columnas que el tablero de main.py leía con cargar_anexo (hoy suma los agregados SQLite)
+COLUMNAS_TABLERO = ["Unidad Territorial", "Puntaje (%)", "Evaluación"]
+
+
+def medir(funcion):
+    t0 = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - t0, resultado
+
+
+def main(filas=200_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen_sql.RUTA_BASE = Path(tmp) / "consolidados.sqlite"
+        rutas = {clave: Path(tmp) / f"anexo{n}_consolidado.xlsx" for n, clave in zip(range(2, 6), ("a2", "a3", "a4", "a5"))}
+        for k, ruta in enumerate(rutas.values()):
+            anexar_consolidado(generar_anexo2(filas, semilla=k), ruta, exportar_excel=False)
+
+        # Antes: cargar_datos (4 anexos completos) + cargar_excel de main.py (3 completos más)
+        t_datos, completos = medir(lambda: {c: leer_consolidado(r) for c, r in rutas.items()})
+        t_main, _ = medir(lambda: [leer_consolidado(rutas[c]) for c in ("a2", "a3", "a4")])
+        # Ahora: una página lee su anexo; main.py sus 3 anexos con las columnas del tablero
+        t_pagina, _ = medir(lambda: leer_consolidado(rutas["a2"]))
+        t_tablero, proyectados = medir(lambda: {c: leer_consolidado(rutas[c], columnas=COLUMNAS_TABLERO)
+                                                for c in ("a2", "a3", "a4")})
+
+        ok = all(proyectados[c].equals(completos[c][COLUMNAS_TABLERO]) for c in proyectados)
+        print(f"{filas:,} filas por anexo")
+        print(f"página de un anexo   | antes (cargar_datos, 4 anexos) {t_datos:6.2f}s | ahora (solo su anexo) {t_pagina:6.2f}s "
+              f"({t_datos / t_pagina:4.1f}x)")
+        print(f"main.py (tablero)    | antes (3 anexos completos)     {t_main:6.2f}s | ahora (3 anexos, 3 columnas) {t_tablero:6.2f}s "
+              f"({t_main / t_tablero:4.1f}x)")
+        print(f"lectura proyectada = columnas de la completa: {'✅' if ok else '❌'}")
+
+    if not ok:
+        sys.exit("❌ la lectura proyectada difiere")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
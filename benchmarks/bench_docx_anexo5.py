@@ -0,0 +1,191 @@
+# ============================================================
+# benchmarks/bench_docx_anexo5.py
+# Verificación y tiempos de procesar/docx_streaming.py frente a la
+# lectura con python-docx (leer_docx + leer_tabla_docx), y de
+# separar_plazos frente a la separación de PLAZO fila por fila
+#
+# Genera actas grandes con python-docx (celdas combinadas en
+# horizontal y vertical, hipervínculos, tabulaciones, saltos de
+# línea, tablas anidadas, filas sin número) y compara metadatos y
+# registros de procesar_tabla por ambos caminos, más las actas .docx
+# que haya en data/raw. Termina con error si algún registro difiere.
+# En PLAZO verifica que los días y las fechas del lote vectorizado
+# correspondan al texto que separaba el bucle anterior.
+#
+# Uso:
+#   python benchmarks/bench_docx_anexo5.py [filas_por_acta] [n_actas]
+# ============================================================
+
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+from procesar import docx_anexo5
+from procesar.docx_streaming import leer_acta
+
+PLAZOS = ["15 días", "30 dias", "10/11/2025", "Permanente", "", "Por precisar", "7 DÍAS hábiles", "1/2/25"]
+PLAZOS_BORDE = ["hasta el 31/02/2025", "5 días o 3/4/2026", "1/2/202", "1 día", "Plazo: 20/12/25", "90DIAS"]
+
+
+def _hipervinculo(parrafo, texto):
+    parrafo._p.append(parse_xml(
+        f'<w:hyperlink {nsdecls("w", "r")} r:id="rId99"><w:r><w:t xml:space="preserve">{texto}</w:t></w:r></w:hyperlink>'
+    ))
+
+
+def generar_acta(ruta, n_filas, semilla):
+    """Acta con encabezado de metadatos, tabla de acuerdos de n_filas y casos de borde."""
+    rnd = random.Random(semilla)
+    doc = Document()
+    doc.add_paragraph("ACTA DE SUPERVISIÓN - ANEXO 5")
+    p = doc.add_paragraph("UNIDAD TERRITORIAL:\t")
+    p.add_run("La Libertad")
+    p = doc.add_paragraph("FECHA: ")
+    p.add_run(f"{rnd.randint(1, 28)}/10/2025").add_break()
+    _hipervinculo(doc.add_paragraph("Ver: "), "enlace")
+
+    tabla = doc.add_table(rows=1, cols=5)
+    for celda, titulo in zip(tabla.rows[0].cells, ["N°", "PUNTOS CRÍTICOS", "ACUERDOS", "RESPONSABLE", "PLAZO"]):
+        celda.text = titulo
+    for i in range(1, n_filas + 1):
+        celdas = tabla.add_row().cells
+        celdas[0].text = f" {i} " if i % 7 else str(i)
+        celdas[1].text = f"Punto crítico {i}\tcon detalle"
+        celdas[2].text = f"Acuerdo {i}"
+        celdas[2].add_paragraph(f"Segunda línea del acuerdo {i}")
+        celdas[3].text = rnd.choice(["Gestor", "Coordinador UT", "   ", ""])
+        celdas[4].text = rnd.choice(PLAZOS)
+        if i % 11 == 0:
+            _hipervinculo(celdas[1].paragraphs[0], " (ver anexo)")
+        if i % 13 == 0:
+            celdas[1].add_table(rows=1, cols=1).cell(0, 0).text = "tabla anidada"
+    # Combinadas: acuerdo compartido en horizontal y responsable compartido en vertical
+    for i in range(3, n_filas, 17):
+        fila, abajo = tabla.rows[i].cells, tabla.rows[i + 1].cells
+        fila[2].merge(fila[3])
+        fila[4].merge(abajo[4])
+    tabla.add_row().cells[0].text = "Observaciones"
+
+    doc.add_paragraph("Firma del supervisor")
+    segunda = doc.add_table(rows=2, cols=3)
+    segunda.cell(0, 0).text, segunda.cell(0, 1).text = "1", "Otro punto"
+    segunda.cell(1, 0).merge(segunda.cell(1, 2)).text = "Nota al pie"
+    doc.save(ruta)
+
+
+def con_python_docx(ruta):
+    texto, tablas = docx_anexo5.leer_docx(ruta)
+    meta = docx_anexo5.extraer_metadatos(texto, ruta)
+    return docx_anexo5.procesar_tabla(docx_anexo5.leer_tabla_docx(tablas), meta, "R1", "OCTUBRE", 2025, ruta.name)
+
+
+def en_streaming(ruta):
+    texto, filas = leer_acta(ruta)
+    meta = docx_anexo5.extraer_metadatos(texto, ruta)
+    return docx_anexo5.procesar_tabla(filas, meta, "R1", "OCTUBRE", 2025, ruta.name)
+
+
+def plazo_anterior(plazo_texto):
+    """Separación de PLAZO fila por fila (copiada tal cual del procesar_tabla anterior)."""
+    plazo_dias = ""
+    fecha_limite = ""
+    if re.search(r"\d{1,2}/\d{1,2}/\d{2,4}", plazo_texto):
+        fecha_limite = plazo_texto
+    elif re.search(r"\d+\s*d[ií]as?", plazo_texto, re.IGNORECASE):
+        plazo_dias = re.search(r"\d+\s*d[ií]as?", plazo_texto, re.IGNORECASE).group()
+    elif plazo_texto:
+        plazo_dias = plazo_texto
+    return plazo_dias, fecha_limite
+
+
+def fecha_esperada(texto):
+    """Primera fecha dd/mm/aa[aa] del texto como Timestamp (NaT si no es una fecha válida o el año está incompleto)."""
+    dia, mes, anio = re.search(r"(\d{1,2})/(\d{1,2})/(\d{2,4})", texto).groups()
+    if len(anio) == 3:
+        return pd.NaT
+    anio = int(anio) + 2000 if len(anio) == 2 else int(anio)
+    try:
+        return pd.Timestamp(datetime(anio, int(mes), int(dia)))
+    except ValueError:
+        return pd.NaT
+
+
+def comparar_plazos(n):
+    rnd = random.Random(7)
+    # Textos fijos repetidos + fechas y días al azar (miles de textos distintos)
+    variables = [
+        lambda: f"{rnd.randint(1, 31)}/{rnd.randint(1, 12)}/{rnd.choice(['25', '2025', '2026'])}",
+        lambda: f"{rnd.randint(1, 120)} días",
+    ]
+    plazos = [rnd.choice(PLAZOS + PLAZOS_BORDE) if rnd.random() < 0.6 else rnd.choice(variables)() for _ in range(n)]
+
+    t0 = time.perf_counter()
+    anterior = [plazo_anterior(p) for p in plazos]
+    t_anterior = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    nuevo = docx_anexo5.separar_plazos(pd.Series(plazos))
+    t_nuevo = time.perf_counter() - t0
+
+    ok = True
+    for (dias_txt, fecha_txt), dias, fecha in zip(anterior, nuevo["PLAZO_DÍAS"], nuevo["FECHA_LÍMITE"]):
+        digitos = re.match(r"\d+", dias_txt)
+        esperado_dias = int(digitos.group()) if digitos else None
+        esperado_fecha = fecha_esperada(fecha_txt) if fecha_txt else pd.NaT
+        ok &= (pd.isna(dias) if esperado_dias is None else dias == esperado_dias)
+        ok &= (pd.isna(fecha) if pd.isna(esperado_fecha) else fecha == esperado_fecha)
+    print(f"{'PLAZO':<24} {n:>13,} textos | fila por fila {t_anterior:6.2f}s | "
+          f"separar_plazos {t_nuevo:6.2f}s ({t_anterior / max(t_nuevo, 1e-9):4.1f}x) | {'✅' if ok else '❌'}")
+    return ok
+
+
+def comparar(etiqueta, rutas):
+    t0 = time.perf_counter()
+    esperado = [con_python_docx(r) for r in rutas]
+    t_docx = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    obtenido = [en_streaming(r) for r in rutas]
+    t_stream = time.perf_counter() - t0
+    ok = esperado == obtenido
+    registros = sum(map(len, esperado))
+    print(f"{etiqueta:<24} {len(rutas):>3} actas {registros:>8,} registros | python-docx {t_docx:6.2f}s | "
+          f"streaming {t_stream:6.2f}s ({t_docx / max(t_stream, 1e-9):4.1f}x) | {'✅' if ok else '❌'}")
+    return ok
+
+
+def main(n_filas=5_000, n_actas=4):
+    errores = 0
+    raw = sorted(p for p in (BASE_DIR / "data" / "raw").rglob("*.docx") if not p.name.startswith("~$"))
+    if raw:
+        errores += not comparar("data/raw", raw)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chicas = [Path(tmp) / f"acta_chica_{k}.docx" for k in range(20)]
+        grandes = [Path(tmp) / f"acta_grande_{k}.docx" for k in range(n_actas)]
+        for k, ruta in enumerate(chicas):
+            generar_acta(ruta, 25, semilla=k)
+        for k, ruta in enumerate(grandes):
+            generar_acta(ruta, n_filas, semilla=100 + k)
+        errores += not comparar("actas de 25 filas", chicas)
+        errores += not comparar(f"actas de {n_filas:,} filas", grandes)
+
+    errores += not comparar_plazos(n_filas * 100)
+
+    if errores:
+        sys.exit(f"❌ {errores} comparación(es) con diferencias")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
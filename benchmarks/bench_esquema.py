@@ -0,0 +1,79 @@
+# ============================================================
+# benchmarks/bench_esquema.py
+# Memoria y groupby del consolidado con el esquema canónico
+# (aplicar_esquema: dimensiones category, ítems Int8, porcentajes
+# float32) frente a los tipos que deja read_excel (object/float64)
+#
+# Verifica además que el esquema se conserve al escribir y volver a
+# leer el dataset, y que los promedios por UT coincidan. Termina con
+# error si algo difiere.
+#
+# Uso:
+#   python benchmarks/bench_esquema.py [filas ...]
+# ============================================================
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from bench_parquet_vs_excel import generar_anexo2
+from utils import almacen_sql
+from utils.almacen import anexar_consolidado, aplicar_esquema, leer_consolidado, tipar_para_parquet, tipo_canonico
+
+
+def como_read_excel(df):
+    """Tipos que devuelve read_excel: texto en object, ítems con NA en float64."""
+    df = tipar_para_parquet(df)
+    return df.astype({c: object for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])})
+
+
+def tiempo_groupby(df, columnas, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = df.groupby("Unidad Territorial", observed=True)[columnas].mean()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado.astype(float).sort_index()
+
+
+def main(tamanos):
+    errores = 0
+    for n in tamanos:
+        antes = como_read_excel(generar_anexo2(n))
+        despues = aplicar_esquema(antes.copy())
+        columnas = ["Puntaje (%)"] + [c for c in antes.columns if c.startswith("Item_")]
+
+        mb_antes = antes.memory_usage(deep=True).sum() / 1e6
+        mb_despues = despues.memory_usage(deep=True).sum() / 1e6
+        t_antes, g_antes = tiempo_groupby(antes, columnas)
+        t_despues, g_despues = tiempo_groupby(despues, columnas)
+        iguales = np.allclose(g_antes.to_numpy(), g_despues.to_numpy(), atol=1e-4, equal_nan=True)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = Path(tmp) / "anexo2_consolidado.xlsx"
+            almacen_sql.RUTA_BASE = Path(tmp) / "consolidados.sqlite"
+            anexar_consolidado(antes, ruta, exportar_excel=False)
+            leido = leer_consolidado(ruta)
+        conserva = all(
+            str(leido[c].dtype) == tipo_canonico(c) for c in leido.columns if tipo_canonico(c)
+        )
+
+        ok = iguales and conserva
+        errores += not ok
+        print(f"{n:>9,} filas | memoria {mb_antes:7.1f} MB → {mb_despues:6.1f} MB ({mb_antes / mb_despues:4.1f}x) | "
+              f"groupby UT {t_antes * 1000:7.1f} ms → {t_despues * 1000:6.1f} ms ({t_antes / t_despues:4.1f}x) | "
+              f"esquema tras Parquet {'✅' if conserva else '❌'} | promedios {'✅' if iguales else '❌'}")
+
+    if errores:
+        sys.exit("❌ el esquema no se conservó o los promedios difieren")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 200_000])
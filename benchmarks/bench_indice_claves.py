@@ -0,0 +1,110 @@
+# ============================================================
+# benchmarks/bench_indice_claves.py
+# Tiempos de anexar_consolidado con índice de claves por partición
+# frente al esquema anterior (leer la partición completa, normalizar,
+# concatenar y drop_duplicates) a medida que crece el historial
+#
+# Simula corridas sucesivas del ETL sobre una misma partición: solo
+# fichas nuevas (el caso mensual) y fichas nuevas + una ficha previa
+# reprocesada. Al final compara el contenido de ambos datasets.
+# Termina con error si difiere.
+#
+# Uso:
+#   python benchmarks/bench_indice_claves.py [fichas_por_corrida] [corridas]
+# ============================================================
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from utils import almacen
+from utils.almacen import CLAVE_FICHA, anexar_consolidado, leer_consolidado
+
+N_ITEMS = 30
+
+# Solo se compara la escritura del dataset Parquet: sin la réplica en SQLite
+almacen.sqlite_configurado = lambda: False
+
+
+def lote(inicio, n, version, rnd):
+    """n fichas de una sola partición (anexo 2: una fila por ficha con 30 ítems)."""
+    df = pd.DataFrame({
+        "Año": 2025, "Mes": "OCTUBRE", "Región": "LA LIBERTAD",
+        "Archivo": [f"ficha_{i:07d}.xlsx" for i in range(inicio, inicio + n)],
+        "Supervisor": [f"Supervisor {i % 40}" for i in range(inicio, inicio + n)],
+    })
+    items = pd.DataFrame(rnd.integers(0, 3, (n, N_ITEMS)), columns=[f"Item_{j+1}" for j in range(N_ITEMS)])
+    return pd.concat([df, items.assign(Version=version)], axis=1)
+
+
+def anexar_anterior(df_nuevo, ruta_excel):
+    """Esquema anterior: una partición = un part.parquet leído y reescrito completo."""
+    dataset = almacen.ruta_dataset(ruta_excel)
+    df_nuevo = df_nuevo.copy()
+    for col in CLAVE_FICHA:
+        df_nuevo[col] = df_nuevo[col].astype(str).str.strip().str.upper()
+    columnas = [c for _, c in almacen.PARTICIONES]
+    for valores, grupo in df_nuevo.groupby(columnas, sort=True):
+        destino = almacen._dir_particion(dataset, valores) / almacen.ARCHIVO_PARTE
+        if destino.exists():
+            previo = pd.read_parquet(destino)
+            for col in CLAVE_FICHA:
+                previo[col] = previo[col].astype(str).str.strip().str.upper()
+            grupo = pd.concat([previo, grupo], ignore_index=True)
+        grupo = grupo.drop_duplicates(subset=CLAVE_FICHA, keep="last")
+        almacen._escribir_parquet(grupo, destino)
+
+
+def simular(lotes, ruta_anterior, ruta_indice):
+    t_anterior, t_indice = [], []
+    for df in lotes:
+        t0 = time.perf_counter()
+        anexar_anterior(df, ruta_anterior)
+        t_anterior.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        anexar_consolidado(df, ruta_indice, exportar_excel=False)
+        t_indice.append(time.perf_counter() - t0)
+    return t_anterior, t_indice
+
+
+def main(por_corrida=2_000, corridas=30):
+    errores = 0
+    for reprocesa in (False, True):
+        rnd = np.random.default_rng(5)
+        lotes = []
+        for k in range(corridas):
+            nuevo = lote(k * por_corrida, por_corrida, k, rnd)
+            if reprocesa and k:
+                nuevo = pd.concat([nuevo, lote(int(rnd.integers(0, k * por_corrida)), 1, k, rnd)], ignore_index=True)
+            lotes.append(nuevo)
+
+        print(f"--- fichas nuevas{' + 1 ficha reprocesada' if reprocesa else ''} por corrida ---")
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta_anterior = Path(tmp) / "anterior" / "anexo2_consolidado.xlsx"
+            ruta_indice = Path(tmp) / "indice" / "anexo2_consolidado.xlsx"
+            t_anterior, t_indice = simular(lotes, ruta_anterior, ruta_indice)
+
+            for k in sorted({0, corridas // 2, corridas - 1}):
+                print(f"corrida {k + 1:>3} ({(k + 1) * por_corrida:>8,} fichas en historial) | "
+                      f"anterior {t_anterior[k]:6.3f}s | índice {t_indice[k]:6.3f}s")
+            print(f"{'total':<44} | anterior {sum(t_anterior):6.2f}s | índice {sum(t_indice):6.2f}s")
+
+            a = leer_consolidado(ruta_anterior).sort_values("Archivo").reset_index(drop=True)
+            b = leer_consolidado(ruta_indice).sort_values("Archivo").reset_index(drop=True)
+            ok = a.astype(str).equals(b[a.columns].astype(str))
+            errores += not ok
+            print(f"contenido final: {len(a):,} vs {len(b):,} filas | {'✅' if ok else '❌'}")
+
+    if errores:
+        sys.exit("❌ los datasets difieren")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
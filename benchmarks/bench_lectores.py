@@ -0,0 +1,94 @@
+# ============================================================
+# benchmarks/bench_lectores.py
+# Compara los lectores de procesar/lectores.py sobre las fichas de data/raw
+#
+# Para cada ficha de Anexo 2, 3 y 4 verifica que todos los backends
+# disponibles devuelven los mismos valores en las celdas configuradas
+# (plan del YAML) y en el área completa de la hoja, y mide el tiempo.
+#
+# Uso:
+#   python benchmarks/bench_lectores.py [repeticiones]
+# ============================================================
+
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from procesar.lectores import BACKENDS, leer_filas
+from procesar.plan_extraccion import compilar_plan, extraer_ficha, items_de_config
+
+CARPETA_RAW = BASE_DIR / "data" / "raw"
+ANEXOS = {
+    "ANEXO_2": "settings_anexo2.yaml",
+    "ANEXO_3": "settings_anexo3.yaml",
+    "ANEXO_4": "settings_anexo4.yaml",
+}
+AREA_COMPLETA = (300, 40)   # filas x columnas comparadas celda a celda
+
+
+def disponibles():
+    """Backends que pueden abrir una ficha en este entorno."""
+    muestra = next(p for p in CARPETA_RAW.rglob("*.xlsx") if not p.name.startswith("~$"))
+    backends = []
+    for nombre in BACKENDS:
+        try:
+            leer_filas(muestra, 1, 1, nombre)
+            backends.append(nombre)
+        except ImportError as e:
+            print(f"⚠️ {nombre} omitido: {e}")
+    return backends
+
+
+def medir(funcion, repeticiones):
+    mejor, resultado = float("inf"), None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def main(repeticiones=5):
+    backends = disponibles()
+    referencia = backends[0]
+    print(f"{'ficha':<52} | " + " | ".join(f"{b + ' ms':>12}" for b in backends) + " | iguales")
+    print("-" * (64 + 15 * len(backends)))
+
+    errores = 0
+    for etiqueta, yaml_nombre in ANEXOS.items():
+        with open(BASE_DIR / "config" / yaml_nombre, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        plan = compilar_plan(config["metadatos"], items_de_config(config))
+
+        for ruta in sorted(CARPETA_RAW.rglob(f"*{etiqueta}*.xlsx")):
+            if ruta.name.startswith("~$"):
+                continue
+            tiempos, planes, areas = {}, {}, {}
+            for b in backends:
+                tiempos[b], planes[b] = medir(lambda: extraer_ficha(ruta, plan, b), repeticiones)
+                areas[b] = leer_filas(ruta, *AREA_COMPLETA, backend=b)
+
+            iguales = all(planes[b] == planes[referencia] and areas[b] == areas[referencia] for b in backends)
+            errores += not iguales
+            print(f"{ruta.name[-52:]:<52} | "
+                  + " | ".join(f"{tiempos[b] * 1000:>12.1f}" for b in backends)
+                  + f" | {'✅' if iguales else '❌'}")
+
+            if not iguales:
+                for b in backends:
+                    for n, (f_ref, f_b) in enumerate(zip(areas[referencia], areas[b]), start=1):
+                        if f_ref != f_b:
+                            print(f"   {b} fila {n}: {f_b!r} ≠ {f_ref!r}")
+                            break
+
+    if errores:
+        sys.exit(f"❌ {errores} ficha(s) con valores distintos entre lectores")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
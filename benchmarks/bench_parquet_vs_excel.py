@@ -0,0 +1,83 @@
+# ============================================================
+# benchmarks/bench_parquet_vs_excel.py
+# Tiempo de carga del consolidado: Excel vs Parquet
+#
+# Uso:
+#   python benchmarks/bench_parquet_vs_excel.py              # 10k y 1M filas
+#   python benchmarks/bench_parquet_vs_excel.py 10000 50000  # tamaños a medida
+# ============================================================
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from utils.almacen import escribir_consolidado, leer_consolidado, ruta_parquet
+
+UTS = ["LA LIBERTAD", "PIURA", "CAJAMARCA", "AMAZONAS", "PUNO", "CUSCO", "JUNIN", "LORETO"]
+MESES = ["AGOSTO", "SETIEMBRE", "OCTUBRE", "NOVIEMBRE"]
+SUPERVISORES = [f"SUPERVISOR {i}" for i in range(40)]
+
+
+def generar_anexo2(n_filas, semilla=42):
+    """Consolidado sintético con la forma del Anexo 2 (20 ítems 0/1/2/NA)."""
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "Año": 2025,
+        "Mes": rng.choice(MESES, n_filas),
+        "Región": rng.choice(UTS, n_filas),
+        "Archivo": [f"FICHA_{i:07d}_ANEXO_2.xlsx" for i in range(n_filas)],
+        "Unidad Territorial": rng.choice(UTS, n_filas),
+        "Distrito": rng.choice([f"DISTRITO {i}" for i in range(200)], n_filas),
+        "Supervisor": rng.choice(SUPERVISORES, n_filas),
+        "Fecha Supervisión": "2025-10-16",
+    })
+    items = rng.integers(0, 3, size=(n_filas, 20)).astype(object)
+    items[rng.random((n_filas, 20)) < 0.05] = "NA"
+    for i in range(20):
+        df[f"Item_{i+1}"] = items[:, i]
+    numericos = pd.DataFrame(items).apply(pd.to_numeric, errors="coerce")
+    df["Ítems válidos"] = numericos.notna().sum(axis=1)
+    df["Ítems NA"] = 20 - df["Ítems válidos"]
+    df["Suma Total"] = numericos.sum(axis=1)
+    df["Puntaje (%)"] = (df["Suma Total"] / (df["Ítems válidos"] * 2) * 100).round(1)
+    df["Evaluación"] = pd.cut(df["Suma Total"], [-1, 10, 20, 30, 40],
+                              labels=["DEFICIENTE", "REGULAR", "BUENO", "EXCELENTE"]).astype(str)
+    return df
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos)
+
+
+def main(tamanos):
+    print(f"{'filas':>10} | {'xlsx MB':>8} | {'parquet MB':>10} | {'read_excel s':>12} | {'read_parquet s':>14} | {'x':>6}")
+    print("-" * 76)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tamanos:
+            ruta_excel = Path(tmp) / f"anexo2_{n}.xlsx"
+            escribir_consolidado(generar_anexo2(n), ruta_excel)
+            rep = 3 if n <= 100_000 else 1
+
+            t_excel = medir(lambda: pd.read_excel(ruta_excel), rep)
+            t_parquet = medir(lambda: leer_consolidado(ruta_excel), max(rep, 3))
+
+            mb_x = ruta_excel.stat().st_size / 1e6
+            mb_p = ruta_parquet(ruta_excel).stat().st_size / 1e6
+            print(f"{n:>10,} | {mb_x:>8.1f} | {mb_p:>10.1f} | {t_excel:>12.2f} | {t_parquet:>14.3f} | {t_excel / t_parquet:>5.0f}x")
+
+
+if __name__ == "__main__":
+    tamanos = [int(a) for a in sys.argv[1:]] or [10_000, 1_000_000]
+    main(tamanos)
@@ -0,0 +1,85 @@
+# ============================================================
+# benchmarks/bench_plan_extraccion.py
+# Validación y tiempos por ficha: acceso celda a celda vs plan de una pasada
+#
+# Para cada ficha de Anexo 2 y 4 en data/raw compara los valores de
+# metadatos e ítems obtenidos con el método anterior (hoja[celda] +
+# un iter_rows por rango) y con procesar/plan_extraccion.py.
+#
+# Uso:
+#   python benchmarks/bench_plan_extraccion.py [repeticiones]
+# ============================================================
+
+import sys
+import time
+from pathlib import Path
+
+import yaml
+from openpyxl import load_workbook
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from procesar.plan_extraccion import compilar_plan, ejecutar_plan, items_de_config
+
+CARPETA_RAW = BASE_DIR / "data" / "raw"
+ANEXOS = {"ANEXO_2": "settings_anexo2.yaml", "ANEXO_4": "settings_anexo4.yaml"}
+
+
+def extraer_por_celda(hoja, config):
+    """Método anterior: una lectura por celda de metadatos y un iter_rows por rango."""
+    meta = {campo: hoja[celda].value for campo, celda in config["metadatos"].items()}
+    items_cfg = items_de_config(config)
+    filas = []
+    for rango in items_cfg["rangos"]:
+        filas.extend(hoja.iter_rows(
+            min_row=rango["fila_inicio"], max_row=rango["fila_fin"],
+            min_col=items_cfg["col_inicio"], max_col=items_cfg["col_fin"],
+            values_only=True,
+        ))
+    return meta, [f for f in filas if f and any(v is not None for v in f)]
+
+
+def extraer_con_plan(hoja, plan):
+    meta, filas = ejecutar_plan(
+        hoja.iter_rows(min_row=1, max_row=plan.max_fila, max_col=plan.max_col, values_only=True), plan
+    )
+    return meta, [f for f in filas if f and any(v is not None for v in f)]
+
+
+def medir(ruta, funcion, repeticiones):
+    mejor, resultado = float("inf"), None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        wb = load_workbook(ruta, data_only=True, read_only=True)
+        resultado = funcion(wb.active)
+        wb.close()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def main(repeticiones=5):
+    print(f"{'ficha':<58} | {'por celda ms':>12} | {'plan ms':>8} | {'x':>5} | iguales")
+    print("-" * 100)
+    errores = 0
+    for etiqueta, yaml_nombre in ANEXOS.items():
+        with open(BASE_DIR / "config" / yaml_nombre, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        plan = compilar_plan(config["metadatos"], items_de_config(config))
+
+        for ruta in sorted(CARPETA_RAW.rglob(f"*{etiqueta}*.xlsx")):
+            if ruta.name.startswith("~$"):
+                continue
+            t_celda, ref = medir(ruta, lambda h: extraer_por_celda(h, config), repeticiones)
+            t_plan, nuevo = medir(ruta, lambda h: extraer_con_plan(h, plan), repeticiones)
+            iguales = ref == nuevo
+            errores += not iguales
+            print(f"{ruta.name[-58:]:<58} | {t_celda * 1000:>12.1f} | {t_plan * 1000:>8.1f} | "
+                  f"{t_celda / t_plan:>4.1f}x | {'✅' if iguales else '❌'}")
+
+    if errores:
+        sys.exit(f"❌ {errores} ficha(s) con valores distintos")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
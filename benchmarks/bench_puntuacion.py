@@ -0,0 +1,234 @@
+# ============================================================
+# benchmarks/bench_puntuacion.py
+# Verificación y tiempos de utils/puntuacion.py frente al cálculo
+# anterior ficha por ficha (bucles de procesar_anexo2/4 y
+# main.clasificar_anexo) y de las marcas Sí/Parcial/No del Anexo 3
+# frente a la cadena de if por fila
+#
+# Compara suma, válidos, NA, puntaje y categoría en fichas
+# aleatorias (largos distintos, "NA", texto, decimales) y en las
+# fichas de data/raw. Termina con error si algún valor difiere.
+#
+# Uso:
+#   python benchmarks/bench_puntuacion.py [n_fichas]
+# ============================================================
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from utils.planes import plan_anexo
+from utils.puntuacion import (
+    celdas_marcadas, clasificar, compilar_umbrales, decodificar_marcas, items_de_marcas, matriz_items,
+    puntuar_matriz, sumas_como_python, totales_por_seccion,
+)
+
+
+def cargar(anexo):
+    with open(BASE_DIR / "config" / f"settings_anexo{anexo}.yaml", "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+# ============================================================
+# 📜 CÁLCULO ANTERIOR (copiado tal cual de los scripts previos)
+# ============================================================
+def anterior_anexo2(items, config):
+    valores_numericos = [v for v in items if isinstance(v, (int, float))]
+    suma_total = sum(valores_numericos)
+    total_items = len(valores_numericos)
+    num_na = sum(1 for v in items if v == "NA")
+    num_validos = len(items) - num_na
+    max_por_item = config["limites"]["max_por_item"]
+    puntaje = round((suma_total / (total_items * max_por_item)) * 100, 1) if total_items > 0 else 0
+    categoria = None
+    for regla in sorted(config["clasificacion"], key=lambda x: x["max"]):
+        if suma_total <= regla["max"]:
+            categoria = regla["categoria"]
+            break
+    return num_validos, num_na, suma_total, puntaje, categoria
+
+
+def anterior_anexo4(items, config):
+    valores_numericos = [v for v in items if isinstance(v, (int, float))]
+    suma_total = sum(valores_numericos)
+    total_items = len(valores_numericos)
+    num_na = sum(1 for v in items if v == "NA")
+    num_validos = len(items) - num_na
+    max_por_item = config["limites"]["max_por_item"]
+    max_total = num_validos * max_por_item if num_validos > 0 else 1
+    puntaje = round((suma_total / max_total) * 100, 1) if total_items > 0 else 0
+    categoria = "Sin Clasificación"
+    for regla in sorted(config["clasificacion"], key=lambda x: x["max"]):
+        if puntaje <= regla["max"]:
+            categoria = regla["categoria"]
+            break
+    return num_validos, num_na, suma_total, puntaje, categoria
+
+
+def anterior_clasificar_anexo(anexo, col_sum):
+    if anexo == 2:
+        if col_sum <= 10: return "DEFICIENTE"
+        elif col_sum <= 20: return "REGULAR"
+        elif col_sum <= 30: return "BUENO"
+        else: return "EXCELENTE"
+    elif anexo == 3:
+        if col_sum <= 7: return "DEFICIENTE"
+        elif col_sum <= 16: return "REGULAR"
+        elif col_sum <= 25: return "BUENO"
+        else: return "EXCELENTE"
+    elif anexo == 4:
+        if col_sum <= 8: return "DEFICIENTE"
+        elif col_sum <= 18: return "REGULAR"
+        elif col_sum <= 26: return "BUENO"
+        else: return "EXCELENTE"
+    else:
+        return "Sin dato"
+
+def anterior_anexo3(bloques, reglas):
+    """Cadena de if de procesar_anexo3.procesar_ficha, una sección a la vez."""
+    resultado = []
+    for filas, clasificacion in zip(bloques, reglas):
+        items = []
+        for fila in filas:
+            if not fila or all(v is None for v in fila):
+                continue
+            si, parcial, no = fila[-3], fila[-2], fila[-1]
+            if si is not None:
+                items.append(2)
+            elif parcial is not None:
+                items.append(1)
+            elif no is not None:
+                items.append(0)
+            else:
+                items.append("NA")
+        suma_total = sum(v for v in items if isinstance(v, (int, float)))
+        categoria = "Sin escala"
+        for regla in sorted(clasificacion, key=lambda x: x["max"]):
+            if suma_total <= regla["max"]:
+                categoria = regla["categoria"]
+                break
+        resultado.append((items, suma_total, categoria))
+    return resultado
+
+# ============================================================
+# ⚡ CÁLCULO VECTORIZADO
+# ============================================================
+def vectorizado(fichas, config):
+    regla = config.get("puntaje", {})
+    umbrales = compilar_umbrales(config["clasificacion"], regla.get("categoria_defecto"))
+    matriz = matriz_items(fichas)
+    r = puntuar_matriz(matriz, config["limites"]["max_por_item"], regla.get("base", "numericos"))
+    referencia = r["puntaje"] if regla.get("clasificar_por") == "puntaje" else r["suma"]
+    puntajes = [p if t > 0 else 0 for p, t in zip(r["puntaje"].tolist(), r["total_items"].tolist())]
+    return list(zip(
+        r["num_validos"].tolist(), r["num_na"].tolist(), sumas_como_python(r["suma"], matriz.decimal),
+        puntajes, clasificar(referencia, umbrales).tolist(),
+    ))
+
+
+def vectorizado_anexo3(fichas, reglas):
+    """Marca, decodifica y reduce el lote completo (en el ETL cada worker marca su propia ficha)."""
+    largos = [len(b) for b in fichas[0]]
+    cortes = np.cumsum([0] + largos[:-1]).tolist()
+    ancho = len(fichas[0][0][0])
+    marcado = celdas_marcadas([f for bloques in fichas for b in bloques for f in b]).reshape(len(fichas), sum(largos), ancho)
+    codigos = decodificar_marcas(marcado, [0] * sum(largos), [ancho] * sum(largos))
+    totales = totales_por_seccion(codigos, cortes)
+    categorias = [clasificar(totales[:, j], compilar_umbrales(r, "Sin escala")).tolist() for j, r in enumerate(reglas)]
+    items = [items_de_marcas(codigos[:, desde:desde + n]) for desde, n in zip(cortes, largos)]
+    totales = totales.tolist()
+    return [
+        [(items[j][k], totales[k][j], categorias[j][k]) for j in range(len(largos))]
+        for k in range(len(fichas))
+    ]
+
+
+def fichas_anexo3(n, largos=(6, 6, 5), semilla=5):
+    """Bloques de filas (aspecto, Sí, Parcial, No) con marcas dobles, filas sin marca y filas vacías."""
+    rnd = random.Random(semilla)
+    opciones = [
+        ("Aspecto", "2", None, None), ("Aspecto", None, "1", None), ("Aspecto", None, None, "0"),
+        ("Aspecto", None, None, None), (None, None, None, None), ("Aspecto", "x", "1", None), (None, None, "", None),
+    ]
+    return [[[rnd.choice(opciones) for _ in range(m)] for m in largos] for _ in range(n)]
+
+
+def fichas_aleatorias(n, semilla=11):
+    rnd = random.Random(semilla)
+    valores = [0, 1, 2, 2, 1, "NA", "X", 1.5, True, 0.0]
+    return [[rnd.choice(valores) for _ in range(rnd.randint(0, 24))] for _ in range(n)]
+
+
+def fichas_raw():
+    from procesar.motor import recolectar, _extraer_items
+    fichas = {}
+    for anexo in ("anexo2", "anexo4"):
+        fichas[anexo] = []
+        for ruta, region, mes, anio in recolectar(anexo):
+            try:
+                fichas[anexo].append(_extraer_items(anexo, ruta, region, mes, anio)["items"])
+            except Exception:
+                continue
+    return fichas
+
+
+def identicos(a, b):
+    """Igualdad estricta incluyendo tipo (int vs float) y None."""
+    return all(
+        len(x) == len(y) and all(type(u) is type(v) and u == v for u, v in zip(x, y))
+        for x, y in zip(a, b)
+    ) and len(a) == len(b)
+
+
+def main(n=100_000):
+    errores = 0
+    raw = fichas_raw()
+
+    for anexo, anterior in (("anexo2", anterior_anexo2), ("anexo4", anterior_anexo4)):
+        config = cargar(anexo[-1])
+        for etiqueta, fichas in ((f"{anexo} data/raw", raw[anexo]), (f"{anexo} aleatorias", fichas_aleatorias(n))):
+            t0 = time.perf_counter()
+            esperado = [anterior(items, config) for items in fichas]
+            t_anterior = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            obtenido = vectorizado(fichas, config)
+            t_nuevo = time.perf_counter() - t0
+            ok = bool(fichas) and identicos(esperado, obtenido)   # sin fichas no hay nada comparado
+            errores += not ok
+            print(f"{etiqueta:<22} {len(fichas):>8,} fichas | anterior {t_anterior:6.3f}s | "
+                  f"vectorizado {t_nuevo:6.3f}s | {'✅' if ok else '❌'}")
+
+    reglas = [r.get("clasificacion", []) for r in cargar(3)["estructura_items"]["rangos"]]
+    fichas3 = fichas_anexo3(n)
+    t0 = time.perf_counter()
+    esperado = [anterior_anexo3(bloques, reglas) for bloques in fichas3]
+    t_anterior = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    obtenido = vectorizado_anexo3(fichas3, reglas)
+    t_nuevo = time.perf_counter() - t0
+    ok = len(esperado) == len(obtenido) == len(fichas3) and all(identicos(x, y) for x, y in zip(esperado, obtenido))
+    errores += not ok
+    print(f"{'anexo3 aleatorias':<22} {len(fichas3):>8,} fichas | anterior {t_anterior:6.3f}s | "
+          f"vectorizado {t_nuevo:6.3f}s | {'✅' if ok else '❌'}")
+
+    rnd = np.random.default_rng(3)
+    promedios = np.concatenate([rnd.uniform(-5, 45, n), np.arange(0, 41, 0.5)])
+    for anexo in (2, 3, 4):
+        esperado = [anterior_clasificar_anexo(anexo, v) for v in promedios.tolist()]
+        obtenido = clasificar(promedios, plan_anexo(f"anexo{anexo}").umbrales_tablero).tolist()
+        ok = esperado == obtenido
+        errores += not ok
+        print(f"{'tablero anexo ' + str(anexo):<22} {len(promedios):>8,} valores | {'✅' if ok else '❌'}")
+
+    if errores:
+        sys.exit(f"❌ {errores} comparación(es) con diferencias")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
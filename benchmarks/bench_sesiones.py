@@ -0,0 +1,112 @@
+# ============================================================
+# benchmarks/bench_sesiones.py
+# Memoria de N sesiones simultáneas del dashboard con el frame
+# compartido (st.cache_resource + utils/vistas.py) frente al
+# esquema anterior: st.cache_data entrega a cada llamada una copia
+# deserializada (pickle) y la página copiaba otra vez sus columnas
+#
+# Cada sesión conserva lo que una página tiene en memoria entre
+# reruns: su frame filtrado y los ítems que analiza. La mitad de
+# las sesiones no filtra (vista por defecto, sin copiar datos) y la
+# otra mitad elige una UT y un mes (copia solo de esas filas).
+# Copy-on-Write se activa como en main.py. Mide numpy (tracemalloc) + Arrow (pool de
+# pyarrow) y verifica que ambos caminos den las mismas filas y que
+# escribir en una vista no altere el frame compartido. Termina con
+# error si algo difiere.
+#
+# Uso:
+#   python benchmarks/bench_sesiones.py [filas] [sesiones]
+# ============================================================
+
+import pickle
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from bench_parquet_vs_excel import MESES, UTS, generar_anexo2
+from utils.almacen import aplicar_esquema, tipar_para_parquet
+from utils.almacen_sql import esquema_sql
+from utils.vistas import vista
+
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)   # como main.py
+
+
+def tabla(filas):
+    """Frame con la forma de la tabla anexo2 tal como la entrega consultas.filtrar."""
+    return aplicar_esquema(esquema_sql(tipar_para_parquet(generar_anexo2(filas))))
+
+
+def filtros_de(sesion):
+    if sesion % 2 == 0:
+        return {}
+    return {"UNIDAD_TERRITORIAL": [UTS[sesion % len(UTS)]], "MES": [MESES[sesion % len(MESES)]]}
+
+
+def sesion_anterior(guardado, filtros):
+    """cache_data: copia deserializada por llamada; luego filtro con copia y .copy() de los ítems."""
+    df = pickle.loads(guardado)
+    for columna, valores in filtros.items():
+        df = df[df[columna].isin(valores)]
+    items = df[[c for c in df.columns if c.startswith("ITEM_")]].copy()
+    return df, items
+
+
+def sesion_compartida(compartido, filtros):
+    df = vista(compartido, filtros)
+    return df, df[[c for c in df.columns if c.startswith("ITEM_")]]
+
+
+def memoria(funcion, sesiones):
+    """Bytes que siguen asignados (numpy + Arrow) con las N sesiones vivas."""
+    base_arrow = pa.total_allocated_bytes()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    vivas = [funcion(filtros_de(s)) for s in range(sesiones)]
+    segundos = time.perf_counter() - t0
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return actual + pa.total_allocated_bytes() - base_arrow, segundos, vivas
+
+
+def main(filas=200_000, sesiones=50):
+    df = tabla(filas)
+    mb_tabla = df.memory_usage(deep=True).sum() / 1e6
+
+    guardado = pickle.dumps(df)
+    b_anterior, t_anterior, anteriores = memoria(lambda f: sesion_anterior(guardado, f), sesiones)
+    del guardado
+    b_compartido, t_compartido, compartidas = memoria(lambda f: sesion_compartida(df, f), sesiones)
+
+    iguales = all(a[0].equals(b[0]) and a[1].equals(b[1]) for a, b in zip(anteriores, compartidas))
+
+    # Una página que escribe en su vista (como la del Anexo 5) no debe tocar el frame compartido
+    antes = df.copy()
+    escrita = vista(df, {})
+    escrita["PORCENTAJE"] = -1.0
+    escrita["NUEVA"] = 1
+    escrita.loc[escrita.index[:10], "ITEM_1"] = 99
+    intacto = df.equals(antes) and "NUEVA" not in df.columns
+    sin_copia = np.shares_memory(vista(df, {})["PORCENTAJE"].to_numpy(), df["PORCENTAJE"].to_numpy())
+
+    print(f"{filas:,} filas ({mb_tabla:.1f} MB en memoria) | {sesiones} sesiones (la mitad sin filtros)")
+    print(f"cache_data + copias  {b_anterior / 1e6:8.1f} MB  {t_anterior:6.2f}s")
+    print(f"frame compartido     {b_compartido / 1e6:8.1f} MB  {t_compartido:6.2f}s  "
+          f"({b_anterior / max(b_compartido, 1):.0f}x menos memoria)")
+    print(f"mismas filas {'✅' if iguales else '❌'} | vista sin filtros sin copia {'✅' if sin_copia else '❌'} | "
+          f"frame compartido intacto tras escribir en una vista {'✅' if intacto else '❌'}")
+
+    if not (iguales and sin_copia and intacto):
+        sys.exit("❌ el frame compartido no se comporta como se espera")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,102 @@
+# ============================================================
+# benchmarks/bench_sqlite.py
+# Tiempos de las consultas de la página del Anexo 2 sobre SQLite
+# (utils/consultas.py, WHERE ... IN con índices y GROUP BY en el
+# motor) frente al camino anterior: cargar el consolidado completo
+# (leer_consolidado, como cargar_datos) y filtrar/agrupar en pandas
+#
+# Escribe el consolidado sintético con anexar_consolidado (dataset
+# Parquet + tabla SQLite en una carpeta temporal) y compara filas
+# filtradas, promedios y modas por UT. Termina con error si difieren.
+#
+# Uso:
+#   python benchmarks/bench_sqlite.py [filas ...]
+# ============================================================
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR / "app"))
+
+from bench_parquet_vs_excel import MESES, SUPERVISORES, UTS, generar_anexo2
+from utils import almacen_sql, consultas
+from utils.almacen import anexar_consolidado, leer_consolidado
+from utils.almacen_sql import esquema_sql
+
+FILTROS = {
+    "todo": {},
+    "1 UT": {"UNIDAD_TERRITORIAL": UTS[:1]},
+    "1 UT + 1 mes": {"UNIDAD_TERRITORIAL": UTS[:1], "MES": MESES[:1]},
+    "3 UT + 2 sup.": {"UNIDAD_TERRITORIAL": UTS[:3], "SUPERVISOR": SUPERVISORES[:2]},
+}
+
+
+def con_pandas(ruta, filtros):
+    """Camino anterior: todo el consolidado en memoria, filtros con isin y groupby."""
+    df = esquema_sql(leer_consolidado(ruta))
+    for columna, valores in filtros.items():
+        df = df[df[columna].isin(valores)]
+    grupos = df.groupby("UNIDAD_TERRITORIAL", observed=True)
+    promedios = grupos["PORCENTAJE"].mean()
+    modas = grupos["EVALUACION"].agg(lambda x: x.mode()[0] if not x.mode().empty else "Sin dato")
+    return len(df), promedios, modas
+
+
+def con_sqlite(filtros):
+    filas = consultas.filtrar("anexo2", filtros)
+    promedios = consultas.promedios_por("anexo2", "UNIDAD_TERRITORIAL", ["PORCENTAJE"], filtros)
+    modas = consultas.moda_por("anexo2", "UNIDAD_TERRITORIAL", "EVALUACION", filtros)
+    return len(filas), promedios.set_index("UNIDAD_TERRITORIAL")["PORCENTAJE"], modas
+
+
+def medir(funcion, *args, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion(*args)
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def iguales(a, b):
+    n_a, prom_a, moda_a = a
+    n_b, prom_b, moda_b = b
+    prom_a = prom_a.astype(float).sort_index()
+    prom_b = prom_b.sort_index()
+    return (
+        n_a == n_b
+        and list(prom_a.index) == list(prom_b.index)
+        and np.allclose(prom_a.to_numpy(), prom_b.to_numpy(), atol=1e-3)
+        and moda_a.astype(str).sort_index().tolist() == moda_b.astype(str).sort_index().tolist()
+    )
+
+
+def main(tamanos):
+    errores = 0
+    for n in tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = Path(tmp) / "anexo2_consolidado.xlsx"
+            almacen_sql.RUTA_BASE = Path(tmp) / "consolidados.sqlite"
+            anexar_consolidado(generar_anexo2(n), ruta, exportar_excel=False)
+
+            print(f"--- {n:,} filas ---")
+            for etiqueta, filtros in FILTROS.items():
+                t_pandas, esperado = medir(con_pandas, ruta, filtros)
+                t_sql, obtenido = medir(con_sqlite, filtros)
+                ok = iguales(esperado, obtenido)
+                errores += not ok
+                print(f"{etiqueta:<14} {esperado[0]:>9,} filas | cargar + pandas {t_pandas * 1000:8.1f} ms | "
+                      f"SQLite {t_sql * 1000:8.1f} ms ({t_pandas / t_sql:5.1f}x) | {'✅' if ok else '❌'}")
+
+    if errores:
+        sys.exit("❌ los resultados de SQLite difieren de pandas")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 200_000])